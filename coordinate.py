@@ -16,8 +16,12 @@
 # Coordinate library that contains these classes:
 # {<Coordinate>} - Parses and represents geographic coordinates (latitude and
 #                  longitude).
+# {<LRUCache>} - Size-bounded LRU cache, e.g. of <Coordinate> parse results
+#                (also named <ParseCache>).
 # {<Point>} - Contains methods to calculate range, bearing, and create points
 #             from those.
+# {<FrozenPoint>} - An immutable, hashable <Point>.
+# {<PointArray>} - A compact sequence of points stored in two float64 arrays.
 #
 # Decimal degrees:
 #    123.12341234[NSEW]
@@ -37,6 +41,7 @@
 
 import re
 import math
+from array import array
 
 #
 # Constants: Radius
@@ -59,42 +64,314 @@ DEG2RAD =  0.01745329252
 RAD2DEG = 57.29577951308
 
 #
-# Class: Coordinate
+# Constant: ROTATE_TOLERANCE
+# Documented agreement in degrees between <Point.rotatePoints> and
+# <Point.rotate>, about a millimeter on the ground.
 #
-# Parse an input into a known coordinate.
+ROTATE_TOLERANCE = 1e-8
+
+#
+# Variable: UNITS
+#
+# Registry of distance units, mapping the lower case unit name to the radius
+# of the earth in that unit. Extend it with <registerUnits>.
+#
+UNITS = {
+    'km': EARTH_RADIUS_KM,
+    'm': EARTH_RADIUS_M,
+    'mi': EARTH_RADIUS_MI,
+    'ft': EARTH_RADIUS_FT,
+    'nmi': EARTH_RADIUS_NMI,
+    }
+
+
+#
+# Function: registerUnits
+#
+# Register a distance unit so it can be used wherever units are accepted.
+#
+# Parameters:
+# name   - {string} The unit name, case insensitive.
+# radius - {float} The radius of the earth in that unit.
+#
+def registerUnits(name, radius):
+    radius = float(radius)
+    if radius <= 0:
+        raise ValueError("Invalid radius for units %s: %s" % (name, radius))
+    UNITS[name.lower()] = radius
+
+
+#
+# Function: getRadius
+#
+# Resolve a unit name once, so loops can pass the radius to
+# <Point.geoDistanceTo> and <Point.geoWaypoint> instead of the name.
+#
+# Parameters:
+# units - {string} A unit name from <UNITS>.
+#
+# Returns:
+# {float} The radius of the earth in `units'. Unknown or empty units are
+# kilometers, <EARTH_RADIUS_KM>.
+#
+def getRadius(units):
+    if not units:
+        return EARTH_RADIUS_KM
+    return UNITS.get(units.lower(), EARTH_RADIUS_KM)
+
+#
+# Function: _numericDd
+#
+# (Private) Decimal degrees of a numeric coordinate without going through
+# <Coordinate>. <Coordinate> formats numbers with "%.12f" before matching
+# them, so the result is the same as float(Coordinate(value).getDd()).
+#
+# Parameters:
+# value - {number or string} The coordinate.
+#
+# Returns:
+# {float} The decimal degrees, or None if `value' is not a number or is out
+# of the range <Coordinate> accepts.
+#
+def _numericDd(value):
+    try:
+        dd = float("%.12f" % float(value))
+    except (TypeError, ValueError):
+        return None
+    
+    if -1000.0 < dd < 1000.0:
+        return dd
+    return None
+
+
+#
+# Function: _numericGroups
+#
+# (Private) Split a plain decimal number, [-]ddd.ddd with at most three
+# integer digits and one to fifteen decimals, as the first two of
+# <Coordinate.patterns> would.
+#
+# Parameters:
+# coord - {string} The unformatted coordinate.
+#
+# Returns:
+# {2-tuple} (position, groups) of the pattern that matches, or None if
+# `coord' is not of this form.
+#
+def _numericGroups(coord):
+    if coord[:1] == '-':
+        (sign, body) = ('-', coord[1:])
+    else:
+        (sign, body) = ('', coord)
+    dot = body.find('.')
+    if not 0 <= dot <= 3 or not 1 <= len(body) - dot - 1 <= 15:
+        return None
+    if not (dot == 0 or body[:dot].isdigit()) or not body[dot+1:].isdigit():
+        return None
+    if sign:
+        return (2, (sign, body, body[dot:], ''))
+    return (1, ('', body, body[dot:], ''))
+
+
+#
+# Function: _alternation
+#
+# (Private) Combine regular expressions into one alternation so an input is
+# matched against all of them in a single pass. Each pattern is wrapped in a
+# group of its own and the alternatives are tried in order, so the first
+# pattern that matches wins, exactly as if each was matched on its own.
+#
+# Parameters:
+# patterns - {list} The regular expressions, as strings.
+#
+# Returns:
+# {2-tuple} The compiled alternation and a dictionary that maps the index of
+# a wrapping group (which is `lastindex' of a match) to the 1-based position
+# of its pattern and the indices of that pattern's own groups.
+#
+def _alternation(patterns):
+    alternatives = {}
+    index = 1
+    for position, pattern in enumerate(patterns):
+        count = re.compile(pattern).groups
+        alternatives[index] = (position + 1, tuple(range(index + 1, index + count + 1)))
+        index += count + 1
+    
+    regex = re.compile('^(?:' + '|'.join(['(%s)' % p for p in patterns]) + ')')
+    return (regex, alternatives)
+
+
 #
-class Coordinate:
-    coord = None     # string
+# Class: LRUCache
+#
+# A size-bounded least recently used cache. <Coordinate.cache> uses one for
+# parse results keyed on (coordinate string, axis), which helps feeds that
+# repeat the same coordinate text. Counts hits and misses so its size can
+# be tuned.
+#
+class LRUCache(object):
+    
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # maxsize - {int} The maximum number of entries kept.
+    #
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.clear()
+    
     
-    coord_dd = None  # real number
-    coord_dms = None # 3-tuple
-    direction = None # string in [N,S,E,W]
+    #
+    # Method: clear
+    #
+    # Remove all entries and reset the counters.
+    #
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        # Circular doubly linked list of [prev, next, key, value] links,
+        # least recently used first.
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None]
     
-    groups = None    # tuple
+    
+    #
+    # Method: get
+    #
+    # Parameters:
+    # key - The key to look up.
+    #
+    # Returns:
+    # The cached value, or None on a miss.
+    #
+    def get(self, key):
+        link = self._entries.get(key)
+        if link is None:
+            self.misses += 1
+            return None
+        
+        # Move the link to the most recently used end.
+        (prev, next) = link[0], link[1]
+        prev[1] = next
+        next[0] = prev
+        root = self._root
+        last = root[0]
+        last[1] = root[0] = link
+        link[0] = last
+        link[1] = root
+        
+        self.hits += 1
+        return link[3]
+    
+    
+    #
+    # Method: put
+    #
+    # Add an entry, evicting the least recently used one if the cache is
+    # full.
+    #
+    # Parameters:
+    # key   - The key.
+    # value - The value, anything but None.
+    #
+    def put(self, key, value):
+        entries = self._entries
+        root = self._root
+        link = entries.get(key)
+        if link is not None:
+            # Replace the value and move the link to the most recently used
+            # end, as <get> does.
+            link[3] = value
+            (prev, next) = link[0], link[1]
+            prev[1] = next
+            next[0] = prev
+            last = root[0]
+            last[1] = root[0] = link
+            link[0] = last
+            link[1] = root
+            return
+        
+        if len(entries) >= self.maxsize:
+            oldest = root[1]
+            root[1] = oldest[1]
+            oldest[1][0] = root
+            del entries[oldest[2]]
+        
+        last = root[0]
+        link = [last, root, key, value]
+        last[1] = root[0] = entries[key] = link
+    
+    
+    #
+    # Method: info
+    #
+    # Returns:
+    # {4-tuple} (hits, misses, maxsize, current size).
+    #
+    def info(self):
+        return (self.hits, self.misses, self.maxsize, len(self._entries))
+    
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+#
+# Class: ParseCache
+#
+# The <LRUCache> under the name it was introduced with, as a cache of
+# <Coordinate> parse results.
+#
+ParseCache = LRUCache
+
+
+#
+# Class: Coordinate
+#
+# Parse an input into a known coordinate.
+#
+class Coordinate(object):
+    __slots__ = ('coord', 'coord_dd', 'coord_dms', 'direction', 'groups')
     
     # NOTE: Order Matters. The first two produce a 4-tuple, the other four
     # produce a 6-tuple
-    regs = [
+    patterns = [
         # 123.12341234[NSEW]
-        re.compile(r'''^\s*()([0-9]{0,3}(\.[0-9]{1,15})?)\s*([nNsSeEwW]?)\s*$'''),
+        r'''\s*()([0-9]{0,3}(\.[0-9]{1,15})?)\s*([nNsSeEwW]?)\s*$''',
         
         # [NSEW+-]123.12341234
-        re.compile(r'''^\s*([nNsSeEwW+-]?)\s*([0-9]{0,3}(\.[0-9]{1,15})?)()\s*$'''),
+        r'''\s*([nNsSeEwW+-]?)\s*([0-9]{0,3}(\.[0-9]{1,15})?)()\s*$''',
         
         # [NSEW+-]11d22m33.333333s
-        re.compile(r'''\s*([nNsSeEwW+-]?)\s*([0-9]{0,3})\s*[dD]\s*([0-9]{0,2})\s*[mM]\s*([0-9]{0,2}(\.[0-9]{1,15})?)\s*[sS]()\s*$'''),
+        r'''\s*([nNsSeEwW+-]?)\s*([0-9]{0,3})\s*[dD]\s*([0-9]{0,2})\s*[mM]\s*([0-9]{0,2}(\.[0-9]{1,15})?)\s*[sS]()\s*$''',
         
         # 11d22m33.333333s[NSEW]
-        re.compile(r'''\s*()([0-9]{0,3})\s*[dD]\s*([0-9]{0,2})\s*[mM]\s*([0-9]{0,2}(\.[0-9]{1,15})?)\s*[sS]\s*([nNsSeEwW]?)\s*$'''),
+        r'''\s*()([0-9]{0,3})\s*[dD]\s*([0-9]{0,2})\s*[mM]\s*([0-9]{0,2}(\.[0-9]{1,15})?)\s*[sS]\s*([nNsSeEwW]?)\s*$''',
         
         # [NSEW+-]11:22:33.333333
-        re.compile(r'''\s*([nNsSeEwW+-]?)\s*([0-9]{0,3})\s*:\s*([0-9]{0,2})\s*:\s*([0-9]{0,2}(\.[0-9]{1,15})?)()\s*$'''),
+        r'''\s*([nNsSeEwW+-]?)\s*([0-9]{0,3})\s*:\s*([0-9]{0,2})\s*:\s*([0-9]{0,2}(\.[0-9]{1,15})?)()\s*$''',
         
         # 11:22:33.333333[NSEW]
-        re.compile(r'''\s*()([0-9]{0,3})\s*:\s*([0-9]{0,2})\s*:\s*([0-9]{0,2}(\.[0-9]{1,15})?)\s*([nNsSeEwW]?)\s*$'''),
+        r'''\s*()([0-9]{0,3})\s*:\s*([0-9]{0,2})\s*:\s*([0-9]{0,2}(\.[0-9]{1,15})?)\s*([nNsSeEwW]?)\s*$''',
         
         ]
     
+    # All of the patterns as one anchored regular expression, see
+    # <_alternation>. Compiled by <compile> on first use, so programs that
+    # only see plain numbers never compile it.
+    regex = None
+    alternatives = None
+    
+    # Optional <ParseCache> of parse results, shared by all instances. Set it
+    # to a <ParseCache> to enable caching, e.g.
+    # Coordinate.cache = ParseCache(4096)
+    cache = None
+    
     
     # 
     # Method: Constructor
@@ -105,6 +382,14 @@ class Coordinate:
     #                  Either Longitude or Latitude.
     #
     def __init__(self, coord, axis=''):
+        self.coord = None     # string
+        
+        self.coord_dd = None  # real number
+        self.coord_dms = None # 3-tuple
+        self.direction = None # string in [N,S,E,W]
+        
+        self.groups = None    # tuple
+        
         try:
             c = float(coord)
             self.coord = "%.12f" % c
@@ -113,6 +398,21 @@ class Coordinate:
         self._parse(axis)
     
     
+    #
+    # Method: __getstate__
+    #
+    # Slotted objects have no __dict__ for pickle to save; the state is the
+    # values of the slots instead.
+    #
+    def __getstate__(self):
+        return tuple([getattr(self, name) for name in Coordinate.__slots__])
+    
+    
+    def __setstate__(self, state):
+        for name, value in zip(Coordinate.__slots__, state):
+            setattr(self, name, value)
+    
+    
     #
     # Method: _parse
     #
@@ -123,22 +423,62 @@ class Coordinate:
     #                 Either Longitude or Latitude
     #
     def _parse(self, axis=''):
-        # Match the unformatted coordinate by the given regular expressions
-        # list.
-        position = 1
-        for r in self.regs:
-            m = r.match(self.coord)
-            if m:
-                self.groups = m.groups()
-                break
-            else:
-                position += 1
-                continue
-        
-        # If there was no match, return.
-        if not self.groups:
+        cache = self.cache
+        if cache is None:
+            self._parse_uncached(axis)
             return
         
+        key = (self.coord, axis)
+        parsed = cache.get(key)
+        if parsed is None:
+            self._parse_uncached(axis)
+            cache.put(key, (self.groups, self.direction, self.coord_dd, self.coord_dms))
+        else:
+            (self.groups, self.direction, self.coord_dd, self.coord_dms) = parsed
+    
+    
+    #
+    # Method: compile
+    #
+    # (Class method) Compile <patterns> into <regex> and <alternatives> if
+    # that has not been done yet.
+    #
+    # Returns:
+    # {2-tuple} (regex, alternatives)
+    #
+    @classmethod
+    def compile(cls):
+        if Coordinate.regex is None:
+            (Coordinate.regex, Coordinate.alternatives) = _alternation(Coordinate.patterns)
+        return (Coordinate.regex, Coordinate.alternatives)
+    
+    
+    #
+    # Method: _parse_uncached
+    #
+    # (Private) Parse the objects own data without consulting <cache>.
+    #
+    # Parameters:
+    # axis - {string} The axis in which the unformatted coordinate is in.
+    #                 Either Longitude or Latitude
+    #
+    def _parse_uncached(self, axis=''):
+        # Plain decimal numbers, which includes every number passed in, are
+        # split without the regular expression.
+        numeric = _numericGroups(self.coord)
+        if numeric is not None:
+            (position, self.groups) = numeric
+        else:
+            # Match the unformatted coordinate against all patterns in a
+            # single pass. If there was no match, return.
+            (regex, alternatives) = self.compile()
+            m = regex.match(self.coord)
+            if not m:
+                return
+            
+            (position, indices) = alternatives[m.lastindex]
+            self.groups = m.group(*indices)
+        
         # Parse direction and coordinate.
         if position <= 2:
             if self.groups[0]:
@@ -381,6 +721,71 @@ class Coordinate:
         print "DMS:      %.12f" % self.getDms()
 
 
+#
+# Function: parse_many
+#
+# Parse a column of coordinates at once. Gives the same values as
+# float(Coordinate(coord, axis).getDd()) for every entry, but without
+# creating a <Coordinate> per entry or formatting its result as a string.
+#
+# Parameters:
+# strings - {iterable} The unformatted coordinates.
+# axis    - {string} The axis of the coordinates, Longitude or Latitude. The
+#                    sign of a value does not depend on it; it is accepted
+#                    for symmetry with <Coordinate>.
+#
+# Returns:
+# {3-tuple} (values, valid, invalid) where values is an array('d') of the
+# signed decimal degrees (NaN where invalid), valid is an array('b') that
+# is 1 where the entry parsed, and invalid is the list of the indices of
+# the entries that did not. Invalid entries never raise.
+#
+def parse_many(strings, axis=''):
+    values = array('d')
+    valid = array('b')
+    invalid = []
+    nan = float('nan')
+    
+    (regex, alternatives) = Coordinate.compile()
+    match = regex.match
+    
+    for i, coord in enumerate(strings):
+        dd = _numericDd(coord)
+        if dd is not None:
+            values.append(dd)
+            valid.append(1)
+            continue
+        
+        m = match(str(coord))
+        if m:
+            (position, indices) = alternatives[m.lastindex]
+            groups = m.group(*indices)
+            try:
+                if position <= 2:
+                    dd = float(groups[1])
+                    direction = groups[0] or groups[3]
+                else:
+                    dd = int(groups[1]) + (int(groups[2])/60.0) + (float(groups[3])/(60.0*60.0))
+                    dd = round(dd, 6)
+                    direction = groups[0] or groups[5]
+            except ValueError:
+                dd = None
+        
+        if dd is None:
+            values.append(nan)
+            valid.append(0)
+            invalid.append(i)
+            continue
+        
+        dd = round(dd, 12)
+        if direction in ('-', 's', 'S', 'w', 'W'):
+            dd = -dd
+        values.append(dd)
+        valid.append(1)
+    
+    return (values, valid, invalid)
+
+
 #
 # Class: Point
 #
@@ -392,21 +797,68 @@ class Coordinate:
 # Williams, Ed, 2000, "Aviation Formulary V1.43" web page
 # http://williams.best.vwh.net/avform.htm
 #
-class Point:
-    x = None
-    y = None
+class Point(object):
+    __slots__ = ('x', 'y', '_trig')
     
     
     #
     # Method: Constructor
     #
+    # Numbers, and strings that are plain numbers, are rounded to 12 decimals
+    # directly; anything else is parsed by <Coordinate>.
+    #
     # Parameters:
     # x - {string} The x coordinate of the point.
     # y - {string} The y coordinate of the point.
     #
     def __init__(self, x, y):
-        self.x = float(Coordinate(x, "Lon").getDd())
-        self.y = float(Coordinate(y, "Lat").getDd())
+        self.x = _numericDd(x)
+        if self.x is None:
+            self.x = float(Coordinate(x, "Lon").getDd())
+        
+        self.y = _numericDd(y)
+        if self.y is None:
+            self.y = float(Coordinate(y, "Lat").getDd())
+        
+        self._trig = None
+    
+    
+    #
+    # Method: fromFloats
+    #
+    # (Class method) Create a point from decimal degrees without any parsing
+    # or rounding. Used for points generated by calculations.
+    #
+    # Parameters:
+    # x - {float} The longitude in decimal degrees.
+    # y - {float} The latitude in decimal degrees.
+    #
+    # Returns:
+    # {<Point>} The new point.
+    #
+    @classmethod
+    def fromFloats(cls, x, y):
+        point = cls.__new__(cls)
+        point.x = x
+        point.y = y
+        point._trig = None
+        return point
+    
+    
+    #
+    # Method: __getstate__
+    #
+    # The state pickle saves, the coordinates. The cached trig values are
+    # computed again after unpickling.
+    #
+    def __getstate__(self):
+        return (self.x, self.y)
+    
+    
+    def __setstate__(self, state):
+        object.__setattr__(self, 'x', state[0])
+        object.__setattr__(self, 'y', state[1])
+        object.__setattr__(self, '_trig', None)
     
     
     #
@@ -422,45 +874,58 @@ class Point:
         return "(%.12f, %12f)" % (self.x, self.y)
     
     
+    #
+    # Method: _trigValues
+    #
+    # The point in radians and the sine and cosine of its latitude, computed
+    # on first use and kept until <x> or <y> changes. The geodesic methods
+    # take the values of the point they are called on from here, so repeated
+    # calls on one center do no trigonometry for the center.
+    #
+    # Returns:
+    # {tuple} (x, y, x in radians, y in radians, sin(y), cos(y)).
+    #
+    def _trigValues(self):
+        trig = self._trig
+        if trig is None or trig[0] != self.x or trig[1] != self.y:
+            y = self.y * DEG2RAD
+            trig = (self.x, self.y, self.x * DEG2RAD, y, math.sin(y), math.cos(y))
+            object.__setattr__(self, '_trig', trig)
+        return trig
+    
+    
     #
     # Method: geoDistanceTo
     #
     # Parameters:
-    # point - {<Point>}
+    # point  - {<Point>}
+    # units  - {string} A unit name from <UNITS>.
+    # radius - {float} The earth radius in the wanted units, as returned by
+    #          <getRadius>. Overrides `units'.
     #
     # Returns:
     # {float} Great Circle distance to Point. Coordinates must be in decimal
     # degrees.
     #
-    def geoDistanceTo(self, point, units='km'):
-        global EARTH_RADIUS_KM, EARTH_RADIUS_MI, EARTH_RADIUS_NMI, DEG2RAD
+    def geoDistanceTo(self, point, units='km', radius=None):
+        global DEG2RAD
         
         x = [0, 0]
         y = [0, 0]
-        radius = 0
         
         # Calculates the radius of the earth used
-        if units and units.lower() == 'km':
-            radius = EARTH_RADIUS_KM
-        elif units and units.lower() == 'm':
-            radius = EARTH_RADIUS_M
-        elif units and units.lower() == 'mi':
-            radius = EARTH_RADIUS_MI
-        elif units and units.lower() == 'ft':
-            radius = EARTH_RADIUS_FT
-        elif units and units.lower() == 'nmi':
-            radius = EARTH_RADIUS_NMI
-        else:
-            radius = EARTH_RADIUS_KM
+        if radius is None:
+            radius = getRadius(units)
         
-        x[0] = self.x * DEG2RAD
+        trig = self._trigValues()
+        x[0] = trig[2]
         x[1] = point.x * DEG2RAD
-        y[0] = self.y * DEG2RAD
+        y[0] = trig[3]
         y[1] = point.y * DEG2RAD
         
         a = math.pow( math.sin(( y[1]-y[0] ) / 2.0 ), 2)
         b = math.pow( math.sin(( x[1]-x[0] ) / 2.0 ), 2)
-        c = math.pow(( a + math.cos( y[1] ) * math.cos( y[0] ) * b ), 0.5)
+        c = math.pow(( a + math.cos( y[1] ) * trig[5] * b ), 0.5)
         
         return 2 * math.asin( c ) * radius
     
@@ -483,13 +948,12 @@ class Point:
         bearing = None
         adjust = None
         
-        x[0] = self.x * DEG2RAD
+        (x0, y0, x[0], y[0], sin_y0, cos_y0) = self._trigValues()
         x[1] = point.x * DEG2RAD
-        y[0] = self.y * DEG2RAD
         y[1] = point.y * DEG2RAD
         
         a = math.cos(y[1]) * math.sin(x[1] - x[0])
-        b = math.cos(y[0]) * math.sin(y[1]) - math.sin(y[0]) * math.cos(y[1]) * math.cos(x[1] - x[0])
+        b = cos_y0 * math.sin(y[1]) - sin_y0 * math.cos(y[1]) * math.cos(x[1] - x[0])
         
         if a == 0 and b == 0:
             return 0.0
@@ -517,50 +981,82 @@ class Point:
     # Parameters:
     # distance - {float}
     # bearing  - {float}
-    # units    - {string}
+    # units    - {string} A unit name from <UNITS>.
+    # radius   - {float} The earth radius in the units of `distance', as
+    #            returned by <getRadius>. Overrides `units'.
     #
     # Returns:
     # {<Point>} - The generated point given by distance and bearing.
     #
-    def geoWaypoint(self, distance, bearing, units='km'):
-        global EARTH_RADIUS_KM, EARTH_RADIUS_MI, EARTH_RADIUS_NMI
+    def geoWaypoint(self, distance, bearing, units='km', radius=None):
         global DEG2RAD, RAD2DEG
         
-        wp = Point(0, 0)
-        radius = 0
-        
         # Calculates the radius of the earth used
-        if units and units.lower() == 'km':
-            radius = EARTH_RADIUS_KM
-        elif units and units.lower() == 'm':
-            radius = EARTH_RADIUS_M
-        elif units and units.lower() == 'mi':
-            radius = EARTH_RADIUS_MI
-        elif units and units.lower() == 'ft':
-            radius = EARTH_RADIUS_FT
-        elif units and units.lower() == 'nmi':
-            radius = EARTH_RADIUS_NMI
-        else:
-            radius = EARTH_RADIUS_KM
+        if radius is None:
+            radius = getRadius(units)
         
-        x = self.x * DEG2RAD
-        y = self.y * DEG2RAD
+        (x0, y0, x, y, sin_y, cos_y) = self._trigValues()
         radBearing = bearing * DEG2RAD
         
         # Convert arc distance to radians
         c = distance / radius
         
-        wp.y = math.asin( math.sin(y) * math.cos(c) + math.cos(y) * math.sin(c) * math.cos(radBearing)) * RAD2DEG
+        wy = math.asin( sin_y * math.cos(c) + cos_y * math.sin(c) * math.cos(radBearing)) * RAD2DEG
         
         a = math.sin(c) * math.sin(radBearing)
-        b = math.cos(y) * math.cos(c) - math.sin(y) * math.sin(c) * math.cos(radBearing)
+        b = cos_y * math.cos(c) - sin_y * math.sin(c) * math.cos(radBearing)
         
         if b == 0:
-            wp.x = self.x
+            wx = self.x
         else:
-            wp.x = self.x + math.atan(a/b) * RAD2DEG
+            wx = self.x + math.atan(a/b) * RAD2DEG
         
-        return wp
+        return Point.fromFloats(wx, wy)
+    
+    
+    #
+    # Method: geoWaypoints
+    #
+    # <geoWaypoint> for many distance and bearing pairs from this point in
+    # one call, e.g. the four edges of a footprint.
+    #
+    # Parameters:
+    # waypoints - {iterable} (distance, bearing) pairs.
+    # units     - {string} A unit name from <UNITS>.
+    # radius    - {float} See <geoWaypoint>.
+    #
+    # Returns:
+    # {list} The generated points, in order. Equal to calling <geoWaypoint>
+    # for each pair.
+    #
+    def geoWaypoints(self, waypoints, units='km', radius=None):
+        if radius is None:
+            radius = getRadius(units)
+        
+        (x0, y0, x, y, sin_y, cos_y) = self._trigValues()
+        sin = math.sin
+        cos = math.cos
+        result = []
+        for distance, bearing in waypoints:
+            radBearing = bearing * DEG2RAD
+            c = distance / radius
+            sin_c = sin(c)
+            cos_c = cos(c)
+            cos_b = cos(radBearing)
+            
+            wy = math.asin( sin_y * cos_c + cos_y * sin_c * cos_b) * RAD2DEG
+            
+            a = sin_c * sin(radBearing)
+            b = cos_y * cos_c - sin_y * sin_c * cos_b
+            
+            if b == 0:
+                wx = x0
+            else:
+                wx = x0 + math.atan(a/b) * RAD2DEG
+            
+            result.append(Point.fromFloats(wx, wy))
+        return result
+    
     
     #
     # Method: rotate
@@ -577,6 +1073,232 @@ class Point:
             return self
         
         bearing = point.geoBearingTo(self)
-        distance = point.geoDistanceTo(self)
+        distance = point.geoDistanceTo(self, radius=EARTH_RADIUS_KM)
         
-        return point.geoWaypoint(distance, bearing+degrees)
+        return point.geoWaypoint(distance, bearing+degrees, radius=EARTH_RADIUS_KM)
+    
+    
+    #
+    # Method: rotatePoints
+    #
+    # Rotate many points about this point in a single pass. The rotation is
+    # done directly on unit vectors with Rodrigues' formula, with the axis
+    # and the sine and cosine of the angle computed once, instead of going
+    # through <geoBearingTo>, <geoDistanceTo> and <geoWaypoint> per point.
+    # Distances are not involved, so the result does not depend on units.
+    #
+    # Accuracy:
+    # Both methods are exact rotations on the sphere; results agree with
+    # <rotate> to within <ROTATE_TOLERANCE> degrees for points less than
+    # 1000 km from the center and away from the poles (floating point
+    # rounding only). Unlike <rotate>, the result stays correct when the
+    # rotated point is across the pole or more than 90 degrees of longitude
+    # away from the center.
+    #
+    # Parameters:
+    # points  - {iterable} The <Point> objects to rotate.
+    # degrees - {float} The rotation angle in degrees, clockwise.
+    #
+    # Returns:
+    # {list} The rotated points as new <Point> objects, in order.
+    #
+    def rotatePoints(self, points, degrees):
+        if degrees == 0.0 or degrees == 360.0:
+            return list(points)
+        
+        # Work in a frame where this point has longitude 0, so the axis is
+        # (kx, 0, kz). A clockwise rotation seen from above is a negative
+        # rotation about the outward axis.
+        trig = self._trigValues()
+        kx = trig[5]
+        kz = trig[4]
+        theta = -degrees * DEG2RAD
+        c = math.cos(theta)
+        s = math.sin(theta)
+        t = 1.0 - c
+        
+        sin = math.sin
+        cos = math.cos
+        x0 = self.x
+        rotated = []
+        for point in points:
+            y = point.y * DEG2RAD
+            dx = (point.x - x0) * DEG2RAD
+            cos_y = cos(y)
+            vx = cos_y * cos(dx)
+            vy = cos_y * sin(dx)
+            vz = sin(y)
+            
+            dot = t * (kx * vx + kz * vz)
+            rx = vx * c - kz * vy * s + kx * dot
+            ry = vy * c + (kz * vx - kx * vz) * s
+            rz = vz * c + kx * vy * s + kz * dot
+            
+            if rz > 1.0:
+                rz = 1.0
+            elif rz < -1.0:
+                rz = -1.0
+            
+            rotated.append(Point.fromFloats(
+                x0 + math.atan2(ry, rx) * RAD2DEG,
+                math.asin(rz) * RAD2DEG))
+        
+        return rotated
+
+
+
+#
+# Class: FrozenPoint
+#
+# An immutable <Point>. The coordinates cannot be changed after
+# construction, so frozen points can be used as dictionary keys and shared
+# freely.
+#
+class FrozenPoint(Point):
+    __slots__ = ()
+    
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # x - {string} The x coordinate of the point.
+    # y - {string} The y coordinate of the point.
+    #
+    def __init__(self, x, y):
+        point = Point(x, y)
+        object.__setattr__(self, 'x', point.x)
+        object.__setattr__(self, 'y', point.y)
+        object.__setattr__(self, '_trig', None)
+    
+    
+    #
+    # Method: fromFloats
+    #
+    # (Class method) See <Point.fromFloats>.
+    #
+    @classmethod
+    def fromFloats(cls, x, y):
+        point = cls.__new__(cls)
+        object.__setattr__(point, 'x', x)
+        object.__setattr__(point, 'y', y)
+        object.__setattr__(point, '_trig', None)
+        return point
+    
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenPoint is immutable")
+    
+    
+    def __delattr__(self, name):
+        raise AttributeError("FrozenPoint is immutable")
+    
+    
+    def __eq__(self, other):
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+    
+    
+    def __ne__(self, other):
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.x != other.x or self.y != other.y
+    
+    
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+
+#
+# Class: PointArray
+#
+# A sequence of points stored as two contiguous float64 buffers (<x> and
+# <y>) instead of one <Point> object per point. Indexing creates a <Point>
+# on demand. The buffers support the buffer protocol, so they can be wrapped
+# without copying, e.g. by numpy.frombuffer(points.x).
+#
+class PointArray(object):
+    __slots__ = ('x', 'y')
+    
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # points - {iterable} Optional <Point> objects to add.
+    #
+    def __init__(self, points=()):
+        self.x = array('d')
+        self.y = array('d')
+        self.extend(points)
+    
+    
+    #
+    # Method: fromFloats
+    #
+    # (Class method) Create a point array from sequences of longitudes and
+    # latitudes in decimal degrees.
+    #
+    # Parameters:
+    # xs - {iterable} The longitudes.
+    # ys - {iterable} The latitudes.
+    #
+    # Returns:
+    # {<PointArray>} The new point array.
+    #
+    @classmethod
+    def fromFloats(cls, xs, ys):
+        points = cls()
+        points.x.extend(xs)
+        points.y.extend(ys)
+        if len(points.x) != len(points.y):
+            raise ValueError("xs and ys must have the same length")
+        return points
+    
+    
+    def __getstate__(self):
+        return (self.x, self.y)
+    
+    
+    def __setstate__(self, state):
+        (self.x, self.y) = state
+    
+    
+    #
+    # Method: append
+    #
+    # Parameters:
+    # point - {<Point>} The point to add.
+    #
+    def append(self, point):
+        self.x.append(point.x)
+        self.y.append(point.y)
+    
+    
+    #
+    # Method: extend
+    #
+    # Parameters:
+    # points - {iterable} The <Point> objects to add.
+    #
+    def extend(self, points):
+        for point in points:
+            self.x.append(point.x)
+            self.y.append(point.y)
+    
+    
+    def __len__(self):
+        return len(self.x)
+    
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PointArray.fromFloats(self.x[index], self.y[index])
+        return Point.fromFloats(self.x[index], self.y[index])
+    
+    
+    def __iter__(self):
+        fromFloats = Point.fromFloats
+        for i in xrange(len(self.x)):
+            yield fromFloats(self.x[i], self.y[i])
@@ -0,0 +1,154 @@
+import coordinate
+import sys
+import timeit
+
+#
+# Benchmarks for the coordinate module. Each entry is (name, statement) run
+# against SETUP; the reported time is the best of REPEAT runs divided by the
+# number of calls.
+#
+SETUP = """
+import coordinate
+cp = coordinate.Point(-147.5, 64.8)
+p = cp.geoWaypoint(300.0, 45.0, 'm')
+"""
+
+# A mix of the decimal degree, degrees-minutes-seconds and colon forms.
+CORPUS = ["-64.12347874", "N 89.1234", "123.1234W", "44D 10M 32.123S S",
+          "-22d33m44.444444s", "11d 22m 33.333s E", "11:22:33.333N",
+          "-22:33:44.444444", "E 1:9:0", "not a coordinate"]
+
+REPEAT = 3
+NUMBER = 20000
+
+BENCHMARKS = [
+    ("Point(string)", "coordinate.Point('147d 30m 0s W', '64d 48m 0s N')"),
+    ("Point(float)", "coordinate.Point(-147.5, 64.8)"),
+    ("Point.fromFloats", "coordinate.Point.fromFloats(-147.5, 64.8)"),
+    ("geoWaypoint", "cp.geoWaypoint(300.0, 45.0, 'm')"),
+    ("geoWaypoint(radius)", "cp.geoWaypoint(300.0, 45.0, radius=coordinate.EARTH_RADIUS_M)"),
+    ("geoWaypoints(4)", "cp.geoWaypoints(((300.0, 0.0), (300.0, 180.0), (200.0, 270.0), (200.0, 90.0)), 'm')"),
+    ("geoDistanceTo", "cp.geoDistanceTo(p, 'm')"),
+    ("geoBearingTo", "cp.geoBearingTo(p)"),
+    ("rotate", "p.rotate(cp, 30.0)"),
+    ("rotatePoints(4)", "cp.rotatePoints((p, p, p, p), 30.0)"),
+    ]
+
+
+def bench(stmt, setup=SETUP, number=NUMBER, repeat=REPEAT):
+    """
+    Returns the best time of one execution of `stmt' in microseconds.
+    """
+    t = min(timeit.repeat(stmt, setup, repeat=repeat, number=number))
+    return t / number * 1e6
+
+
+#
+# Dict based equivalent of the slotted classes, i.e. what every instance cost
+# before __slots__ was added.
+#
+class _DictObject(object):
+    
+    def __init__(self, obj):
+        for name in _slots(obj):
+            setattr(self, name, getattr(obj, name))
+
+
+def _slots(obj):
+    names = []
+    for cls in type(obj).__mro__:
+        names.extend(getattr(cls, '__slots__', ()))
+    return names
+
+
+def sizeof(obj):
+    """
+    Returns the bytes used by `obj', its instance dictionary and the values
+    of its attributes (one level deep).
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+        values = obj.__dict__.values()
+    else:
+        values = [getattr(obj, name) for name in _slots(obj)]
+    for value in values:
+        size += sys.getsizeof(value)
+    return size
+
+
+def membench(count=100000):
+    """
+    Returns a list of (name, bytes per point) for `count' points stored in
+    a list of objects and in a <coordinate.PointArray>.
+    """
+    xs = [-147.0 + i * 1e-6 for i in xrange(count)]
+    ys = [64.0 + i * 1e-6 for i in xrange(count)]
+    pointer = sys.getsizeof([None] * 2) - sys.getsizeof([None])
+    results = []
+    
+    for name, make in [
+            ("Point (dict)", lambda x, y: _DictObject(coordinate.Point.fromFloats(x, y))),
+            ("Point (slots)", coordinate.Point.fromFloats),
+            ("FrozenPoint", coordinate.FrozenPoint.fromFloats)]:
+        points = [make(x, y) for x, y in zip(xs, ys)]
+        total = sum(sizeof(p) for p in points) + pointer * count
+        results.append((name, float(total) / count))
+    
+    points = coordinate.PointArray.fromFloats(xs, ys)
+    total = sys.getsizeof(points) + sys.getsizeof(points.x) + sys.getsizeof(points.y)
+    results.append(("PointArray", float(total) / count))
+    
+    coords = [coordinate.Coordinate("64d 48m %ds N" % (i % 60), "Lat")
+              for i in xrange(count / 10)]
+    for name, make in [("Coordinate (dict)", _DictObject),
+                       ("Coordinate (slots)", lambda c: c)]:
+        total = sum(sizeof(make(c)) for c in coords) + pointer * len(coords)
+        results.append((name, float(total) / len(coords)))
+    
+    return results
+
+
+def parsebench(corpus=CORPUS, number=2000):
+    """
+    Returns the number of coordinates per second Coordinate parses from
+    `corpus'.
+    """
+    def run():
+        for coord in corpus:
+            coordinate.Coordinate(coord, "Lat")
+    t = min(timeit.repeat(run, repeat=REPEAT, number=number))
+    return number * len(corpus) / t
+
+
+def parsemanybench(corpus=CORPUS, number=2000):
+    """
+    Returns the number of coordinates per second <coordinate.parse_many>
+    parses from `corpus'.
+    """
+    column = corpus * number
+    t = min(timeit.repeat(lambda: coordinate.parse_many(column, "Lat"),
+                          repeat=REPEAT, number=1))
+    return len(column) / t
+
+
+def runbench():
+    for name, stmt in BENCHMARKS:
+        print "%-20s %10.3f us" % (name, bench(stmt))
+    
+    print "%-20s %10.0f coords/s" % ("Coordinate(corpus)", parsebench())
+    print "%-20s %10.0f coords/s" % ("parse_many(corpus)", parsemanybench())
+    
+    coordinate.Coordinate.cache = cache = coordinate.ParseCache(len(CORPUS))
+    try:
+        print "%-20s %10.0f coords/s (hits %d, misses %d)" % (
+            "Coordinate(cached)", parsebench(), cache.hits, cache.misses)
+    finally:
+        coordinate.Coordinate.cache = None
+    
+    for name, size in membench():
+        print "%-20s %10.1f bytes" % (name, size)
+
+
+if __name__ == "__main__":
+    runbench()
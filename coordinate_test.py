@@ -1,5 +1,8 @@
 import coordinate
+import pickle
 import unittest
+import random
+import re
 
 class TestDecimalDegree(unittest.TestCase):
     """
@@ -278,6 +281,41 @@ class TestPoint(unittest.TestCase):
         self.assertEquals(self.p2.geoDistanceTo(self.p3, 'nmi'), self.p4.geoDistanceTo(self.p5, 'nmi'))
     
     
+    def test_Units(self):
+        for units in ['km', 'm', 'mi', 'ft', 'nmi', 'NMI', '', None, 'parsec']:
+            radius = coordinate.getRadius(units)
+            self.assertEquals(self.p1.geoDistanceTo(self.p2, units), self.p1.geoDistanceTo(self.p2, radius=radius))
+            self.assertEquals(self.p1.geoWaypoint(100, 45, units).__str__(), self.p1.geoWaypoint(100, 45, radius=radius).__str__())
+        self.assertEquals(coordinate.getRadius('parsec'), coordinate.EARTH_RADIUS_KM)
+        
+        coordinate.registerUnits('Yd', coordinate.EARTH_RADIUS_FT / 3.0)
+        try:
+            self.assertAlmostEquals(self.p1.geoDistanceTo(self.p2, 'yd') * 3, self.p1.geoDistanceTo(self.p2, 'ft'), 6)
+        finally:
+            del coordinate.UNITS['yd']
+        self.assertRaises(ValueError, coordinate.registerUnits, 'bad', 0)
+    
+    
+    def test_RotatePoints(self):
+        rnd = random.Random(7)
+        for i in range(500):
+            cp = coordinate.Point.fromFloats(rnd.uniform(-180, 180), rnd.uniform(-80, 80))
+            points = [cp.geoWaypoint(rnd.uniform(0, 1000), rnd.uniform(0, 360)) for j in range(4)]
+            degrees = rnd.uniform(0, 360)
+            rotated = cp.rotatePoints(points, degrees)
+            self.assertEquals(len(rotated), 4)
+            for point, r in zip(points, rotated):
+                expected = point.rotate(cp, degrees)
+                self.assert_(abs(expected.x - r.x) < coordinate.ROTATE_TOLERANCE)
+                self.assert_(abs(expected.y - r.y) < coordinate.ROTATE_TOLERANCE)
+                self.assertAlmostEquals(cp.geoDistanceTo(point), cp.geoDistanceTo(r), 6)
+        
+        self.assertEquals(self.p1.rotatePoints([self.p2], 0.0)[0], self.p2)
+        p = self.p1.rotatePoints([self.p2], 90.0)[0]
+        self.assertAlmostEquals(p.x, 1.0, 9)
+        self.assertAlmostEquals(p.y, 0.0, 9)
+    
+    
     def test_Bearing(self):
         self.assertEquals(self.p2.geoBearingTo(self.p1), 179.9999999999927)
         self.assertEquals(self.p1.geoBearingTo(self.p2), 0.0)
@@ -310,6 +348,210 @@ class TestPoint(unittest.TestCase):
         self.assertEquals(p9.__str__(), "(-0.635941619812, 0.635902451387)")
         p10 = p1.geoWaypoint(100, 360)
         self.assertEquals(p10.__str__(), "(1.83599164377e-11, 0.899320335493)")
+    
+    
+    def test_FromFloats(self):
+        p = coordinate.Point.fromFloats(-147.123456789012345, 64.5)
+        self.assert_(isinstance(p, coordinate.Point))
+        self.assertEquals(p.x, -147.123456789012345)
+        self.assertEquals(p.y, 64.5)
+        self.assert_(isinstance(self.p1.geoWaypoint(100, 45), coordinate.Point))
+    
+    
+    def test_NumericMatchesParser(self):
+        for v in [0, -0.0, 1, -1, 64.8, -147.5, 1e-13, -123.123456789012345,
+                  999.999999999999, "12.5", " -3 ", "1e2"]:
+            p = coordinate.Point(v, v)
+            self.assertEquals(p.x, float(coordinate.Coordinate(v, "Lon").getDd()))
+            self.assertEquals(p.y, float(coordinate.Coordinate(v, "Lat").getDd()))
+        self.assertRaises(TypeError, coordinate.Point, 1000, 0)
+        self.assertRaises(TypeError, coordinate.Point, 0, float('nan'))
+    
+    
+    def test_Slots(self):
+        self.assertRaises(AttributeError, setattr, self.p1, 'z', 0.0)
+        self.assertRaises(AttributeError, setattr, coordinate.Coordinate("1"), 'z', 0.0)
+    
+    
+    def test_TrigCache(self):
+        center = coordinate.Point(-147.5, 64.8)
+        for i in range(3):
+            p = center.geoWaypoint(10.0 + i, 30.0 * i)
+            q = coordinate.Point(-147.5, 64.8).geoWaypoint(10.0 + i, 30.0 * i)
+            self.assertEquals((p.x, p.y), (q.x, q.y))
+            self.assertEquals(center.geoDistanceTo(p), coordinate.Point(-147.5, 64.8).geoDistanceTo(p))
+            self.assertEquals(center.geoBearingTo(p), coordinate.Point(-147.5, 64.8).geoBearingTo(p))
+        
+        pairs = [(10.0, 0.0), (10.0, 180.0), (5.0, 270.0), (5.0, 90.0), (0.0, 0.0)]
+        for units in coordinate.UNITS:
+            self.assertEquals([(p.x, p.y) for p in center.geoWaypoints(pairs, units)],
+                              [(p.x, p.y) for p in [center.geoWaypoint(d, b, units) for (d, b) in pairs]])
+        
+        # Moving the point invalidates the cached values.
+        center.y = 10.0
+        p = center.geoWaypoint(10.0, 45.0)
+        q = coordinate.Point(-147.5, 10.0).geoWaypoint(10.0, 45.0)
+        self.assertEquals((p.x, p.y), (q.x, q.y))
+        self.assertEquals(center.geoDistanceTo(self.p1), coordinate.Point(-147.5, 10.0).geoDistanceTo(self.p1))
+        
+        frozen = coordinate.FrozenPoint(-147.5, 10.0)
+        self.assertEquals(frozen.geoDistanceTo(self.p1), center.geoDistanceTo(self.p1))
+        self.assertEquals(frozen.geoDistanceTo(self.p1), center.geoDistanceTo(self.p1))
+    
+    
+    def test_FrozenPoint(self):
+        p = coordinate.FrozenPoint("147d 30m 0s W", 64.8)
+        self.assertEquals((p.x, p.y), (-147.5, 64.8))
+        self.assertRaises(AttributeError, setattr, p, 'x', 0.0)
+        self.assertEquals(p, coordinate.FrozenPoint.fromFloats(-147.5, 64.8))
+        self.assertEquals(len(set([p, coordinate.FrozenPoint(-147.5, 64.8)])), 1)
+        self.assertEquals(p.geoDistanceTo(self.p1), coordinate.Point(-147.5, 64.8).geoDistanceTo(self.p1))
+    
+    
+    def test_PointArray(self):
+        points = coordinate.PointArray([self.p1, self.p2, self.p3])
+        points.append(self.p4)
+        self.assertEquals(len(points), 4)
+        self.assertEquals(points.x.itemsize, 8)
+        self.assertEquals([(p.x, p.y) for p in points], [(0.0, 0.0), (0.0, 1.0), (0.0, -1.0), (1.0, 0.0)])
+        self.assertEquals((points[-1].x, points[-1].y), (1.0, 0.0))
+        self.assertEquals(list(points[1:3].y), [1.0, -1.0])
+        self.assertRaises(ValueError, coordinate.PointArray.fromFloats, [1.0], [])
+    
+    
+    def test_Pickle(self):
+        p = coordinate.Point(-147.5, 64.8)
+        p.geoDistanceTo(self.p1)
+        objects = [p, coordinate.FrozenPoint(-147.5, 64.8),
+                   coordinate.PointArray([self.p1, self.p2]), coordinate.Coordinate("147d 30m 0s W", "Lon")]
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            (point, frozen, points, coord) = pickle.loads(pickle.dumps(objects, protocol))
+            self.assertEquals((type(point), point.x, point.y), (coordinate.Point, -147.5, 64.8))
+            self.assertEquals(point.geoDistanceTo(self.p1), p.geoDistanceTo(self.p1))
+            self.assertEquals(frozen, objects[1])
+            self.assertRaises(AttributeError, setattr, frozen, 'x', 0.0)
+            self.assertEquals((list(points.x), list(points.y)), ([0.0, 0.0], [0.0, 1.0]))
+            self.assertEquals((coord.getDd(), coord.direction), (objects[3].getDd(), objects[3].direction))
+
+
+class TestParser(unittest.TestCase):
+    """
+    Class: TestParser
+    
+    Description:
+    The unit test cases for testing that the combined regular expression of
+    the Coordinate class accepts exactly the inputs of its patterns tried one
+    after another, with the same groups.
+    """
+    
+    def setUp(self):
+        self.regs = [re.compile(p) for p in coordinate.Coordinate.patterns]
+        self.samples = ["", "-123.1234", "N123.1234N", "W 123.1234",
+                        "123.1234N", "11d 22m 33.333s", "-22d33m44.444444s",
+                        "11d 22m 33.333s E", "     1   d    9   m    0s   W     ",
+                        "11: 22: 33.333", "E22:33:44.444444", "1:9:0 S",
+                        "E2222d3333m4444.444444s", "12.5.5", "d m s"]
+        rnd = random.Random(5)
+        chars = " 0123456789.dDmMsS:nNsSeEwW+-"
+        for i in range(5000):
+            self.samples.append("".join([rnd.choice(chars) for j in range(rnd.randint(0, 14))]))
+    
+    
+    def test_SameAsSequential(self):
+        for sample in self.samples:
+            expected = None
+            for position, r in enumerate(self.regs):
+                m = r.match(sample)
+                if m:
+                    expected = (position + 1, m.groups())
+                    break
+            
+            m = coordinate.Coordinate.compile()[0].match(sample)
+            got = None
+            if m:
+                (position, indices) = coordinate.Coordinate.alternatives[m.lastindex]
+                got = (position, m.group(*indices))
+            self.assertEquals(got, expected)
+    
+    
+    def test_ParseMany(self):
+        samples = self.samples + [12.5, -0.0, None, "1e2", "1d 1m 1.1234567s w"]
+        (values, valid, invalid) = coordinate.parse_many(samples, "Lat")
+        self.assertEquals(len(values), len(samples))
+        self.assertEquals(values.itemsize, 8)
+        for i, sample in enumerate(samples):
+            try:
+                dd = coordinate.Coordinate(sample, "Lat").getDd()
+            except ValueError:
+                dd = None
+            if dd is None:
+                self.assertEquals(valid[i], 0)
+                self.assert_(i in invalid)
+                self.assert_(values[i] != values[i])
+            else:
+                self.assertEquals(valid[i], 1)
+                self.assertEquals(repr(values[i]), repr(float(dd)))
+        self.assertEquals(len(invalid), len(samples) - sum(valid))
+
+
+class TestParseCache(unittest.TestCase):
+    """
+    Class: TestParseCache
+    
+    Description:
+    The unit test cases for testing the LRU cache of Coordinate parse
+    results.
+    """
+    
+    def setUp(self):
+        self.cache = coordinate.ParseCache(2)
+        coordinate.Coordinate.cache = self.cache
+    
+    
+    def tearDown(self):
+        coordinate.Coordinate.cache = None
+    
+    
+    def test_Eviction(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.assertEquals(self.cache.get('a'), 1)
+        self.cache.put('c', 3)
+        self.assertEquals(self.cache.get('b'), None)
+        self.assertEquals(self.cache.get('a'), 1)
+        self.assertEquals(self.cache.get('c'), 3)
+        self.assertEquals(self.cache.info(), (3, 1, 2, 2))
+        self.assertRaises(ValueError, coordinate.ParseCache, 0)
+    
+    
+    def test_PutExisting(self):
+        # Putting an existing key makes it the most recently used.
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.put('a', 3)
+        self.cache.put('c', 4)
+        self.assertEquals(self.cache.get('b'), None)
+        self.assertEquals(self.cache.get('a'), 3)
+        self.assertEquals(self.cache.get('c'), 4)
+        self.assertEquals(len(self.cache), 2)
+    
+    
+    def test_Coordinate(self):
+        c1 = coordinate.Coordinate("11d 22m 33.333s", "Longitude")
+        c2 = coordinate.Coordinate("11d 22m 33.333s", "Longitude")
+        c3 = coordinate.Coordinate("11d 22m 33.333s", "Latitude")
+        c4 = coordinate.Coordinate("N123.1234N")
+        c5 = coordinate.Coordinate("N123.1234N")
+        self.assertEquals(self.cache.info(), (2, 3, 2, 2))
+        self.assertEquals(c1.getDms(), c2.getDms())
+        self.assertEquals(c2.direction, "E")
+        self.assertEquals(c3.direction, "N")
+        self.assertEquals(c5.getDd(), None)
+        
+        coordinate.Coordinate.cache = None
+        c6 = coordinate.Coordinate("11d 22m 33.333s", "Longitude")
+        self.assertEquals((c6.groups, c6.direction, c6.coord_dd, c6.coord_dms),
+                          (c2.groups, c2.direction, c2.coord_dd, c2.coord_dms))
 
 
 
@@ -318,5 +560,7 @@ def runtests():
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestDegreesMinutesSeconds))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestDegreesMinutesSecondsColon))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestPoint))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestParser))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestParseCache))
     unittest.TextTestRunner(verbosity=2).run(suite)
 
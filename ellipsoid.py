@@ -0,0 +1,385 @@
+# File: ellipsoid.py
+# Ellipsoid module used to solve geodesic problems on the WGS84 ellipsoid.
+#
+# About:
+# The spherical methods of <coordinate.Point> are within a few tenths of a
+# percent of the ellipsoid, which is more than orthorectification allows at
+# high altitudes. This module solves the direct and inverse geodesic
+# problems with Vincenty's formulae instead, so footprints can be computed
+# on the ellipsoid. fovarray.py has the array counterparts.
+
+#
+# Module: ellipsoid
+#
+# Description:
+# Ellipsoid library that contains:
+# {<Ellipsoid>} - An ellipsoid of revolution and its geodesics.
+# {<ELLIPSOIDS>} - Registry of the named ellipsoids.
+# {<getEllipsoid>} - Resolve an earth model name.
+#
+# Models:
+# An earth model is either <SPHERE>, the sphere of <coordinate.UNITS> used
+# by <coordinate.Point>, or the name of an ellipsoid in <ELLIPSOIDS>.
+#
+# Example:
+#     wgs84 = getEllipsoid('wgs84')
+#     (x, y, bearing) = wgs84.direct(-147.5, 64.8, 1000.0, 20.0)
+#
+
+import math
+
+from coordinate import Point
+from coordinate import getRadius
+from coordinate import EARTH_RADIUS_M
+
+#
+# Constants:
+# SPHERE         - the model name of the sphere.
+# MAX_ITERATIONS - cap on the iterations of Vincenty's formulae. The direct
+#                  problem and inverse problems of footprint sized lines
+#                  converge in two or three.
+# CONVERGENCE    - change in radians below which an iteration stops.
+# RADIANS        - factor to convert degrees to radians.
+# DEGREES        - factor to convert radians to degrees.
+#
+# <coordinate.DEG2RAD> is rounded to 11 digits, which moves a latitude by
+# about 2e-10 degrees (20 micrometers) on the way to radians and back; the
+# geodesics use the exact factors instead.
+#
+SPHERE = 'sphere'
+MAX_ITERATIONS = 20
+CONVERGENCE = 1e-12
+RADIANS = math.pi / 180.0
+DEGREES = 180.0 / math.pi
+
+
+#
+# Class: Ellipsoid
+#
+# An ellipsoid of revolution. Distances are in meters and angles in decimal
+# degrees unless a method takes `units'.
+#
+# Attributes:
+# a - {float} The semi-major axis in meters.
+# f - {float} The flattening.
+# b - {float} The semi-minor axis in meters.
+#
+class Ellipsoid(object):
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # a - {float} The semi-major axis in meters.
+    # f - {float} The flattening, 0 <= f < 1.
+    #
+    def __init__(self, a, f):
+        a = float(a)
+        f = float(f)
+        if a <= 0 or f < 0 or f >= 1:
+            raise ValueError("Invalid ellipsoid: a=%s, f=%s" % (a, f))
+        self.a = a
+        self.f = f
+        self.b = a * (1.0 - f)
+        self.ep2 = (a * a - self.b * self.b) / (self.b * self.b)
+    
+    
+    #
+    # Method: direct
+    #
+    # Solve the direct problem: the end of the geodesic of length `distance'
+    # leaving (x, y) at `bearing'.
+    #
+    # Parameters:
+    # x, y     - {float} The start point in decimal degrees.
+    # distance - {float} The length of the geodesic in meters.
+    # bearing  - {float} The bearing at the start, clockwise from North.
+    #
+    # Returns:
+    # {3-tuple} (x, y, bearing) of the end point; the bearing is the forward
+    # bearing there, in [0, 360). The longitude is not wrapped, as with
+    # <coordinate.Point.geoWaypoint>.
+    #
+    def direct(self, x, y, distance, bearing):
+        f = self.f
+        b = self.b
+        alpha1 = bearing * RADIANS
+        sin_alpha1 = math.sin(alpha1)
+        cos_alpha1 = math.cos(alpha1)
+        
+        # reduced latitude and the arc from the equator on the auxiliary
+        # sphere
+        tan_u1 = (1.0 - f) * math.tan(y * RADIANS)
+        cos_u1 = 1.0 / math.sqrt(1.0 + tan_u1 * tan_u1)
+        sin_u1 = tan_u1 * cos_u1
+        sigma1 = math.atan2(tan_u1, cos_alpha1)
+        sin_alpha = cos_u1 * sin_alpha1
+        cos2_alpha = 1.0 - sin_alpha * sin_alpha
+        (A, B) = self._series(cos2_alpha)
+        
+        # start from the spherical arc and iterate
+        start = distance / (b * A)
+        sigma = start
+        for i in xrange(MAX_ITERATIONS):
+            cos_2sm = math.cos(2.0 * sigma1 + sigma)
+            sin_sigma = math.sin(sigma)
+            cos_sigma = math.cos(sigma)
+            last = sigma
+            sigma = start + _deltaSigma(B, sin_sigma, cos_sigma, cos_2sm)
+            if abs(sigma - last) <= CONVERGENCE:
+                break
+        cos_2sm = math.cos(2.0 * sigma1 + sigma)
+        sin_sigma = math.sin(sigma)
+        cos_sigma = math.cos(sigma)
+        
+        tmp = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alpha1
+        y2 = math.atan2(sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_alpha1,
+                        (1.0 - f) * math.sqrt(sin_alpha * sin_alpha + tmp * tmp))
+        lam = math.atan2(sin_sigma * sin_alpha1,
+                         cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alpha1)
+        C = f / 16.0 * cos2_alpha * (4.0 + f * (4.0 - 3.0 * cos2_alpha))
+        L = lam - (1.0 - C) * f * sin_alpha * (sigma + C * sin_sigma * (
+            cos_2sm + C * cos_sigma * (-1.0 + 2.0 * cos_2sm * cos_2sm)))
+        alpha2 = math.atan2(sin_alpha, -tmp)
+        
+        return (x + L * DEGREES, y2 * DEGREES, (alpha2 * DEGREES) % 360.0)
+    
+    
+    #
+    # Method: inverse
+    #
+    # Solve the inverse problem: the geodesic from (x0, y0) to (x1, y1).
+    #
+    # Nearly antipodal points may not converge within <MAX_ITERATIONS>; they
+    # get the great circle on the sphere of the mean radius (2a + b) / 3
+    # instead.
+    #
+    # Returns:
+    # {3-tuple} (distance, bearing0, bearing1), the length in meters and the
+    # forward bearings at both ends in [0, 360).
+    #
+    def inverse(self, x0, y0, x1, y1):
+        f = self.f
+        L = (x1 - x0) * RADIANS
+        tan_u1 = (1.0 - f) * math.tan(y0 * RADIANS)
+        cos_u1 = 1.0 / math.sqrt(1.0 + tan_u1 * tan_u1)
+        sin_u1 = tan_u1 * cos_u1
+        tan_u2 = (1.0 - f) * math.tan(y1 * RADIANS)
+        cos_u2 = 1.0 / math.sqrt(1.0 + tan_u2 * tan_u2)
+        sin_u2 = tan_u2 * cos_u2
+        
+        # start from the longitude difference, the solution on the auxiliary
+        # sphere
+        lam = L
+        for i in xrange(MAX_ITERATIONS):
+            sin_lam = math.sin(lam)
+            cos_lam = math.cos(lam)
+            p = cos_u2 * sin_lam
+            q = cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam
+            sin_sigma = math.sqrt(p * p + q * q)
+            if sin_sigma == 0:
+                return (0.0, 0.0, 0.0)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = math.atan2(sin_sigma, cos_sigma)
+            sin_alpha = cos_u1 * cos_u2 * sin_lam / sin_sigma
+            cos2_alpha = 1.0 - sin_alpha * sin_alpha
+            if cos2_alpha != 0:
+                cos_2sm = cos_sigma - 2.0 * sin_u1 * sin_u2 / cos2_alpha
+            else:
+                # both points on the equator
+                cos_2sm = 0.0
+            C = f / 16.0 * cos2_alpha * (4.0 + f * (4.0 - 3.0 * cos2_alpha))
+            last = lam
+            lam = L + (1.0 - C) * f * sin_alpha * (sigma + C * sin_sigma * (
+                cos_2sm + C * cos_sigma * (-1.0 + 2.0 * cos_2sm * cos_2sm)))
+            if abs(lam - last) <= CONVERGENCE:
+                break
+        else:
+            return self._greatCircle(x0, y0, x1, y1)
+        
+        (A, B) = self._series(cos2_alpha)
+        distance = self.b * A * (sigma - _deltaSigma(B, sin_sigma, cos_sigma, cos_2sm))
+        sin_lam = math.sin(lam)
+        cos_lam = math.cos(lam)
+        alpha1 = math.atan2(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        alpha2 = math.atan2(cos_u1 * sin_lam, -sin_u1 * cos_u2 + cos_u1 * sin_u2 * cos_lam)
+        
+        return (distance, (alpha1 * DEGREES) % 360.0, (alpha2 * DEGREES) % 360.0)
+    
+    
+    #
+    # Method: waypoint
+    #
+    # The ellipsoidal <coordinate.Point.geoWaypoint>.
+    #
+    # Parameters:
+    # point    - {<coordinate.Point>} The start point.
+    # distance - {float}
+    # bearing  - {float}
+    # units    - {string} A unit name from <coordinate.UNITS>.
+    # radius   - {float} The sphere radius of the units of `distance', as
+    #            returned by <coordinate.getRadius>. Overrides `units'. Only
+    #            used to convert `distance' to meters.
+    #
+    # Returns:
+    # {<coordinate.Point>} The generated point.
+    #
+    def waypoint(self, point, distance, bearing, units='km', radius=None):
+        return self.waypoints(point, ((distance, bearing),), units, radius)[0]
+    
+    
+    #
+    # Method: waypoints
+    #
+    # <waypoint> for many distance and bearing pairs from `point', like
+    # <coordinate.Point.geoWaypoints>.
+    #
+    # Returns:
+    # {list} The generated points, in order.
+    #
+    def waypoints(self, point, waypoints, units='km', radius=None):
+        if radius is None:
+            radius = getRadius(units)
+        scale = EARTH_RADIUS_M / radius
+        
+        result = []
+        for distance, bearing in waypoints:
+            (x, y, final) = self.direct(point.x, point.y, distance * scale, bearing)
+            result.append(Point.fromFloats(x, y))
+        return result
+    
+    
+    #
+    # Method: distance
+    #
+    # The ellipsoidal <coordinate.Point.geoDistanceTo>.
+    #
+    # Parameters:
+    # point0, point1 - {<coordinate.Point>}
+    # units          - {string} A unit name from <coordinate.UNITS>.
+    # radius         - {float} See <waypoint>.
+    #
+    # Returns:
+    # {float} The geodesic distance in `units'.
+    #
+    def distance(self, point0, point1, units='km', radius=None):
+        if radius is None:
+            radius = getRadius(units)
+        return self.inverse(point0.x, point0.y, point1.x, point1.y)[0] * radius / EARTH_RADIUS_M
+    
+    
+    #
+    # Method: rotatePoints
+    #
+    # The ellipsoidal <coordinate.Point.rotatePoints>: every point keeps its
+    # geodesic distance from `center' while the bearing to it turns by
+    # `degrees'.
+    #
+    # Parameters:
+    # center  - {<coordinate.Point>} The point to rotate about.
+    # points  - {iterable} The <coordinate.Point> objects to rotate.
+    # degrees - {float} The rotation angle in degrees, clockwise.
+    #
+    # Returns:
+    # {list} The rotated points as new <coordinate.Point> objects, in order.
+    #
+    def rotatePoints(self, center, points, degrees):
+        if degrees == 0.0 or degrees == 360.0:
+            return list(points)
+        
+        x0 = center.x
+        y0 = center.y
+        rotated = []
+        for point in points:
+            (distance, bearing, final) = self.inverse(x0, y0, point.x, point.y)
+            (x, y, final) = self.direct(x0, y0, distance, bearing + degrees)
+            rotated.append(Point.fromFloats(x, y))
+        return rotated
+    
+    
+    #
+    # Method: _series
+    #
+    # (Private) Vincenty's A and B series in the second eccentricity.
+    #
+    # Returns:
+    # {2-tuple} (A, B)
+    #
+    def _series(self, cos2_alpha):
+        u2 = cos2_alpha * self.ep2
+        A = 1.0 + u2 / 16384.0 * (4096.0 + u2 * (-768.0 + u2 * (320.0 - 175.0 * u2)))
+        B = u2 / 1024.0 * (256.0 + u2 * (-128.0 + u2 * (74.0 - 47.0 * u2)))
+        return (A, B)
+    
+    
+    #
+    # Method: _greatCircle
+    #
+    # (Private) The result of <inverse> on the sphere of the mean radius.
+    #
+    def _greatCircle(self, x0, y0, x1, y1):
+        p0 = Point.fromFloats(x0, y0)
+        p1 = Point.fromFloats(x1, y1)
+        radius = (2.0 * self.a + self.b) / 3.0
+        return (p0.geoDistanceTo(p1, radius=radius),
+                p0.geoBearingTo(p1) % 360.0,
+                (p1.geoBearingTo(p0) + 180.0) % 360.0)
+
+
+#
+# Function: _deltaSigma
+#
+# (Private) Vincenty's correction of the arc length on the auxiliary sphere.
+#
+def _deltaSigma(B, sin_sigma, cos_sigma, cos_2sm):
+    return B * sin_sigma * (cos_2sm + B / 4.0 * (
+        cos_sigma * (-1.0 + 2.0 * cos_2sm * cos_2sm) -
+        B / 6.0 * cos_2sm * (-3.0 + 4.0 * sin_sigma * sin_sigma) * (-3.0 + 4.0 * cos_2sm * cos_2sm)))
+
+
+#
+# Constants: Ellipsoids
+# WGS84 - the World Geodetic System 1984 ellipsoid.
+# GRS80 - the Geodetic Reference System 1980 ellipsoid.
+#
+WGS84 = Ellipsoid(6378137.0, 1 / 298.257223563)
+GRS80 = Ellipsoid(6378137.0, 1 / 298.257222101)
+
+#
+# Variable: ELLIPSOIDS
+#
+# Registry of the ellipsoids usable as earth models, mapping the lower case
+# name to the <Ellipsoid>.
+#
+ELLIPSOIDS = {
+    'wgs84': WGS84,
+    'grs80': GRS80,
+    }
+
+
+#
+# Function: getEllipsoid
+#
+# Resolve an earth model name.
+#
+# Parameters:
+# model - {string} <SPHERE> or a name from <ELLIPSOIDS>, case insensitive.
+#         None or empty is <SPHERE>.
+#
+# Returns:
+# {<Ellipsoid>} The ellipsoid, or None for <SPHERE>.
+#
+# Raises:
+# ValueError if the model is unknown or not a string.
+#
+def getEllipsoid(model):
+    if model is None or model == '':
+        return None
+    if not isinstance(model, basestring):
+        raise ValueError("Invalid option for model: %s" % model)
+    if model.lower() == SPHERE:
+        return None
+    try:
+        return ELLIPSOIDS[model.lower()]
+    except KeyError:
+        raise ValueError("Invalid option for model: %s" % model)
@@ -0,0 +1,95 @@
+import coordinate
+import ellipsoid
+import unittest
+import random
+
+class TestEllipsoid(unittest.TestCase):
+    """
+    Class: TestEllipsoid
+    
+    Description:
+    The unit test cases for testing the direct and inverse geodesic
+    problems on the WGS84 ellipsoid.
+    """
+    
+    def setUp(self):
+        self.wgs84 = ellipsoid.getEllipsoid('wgs84')
+        # Vincenty's example, Flinders Peak to Buninyong
+        self.start = (144.0 + 25/60.0 + 29.52440/3600.0, -(37.0 + 57/60.0 + 3.72030/3600.0))
+        self.end = (143.0 + 55/60.0 + 35.38390/3600.0, -(37.0 + 39/60.0 + 10.15610/3600.0))
+        self.distance = 54972.271
+        self.bearing = 306.0 + 52/60.0 + 5.37/3600.0
+        self.final = 180.0 + 127.0 + 10/60.0 + 25.07/3600.0
+    
+    
+    def test_Inverse(self):
+        (distance, bearing, final) = self.wgs84.inverse(*(self.start + self.end))
+        self.assertAlmostEquals(distance, self.distance, 3)
+        self.assertAlmostEquals(bearing, self.bearing, 5)
+        self.assertAlmostEquals(final, self.final, 5)
+    
+    
+    def test_Direct(self):
+        (x, y, final) = self.wgs84.direct(self.start[0], self.start[1], self.distance, self.bearing)
+        self.assertAlmostEquals(x, self.end[0], 7)
+        self.assertAlmostEquals(y, self.end[1], 7)
+        self.assertAlmostEquals(final, self.final, 5)
+    
+    
+    def test_RoundTrip(self):
+        rnd = random.Random(7)
+        for i in range(200):
+            (x, y) = (rnd.uniform(-180.0, 180.0), rnd.uniform(-89.0, 89.0))
+            (distance, bearing) = (rnd.uniform(0.0, 1e6), rnd.uniform(0.0, 360.0))
+            (x1, y1, final) = self.wgs84.direct(x, y, distance, bearing)
+            (d, b, f) = self.wgs84.inverse(x, y, x1, y1)
+            self.assertAlmostEquals(d, distance, 4)
+            self.assertAlmostEquals(b, bearing % 360.0, 7)
+            self.assertAlmostEquals(f, final, 7)
+    
+    
+    def test_Antipodal(self):
+        # does not converge; falls back to the great circle
+        (distance, bearing, final) = self.wgs84.inverse(0.0, 0.5, 179.5, -0.5)
+        p0 = coordinate.Point(0.0, 0.5)
+        p1 = coordinate.Point(179.5, -0.5)
+        radius = (2 * self.wgs84.a + self.wgs84.b) / 3.0
+        self.assertAlmostEquals(distance, p0.geoDistanceTo(p1, radius=radius), 6)
+        self.assertEquals(self.wgs84.inverse(10.0, 20.0, 10.0, 20.0), (0.0, 0.0, 0.0))
+    
+    
+    def test_Units(self):
+        p0 = coordinate.Point(*self.start)
+        p1 = coordinate.Point(*self.end)
+        self.assertAlmostEquals(self.wgs84.distance(p0, p1, 'm'), self.distance, 3)
+        self.assertAlmostEquals(self.wgs84.distance(p0, p1, 'km'), self.distance / 1000.0, 6)
+        p = self.wgs84.waypoint(p0, self.distance / 1000.0, self.bearing, 'km')
+        self.assertAlmostEquals(p.x, self.end[0], 7)
+        self.assertAlmostEquals(p.y, self.end[1], 7)
+    
+    
+    def test_RotatePoints(self):
+        center = coordinate.Point(-147.5, 64.8)
+        points = self.wgs84.waypoints(center, ((500.0, 0.0), (800.0, 135.0)), 'm')
+        rotated = self.wgs84.rotatePoints(center, points, 30.0)
+        for point, expected in zip(rotated, ((500.0, 30.0), (800.0, 165.0))):
+            (distance, bearing, final) = self.wgs84.inverse(center.x, center.y, point.x, point.y)
+            self.assertAlmostEquals(distance, expected[0], 6)
+            self.assertAlmostEquals(bearing, expected[1], 7)
+        self.assertEquals(self.wgs84.rotatePoints(center, points, 360.0), points)
+    
+    
+    def test_Models(self):
+        self.assertEquals(ellipsoid.getEllipsoid(None), None)
+        self.assertEquals(ellipsoid.getEllipsoid('Sphere'), None)
+        self.assert_(ellipsoid.getEllipsoid('WGS84') is ellipsoid.WGS84)
+        self.assertRaises(ValueError, ellipsoid.getEllipsoid, 'clarke')
+        self.assertRaises(ValueError, ellipsoid.getEllipsoid, 5)
+        self.assertRaises(ValueError, ellipsoid.getEllipsoid, ['wgs84'])
+        self.assertRaises(ValueError, ellipsoid.Ellipsoid, 6378137.0, 1.0)
+
+
+
+def runtests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestEllipsoid)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,648 @@
+# File: footprint.py
+# Footprint module used to compute the ground footprint of a camera.
+#
+# About:
+# The computation behind the fovbox command line tool, importable without
+# any of its option parsing or output formatting.
+
+#
+# Module: footprint
+#
+# Description:
+# Footprint library that contains:
+# {<compute_footprint>} - Validate a camera pose and compute its footprint.
+# {<Footprint>} - The result of <compute_footprint>.
+# {<parse_pose>} - Validate and convert the fields of a camera pose.
+# {<parse_tilt>} - Validate and convert the pitch and roll of a camera.
+# {<check_tilt>} - Validate the tilt of a camera, keeping its units.
+# {<footprint_corners>} - The footprint math on an already validated pose.
+# {<tilt_matrix>} - The rotation of a camera tilted by pitch and roll.
+# {<FootprintTracker>} - Footprints of a stream of poses of one camera.
+#
+# Example:
+#     fp = compute_footprint(-147.5, 64.8, 1000, 30, 30, 20)
+#     print fp.ul.x, fp.ul.y, fp.width
+#
+#     # the same camera looking 40 degrees ahead of the azimuth
+#     fp = compute_footprint(-147.5, 64.8, 1000, 30, 30, 20, pitch=40)
+#
+
+import math
+
+from coordinate import Coordinate
+from coordinate import Point
+from coordinate import UNITS
+from coordinate import getRadius
+from coordinate import DEG2RAD, RAD2DEG
+from ellipsoid import getEllipsoid
+
+#
+# Constants:
+# CORNER_SIGNS - the (right, top) signs of the UL, LL, UR and LR corner rays
+#                of the camera.
+#
+CORNER_SIGNS = ((-1.0, 1.0), (-1.0, -1.0), (1.0, 1.0), (1.0, -1.0))
+
+#
+# Class: Footprint
+#
+# The footprint of one camera pose.
+#
+# Attributes:
+# cp     - {<coordinate.Point>} The center point.
+# ul     - {<coordinate.Point>} The upper left corner.
+# ll     - {<coordinate.Point>} The lower left corner.
+# ur     - {<coordinate.Point>} The upper right corner.
+# lr     - {<coordinate.Point>} The lower right corner.
+# width  - {float} The width of the footprint (DW) in <units>.
+# height - {float} The height of the footprint (DH) in <units>.
+# units  - {string} The units of the altitude, <width> and <height>.
+#
+class Footprint(object):
+    __slots__ = ('cp', 'ul', 'll', 'ur', 'lr', 'width', 'height', 'units')
+    
+    
+    def __init__(self, cp, ul, ll, ur, lr, width, height, units='m'):
+        self.cp = cp
+        self.ul = ul
+        self.ll = ll
+        self.ur = ur
+        self.lr = lr
+        self.width = width
+        self.height = height
+        self.units = units
+    
+    
+    #
+    # Method: points
+    #
+    # Returns:
+    # {5-tuple} The CP, UL, LL, UR and LR points, in output order.
+    #
+    def points(self):
+        return (self.cp, self.ul, self.ll, self.ur, self.lr)
+
+
+#
+# Function: parse_pose
+#
+# Validate one camera pose and convert it for use by <footprint_corners>.
+#
+# Parameters:
+# lon, lat - {string} The center point, in any notation <Coordinate> parses.
+# alt      - {float} The altitude.
+# fovx     - {float} The field of view in X, in degrees or radians per `angle'.
+# fovy     - {float} The field of view in Y.
+# azimuth  - {float} The azimuth off North, in degrees or radians per `angle'.
+#                    None or an empty string is 0.
+# angle    - {string} d for degrees, r for radians.
+#
+# Returns:
+# {5-tuple} (cp, alt, fov_x, fov_y, azimuth) where cp is the center <Point>,
+# the fields of view are in radians and the azimuth is in degrees.
+#
+# Raises:
+# ValueError with a user readable message if any field is invalid.
+#
+def parse_pose(lon, lat, alt, fovx, fovy, azimuth, angle='d'):
+    try:
+        lon_c = Coordinate(lon, "Lon")
+        lat_c = Coordinate(lat, "Lat")
+    except ValueError:
+        raise ValueError("Invalid coordinate: %s, %s" % (lon, lat))
+    
+    if not lon_c.isValid():
+        raise ValueError("Invalid longitudinal coordinate: %s" % lon_c.getCoord())
+    if not lat_c.isValid():
+        raise ValueError("Invalid latitudinal coordinate: %s" % lat_c.getCoord())
+    
+    # Center point
+    cp = Point(lon, lat)
+    
+    try:
+        alt = float(alt)
+    except:
+        raise ValueError("Invalid altitude: %s. Altitude must be a number." % alt)
+    
+    try:
+        fov_x = float(fovx)
+    except:
+        raise ValueError("Invalid field of view in X: %s. Field of view must be a number." % fovx)
+    
+    try:
+        fov_y = float(fovy)
+    except:
+        raise ValueError("Invalid field of view in Y: %s. Field of view must be a number." % fovy)
+    
+    if azimuth is None or azimuth == '':
+        azimuth = "0"
+    try:
+        azimuth = float(azimuth)
+    except:
+        raise ValueError("Invalid option for azimuth: %s" % azimuth)
+    
+    if angle == 'd':
+        if azimuth < 0 or azimuth > 360.0:
+            raise ValueError("Invalid option for azimuth: %s. Azimuth must be between 0 and 360.0 degrees." % azimuth)
+    elif angle == 'r':
+        if azimuth < 0 or azimuth > 2*math.pi:
+            raise ValueError("Invalid option for azimuth: %s. Azimuth must be betweeen 0 and %s radians." % (azimuth, 2*math.pi))
+    else:
+        raise ValueError("Invalid option for angle: %s" % angle)
+    
+    if alt < 0:
+        raise ValueError("Invalid altitude: %s. Altitude cannot be negative." % alt)
+    
+    if fov_x <= 0:
+        raise ValueError("Invalid field of view in X: %s. Field of view cannot be negative or zero." % fov_x)
+    
+    if angle == 'd' and fov_x >= 180.0:
+        raise ValueError("Invalid field of view in X: %s. Field of view must be less than 180.0" % fov_x)
+    
+    if angle == 'r' and fov_x >= math.pi:
+        raise ValueError("Invalid field of view in X: %s. Field of view must be lass than %s" % (fov_x, math.pi))
+    
+    if fov_y <= 0:
+        raise ValueError("Invalid field of view in Y: %s. Field of view cannot be negative or zero." % fov_y)
+    
+    if angle == 'd' and fov_y >= 180.0:
+        raise ValueError("Invalid field of view in Y: %s. Field of view must be less than 180.0" % fov_y)
+    
+    if angle == 'r' and fov_y >= math.pi:
+        raise ValueError("Invalid field of view in Y: %s. Field of view must be lass than %s" % (fov_y, math.pi))
+    
+    if cp.x < -180.0 or cp.x > 180.0:
+        raise ValueError("Invalid longitudinal coordinate: %s. Longitude must be between -180.0 and 180.0 degrees." % cp.x)
+    
+    if cp.y < -90.0 or cp.y > 90.0:
+        raise ValueError("Invalid latitudinal coordinate: %s. Latitude must be between -90.0 and 90.0 degrees." % cp.y)
+    
+    if angle == 'r':
+        azimuth = azimuth * RAD2DEG
+    
+    if angle == 'd':
+        fov_x = fov_x * DEG2RAD
+        fov_y = fov_y * DEG2RAD
+    
+    return (cp, alt, fov_x, fov_y, azimuth)
+
+
+#
+# Function: parse_tilt
+#
+# Validate the tilt of a camera and convert it for use by
+# <footprint_corners>.
+#
+# Parameters:
+# pitch, roll, max_range, angle - See <check_tilt>. An empty pitch or roll
+#                                 is 0.
+#
+# Returns:
+# {3-tuple} (pitch, roll, max_range) with the angles in radians.
+#
+# Raises:
+# ValueError with a user readable message if any field is invalid.
+#
+def parse_tilt(pitch, roll, max_range=None, angle='d'):
+    (pitch, roll, max_range) = check_tilt(pitch, roll, max_range, angle)
+    tilt = []
+    for value in (pitch, roll):
+        if value is None:
+            value = 0.0
+        elif angle == 'd':
+            value = value * DEG2RAD
+        tilt.append(value)
+    return (tilt[0], tilt[1], max_range)
+
+
+#
+# Function: check_tilt
+#
+# Validate the tilt of a camera, as <parse_tilt> does, without converting
+# its angles. The result can be passed on to <compute_footprint> or
+# <fovarray.footprints> with the same `angle'.
+#
+# Parameters:
+# pitch     - {float} The tilt of the view towards the top of the image
+#             (ahead, along the azimuth), in degrees or radians per `angle'.
+#             Negative looks back. None or an empty string is 0.
+# roll      - {float} The tilt of the view towards the right of the image.
+#             Negative looks left. None or an empty string is 0.
+# max_range - {float} The farthest distance of a corner from the center
+#             point, in the units of the altitude. None or an empty string
+#             is the distance to the horizon.
+# angle     - {string} d for degrees, r for radians.
+#
+# Returns:
+# {3-tuple} (pitch, roll, max_range) as floats in `angle' and altitude
+# units, each None where it was left empty.
+#
+# Raises:
+# ValueError with a user readable message if any field is invalid.
+#
+def check_tilt(pitch, roll, max_range=None, angle='d'):
+    if angle == 'd':
+        (limit, name) = (90.0, "degrees")
+    elif angle == 'r':
+        (limit, name) = (math.pi/2, "radians")
+    else:
+        raise ValueError("Invalid option for angle: %s" % angle)
+    
+    tilt = []
+    for (label, value) in (("pitch", pitch), ("roll", roll)):
+        if value is None or value == '':
+            tilt.append(None)
+            continue
+        try:
+            value = float(value)
+        except:
+            raise ValueError("Invalid option for %s: %s" % (label, value))
+        if not -limit < value < limit:
+            raise ValueError("Invalid option for %s: %s. %s must be between -%s and %s %s." % (label, value, label.capitalize(), limit, limit, name))
+        tilt.append(value)
+    
+    if max_range is not None and max_range != '':
+        try:
+            max_range = float(max_range)
+        except:
+            raise ValueError("Invalid option for range: %s. Range must be a number." % max_range)
+        if not max_range >= 0:
+            raise ValueError("Invalid option for range: %s. Range cannot be negative." % max_range)
+    else:
+        max_range = None
+    
+    return (tilt[0], tilt[1], max_range)
+
+
+#
+# Function: tilt_matrix
+#
+# The rotation of a camera tilted by `pitch' and `roll' from nadir, in a
+# frame with x to the right of the image, y to its top and z up. A nadir
+# camera looks along -z; the roll is applied first, then the pitch.
+#
+# Parameters:
+# pitch - {float} The pitch in radians, see <parse_tilt>.
+# roll  - {float} The roll in radians.
+#
+# Returns:
+# {3-tuple} The three rows of the 3x3 rotation matrix.
+#
+def tilt_matrix(pitch, roll):
+    cos_p = math.cos(pitch)
+    sin_p = math.sin(pitch)
+    cos_r = math.cos(roll)
+    sin_r = math.sin(roll)
+    return ((cos_r, 0.0, -sin_r),
+            (-sin_p * sin_r, cos_p, -sin_p * cos_r),
+            (cos_p * sin_r, sin_p, cos_p * cos_r))
+
+
+#
+# Function: horizon
+#
+# Returns:
+# {float} The distance to the horizon from `alt' above a sphere of `radius'.
+#
+def horizon(alt, radius):
+    return math.sqrt(alt * (2.0 * radius + alt))
+
+
+#
+# Function: ground_offsets
+#
+# Project the corner rays of a camera onto the ground plane below it. The
+# rays are rotated by one <tilt_matrix>; rays that miss the ground (at or
+# above the horizon) or meet it farther than `max_range' are clipped to
+# `max_range' in their direction.
+#
+# Parameters:
+# matrix    - {3-tuple} The <tilt_matrix> of the camera.
+# alt       - {float} The altitude.
+# tan_x     - {float} The tangent of half the field of view in X.
+# tan_y     - {float} The tangent of half the field of view in Y.
+# max_range - {float} The farthest distance of a corner, in the units of
+#             the altitude.
+#
+# Returns:
+# {4-tuple} The (right, ahead) distances of the UL, LL, UR and LR corners
+# from the center point, in the units of the altitude.
+#
+def ground_offsets(matrix, alt, tan_x, tan_y, max_range):
+    offsets = []
+    for (sx, sy) in CORNER_SIGNS:
+        x = sx * tan_x
+        y = sy * tan_y
+        (vx, vy, vz) = [row[0] * x + row[1] * y - row[2] for row in matrix]
+        horizontal = math.hypot(vx, vy)
+        if vz >= 0 or alt * horizontal > max_range * -vz:
+            scale = max_range / horizontal
+        else:
+            scale = alt / -vz
+        offsets.append((vx * scale, vy * scale))
+    return tuple(offsets)
+
+
+#
+# Function: offset_corners
+#
+# The corners of a footprint before it is rotated by the azimuth, from the
+# <ground_offsets> of a tilted camera. Each corner takes its longitude from
+# the point its right offset east of `cp' and its latitude from the point
+# its ahead offset north of `cp', as <footprint_edges> does for a nadir
+# camera.
+#
+# Returns:
+# {4-tuple} The unrotated (ul, ll, ur, lr) points.
+#
+def offset_corners(cp, offsets, radius, ellipsoid=None):
+    waypoints = []
+    for (right, ahead) in offsets:
+        waypoints.append((abs(right), right < 0 and 270.0 or 90.0))
+        waypoints.append((abs(ahead), ahead < 0 and 180.0 or 0.0))
+    if ellipsoid is None:
+        points = cp.geoWaypoints(waypoints, radius=radius)
+    else:
+        points = ellipsoid.waypoints(cp, waypoints, radius=radius)
+    
+    return tuple([Point.fromFloats(points[i].x, points[i + 1].y) for i in range(0, 8, 2)])
+
+
+#
+# Function: footprint_edges
+#
+# The corners of a footprint before it is rotated by the azimuth.
+#
+# Parameters:
+# cp      - {<coordinate.Point>} The center point.
+# d_horiz - {float} Half the width of the footprint, in the units of `radius'.
+# d_vert  - {float} Half the height of the footprint.
+# radius  - {float} The earth radius.
+# ellipsoid - {<ellipsoid.Ellipsoid>} The ellipsoid to compute the edges
+#             on, or None (default) for the sphere of `radius'.
+#
+# Returns:
+# {4-tuple} The unrotated (ul, ll, ur, lr) points.
+#
+def footprint_edges(cp, d_horiz, d_vert, radius, ellipsoid=None):
+    # upper and lower planes (only use the y values), left and right planes
+    # (only use the x values)
+    waypoints = ((d_vert, 0.0), (d_vert, 180.0), (d_horiz, 270.0), (d_horiz, 90.0))
+    if ellipsoid is None:
+        (upper, lower, left, right) = cp.geoWaypoints(waypoints, radius=radius)
+    else:
+        (upper, lower, left, right) = ellipsoid.waypoints(cp, waypoints, radius=radius)
+    
+    # upper left point
+    ul = Point.fromFloats(left.x, upper.y)
+    
+    # upper right point
+    ur = Point.fromFloats(right.x, upper.y)
+    
+    # lower right point
+    lr = Point.fromFloats(right.x, lower.y)
+    
+    # lower left point
+    ll = Point.fromFloats(left.x, lower.y)
+    
+    return (ul, ll, ur, lr)
+
+
+#
+# Function: footprint_corners
+#
+# Compute the ground footprint of a camera centered on `cp'. The pose is
+# not validated; see <parse_pose> and <parse_tilt>.
+#
+# A nadir camera gives a rectangle of the fields of view. With a pitch,
+# roll or `max_range' the corner rays are projected by <ground_offsets>
+# instead; the width and height are then the larger of the two widths and
+# heights of that quadrilateral. Nadir footprints are not clipped unless
+# `max_range' is given.
+#
+# Parameters:
+# cp      - {<coordinate.Point>} The center point.
+# alt     - {float} The altitude in `units'.
+# fov_x   - {float} The field of view in X in radians.
+# fov_y   - {float} The field of view in Y in radians.
+# azimuth - {float} The azimuth off North in degrees.
+# units   - {string} The units of the altitude, a name from <coordinate.UNITS>.
+# radius  - {float} The earth radius in `units'. Callers computing many
+#           footprints can pass <coordinate.getRadius> of the units instead
+#           of resolving it per call.
+# ellipsoid - {<ellipsoid.Ellipsoid>} Compute the footprint on this
+#             ellipsoid instead of the sphere. Default is None, the sphere.
+# pitch     - {float} The pitch in radians. Default is 0.
+# roll      - {float} The roll in radians. Default is 0.
+# max_range - {float} The farthest distance of a corner in `units'. Default
+#             is None, the <horizon>.
+#
+# Returns:
+# {6-tuple} (ul, ll, ur, lr, d_horiz, d_vert), the rotated corner points
+# and the half width and half height of the footprint.
+#
+def footprint_corners(cp, alt, fov_x, fov_y, azimuth, units='m', radius=None, ellipsoid=None,
+                      pitch=0.0, roll=0.0, max_range=None):
+    if radius is None:
+        radius = getRadius(units)
+    
+    xhalf = fov_x/2.0
+    yhalf = fov_y/2.0
+    
+    if pitch or roll or max_range is not None:
+        if max_range is None:
+            max_range = horizon(alt, radius)
+        offsets = ground_offsets(tilt_matrix(pitch, roll), alt, math.tan(xhalf), math.tan(yhalf), max_range)
+        (ul, ll, ur, lr) = offsets
+        d_horiz = max(ur[0] - ul[0], lr[0] - ll[0]) / 2.0
+        d_vert = max(ul[1] - ll[1], ur[1] - lr[1]) / 2.0
+        (ul, ll, ur, lr) = offset_corners(cp, offsets, radius, ellipsoid)
+    else:
+        # Calculate the top and bottom edge of the viewing angle, d_vert is
+        # in the `alt' units.
+        d_vert = alt * math.tan( yhalf )
+        
+        # Calculate the left and right edge of the viewing angle
+        d_horiz = alt * math.tan( xhalf )
+        
+        (ul, ll, ur, lr) = footprint_edges(cp, d_horiz, d_vert, radius, ellipsoid)
+    
+    # Rotate the corners about the center by the azimuth. Agrees with
+    # rotating each corner by Point.rotate to within
+    # coordinate.ROTATE_TOLERANCE degrees, not to the last printed digit.
+    if ellipsoid is None:
+        (ul, ll, ur, lr) = cp.rotatePoints((ul, ll, ur, lr), azimuth)
+    else:
+        (ul, ll, ur, lr) = ellipsoid.rotatePoints(cp, (ul, ll, ur, lr), azimuth)
+    
+    return (ul, ll, ur, lr, d_horiz, d_vert)
+
+
+#
+# Function: compute_footprint
+#
+# Validate a camera pose and compute its footprint.
+#
+# Parameters:
+# lon, lat - {string} The center point, in any notation <Coordinate> parses.
+# alt      - {float} The altitude in `units'.
+# fovx     - {float} The field of view in X, in degrees or radians per `angle'.
+# fovy     - {float} The field of view in Y.
+# azimuth  - {float} The azimuth off North. Default is 0.
+# units    - {string} The units of the altitude, a name from
+#                     <coordinate.UNITS>. Default is m.
+# angle    - {string} d (default) for degrees, r for radians.
+# radius   - {float} Optional earth radius in `units', see
+#                    <footprint_corners>.
+# model    - {string} The earth model, <ellipsoid.SPHERE> (default) or a
+#                     name from <ellipsoid.ELLIPSOIDS>, e.g. wgs84.
+# pitch, roll, max_range - The tilt of the camera, see <parse_tilt>.
+#                     Default is a nadir camera.
+#
+# Returns:
+# {<Footprint>} The footprint.
+#
+# Raises:
+# ValueError with a user readable message if the pose, units, angle,
+# model or tilt are invalid.
+#
+def compute_footprint(lon, lat, alt, fovx, fovy, azimuth=0.0, units='m', angle='d', radius=None, model=None,
+                      pitch=None, roll=None, max_range=None):
+    if radius is None:
+        if not units or units.lower() not in UNITS:
+            raise ValueError("Invalid option for units: %s" % units)
+        radius = getRadius(units)
+    ellipsoid = getEllipsoid(model)
+    
+    (cp, alt, fov_x, fov_y, azimuth) = parse_pose(lon, lat, alt, fovx, fovy, azimuth, angle)
+    (pitch, roll, max_range) = parse_tilt(pitch, roll, max_range, angle)
+    (ul, ll, ur, lr, d_horiz, d_vert) = footprint_corners(cp, alt, fov_x, fov_y, azimuth, units, radius, ellipsoid,
+                                                          pitch, roll, max_range)
+    
+    return Footprint(cp, ul, ll, ur, lr, d_horiz*2, d_vert*2, units)
+
+
+#
+# Class: FootprintTracker
+#
+# Computes the footprints of a stream of poses of one camera, e.g. a gimbal
+# tracked at video frame rate, where consecutive poses often differ only in
+# azimuth or altitude.
+#
+# The tracker keeps the unrotated corners of the last center and altitude.
+# If only the azimuth changed they are just rotated again; if the altitude
+# changed the edge distances are scaled from the cached tangents of the half
+# fields of view and the four waypoints recomputed. Poses are plain numbers,
+# so nothing is parsed per update. The results are the same as
+# <compute_footprint> gives for the pose.
+#
+# Attributes:
+# footprint - {<Footprint>} The footprint of the last update. Returned again
+#             by <update> while the pose does not change.
+# rebuilds  - {int} Updates that recomputed the corners.
+# rotations - {int} Updates that only rotated the cached corners.
+#
+class FootprintTracker(object):
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # fovx  - {float} The field of view in X, in degrees or radians per `angle'.
+    # fovy  - {float} The field of view in Y.
+    # units - {string} The units of the altitude, a name from
+    #         <coordinate.UNITS>. Default is m.
+    # angle - {string} d (default) for degrees, r for radians.
+    # model - {string} The earth model, see <compute_footprint>.
+    #
+    # Raises:
+    # ValueError if the fields of view, units, angle or model are invalid.
+    #
+    def __init__(self, fovx, fovy, units='m', angle='d', model=None):
+        if not units or units.lower() not in UNITS:
+            raise ValueError("Invalid option for units: %s" % units)
+        self.ellipsoid = getEllipsoid(model)
+        (cp, alt, fov_x, fov_y, azimuth) = parse_pose(0.0, 0.0, 0.0, fovx, fovy, 0.0, angle)
+        self.units = units
+        self.angle = angle
+        self.radius = getRadius(units)
+        self.tan_x = math.tan(fov_x/2.0)
+        self.tan_y = math.tan(fov_y/2.0)
+        
+        self.center = None
+        self.alt = None
+        self.azimuth = None
+        self.cp = None
+        self.edges = None
+        self.footprint = None
+        self.rebuilds = 0
+        self.rotations = 0
+    
+    
+    #
+    # Method: update
+    #
+    # Parameters:
+    # lon, lat - {float} The center point in decimal degrees.
+    # alt      - {float} The altitude in the units of the tracker.
+    # azimuth  - {float} The azimuth off North, in degrees or radians per the
+    #            angle of the tracker. Default is 0.
+    #
+    # Returns:
+    # {<Footprint>} The footprint of the pose.
+    #
+    # Raises:
+    # ValueError if the pose is invalid.
+    #
+    def update(self, lon, lat, alt, azimuth=0.0):
+        lon = float(lon)
+        lat = float(lat)
+        alt = float(alt)
+        azimuth = float(azimuth)
+        
+        if not _finite(lon):
+            raise ValueError("Invalid longitudinal coordinate: %s" % lon)
+        if not _finite(lat):
+            raise ValueError("Invalid latitudinal coordinate: %s" % lat)
+        if not _finite(alt):
+            raise ValueError("Invalid altitude: %s. Altitude must be a number." % alt)
+        if not _finite(azimuth):
+            raise ValueError("Invalid option for azimuth: %s" % azimuth)
+        
+        if self.angle == 'r':
+            if azimuth < 0 or azimuth > 2*math.pi:
+                raise ValueError("Invalid option for azimuth: %s. Azimuth must be betweeen 0 and %s radians." % (azimuth, 2*math.pi))
+            azimuth = azimuth * RAD2DEG
+        elif azimuth < 0 or azimuth > 360.0:
+            raise ValueError("Invalid option for azimuth: %s. Azimuth must be between 0 and 360.0 degrees." % azimuth)
+        if alt < 0:
+            raise ValueError("Invalid altitude: %s. Altitude cannot be negative." % alt)
+        if lon < -180.0 or lon > 180.0:
+            raise ValueError("Invalid longitudinal coordinate: %s. Longitude must be between -180.0 and 180.0 degrees." % lon)
+        if lat < -90.0 or lat > 90.0:
+            raise ValueError("Invalid latitudinal coordinate: %s. Latitude must be between -90.0 and 90.0 degrees." % lat)
+        
+        if (lon, lat) != self.center or alt != self.alt:
+            if (lon, lat) != self.center:
+                self.cp = Point(lon, lat)
+                self.center = (lon, lat)
+            self.alt = alt
+            self.edges = footprint_edges(self.cp, alt * self.tan_x, alt * self.tan_y, self.radius, self.ellipsoid)
+            self.azimuth = None
+            self.rebuilds += 1
+        elif azimuth != self.azimuth:
+            self.rotations += 1
+        
+        if azimuth != self.azimuth:
+            if self.ellipsoid is None:
+                (ul, ll, ur, lr) = self.cp.rotatePoints(self.edges, azimuth)
+            else:
+                (ul, ll, ur, lr) = self.ellipsoid.rotatePoints(self.cp, self.edges, azimuth)
+            self.azimuth = azimuth
+            self.footprint = Footprint(self.cp, ul, ll, ur, lr,
+                alt * self.tan_x * 2, alt * self.tan_y * 2, self.units)
+        return self.footprint
+
+
+def _finite(value):
+    return not (math.isinf(value) or math.isnan(value))
@@ -0,0 +1,177 @@
+import ellipsoid
+import footprint
+import unittest
+
+class TestComputeFootprint(unittest.TestCase):
+    """
+    Class: TestComputeFootprint
+    
+    Description:
+    The unit test cases for testing the footprint library API.
+    """
+    
+    def setUp(self):
+        self.fp = footprint.compute_footprint(-147.5, 64.8, 1000, 30, 30, 20)
+    
+    
+    def test_Result(self):
+        self.assert_(isinstance(self.fp, footprint.Footprint))
+        self.assertEquals(["%.8f %.8f" % (p.x, p.y) for p in self.fp.points()], [
+            "-147.50000000 64.80000000",
+            "-147.50338239 64.80308856",
+            "-147.50725393 64.79855977",
+            "-147.49274608 64.80144022",
+            "-147.49661726 64.79691142"])
+        self.assertEquals("%.8f" % self.fp.width, "535.89838486")
+        self.assertEquals("%.8f" % self.fp.height, "535.89838486")
+        self.assertEquals(self.fp.units, "m")
+    
+    
+    def test_Arguments(self):
+        fp = footprint.compute_footprint("147d 30m 0s W", "64d 48m 0s N", "1", 30, 30, 20, 'km')
+        self.assertAlmostEquals(fp.width, self.fp.width / 1000.0, 9)
+        self.assertAlmostEquals(fp.ul.x, self.fp.ul.x, 7)
+        fp = footprint.compute_footprint(-147.5, 64.8, 1000, 30 * footprint.DEG2RAD,
+                                         30 * footprint.DEG2RAD, 20 * footprint.DEG2RAD, angle='r')
+        self.assertAlmostEquals(fp.lr.y, self.fp.lr.y, 9)
+    
+    
+    def test_Invalid(self):
+        self.assertRaises(ValueError, footprint.compute_footprint, "bad", 64.8, 1000, 30, 30)
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 91, 1000, 30, 30)
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, -1, 30, 30)
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 180, 30)
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 30, 30, 361)
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 30, 30, 0, 'parsec')
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 30, 30, 0, 'm', 'g')
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 30, 30, 0, model='flat')
+    
+    
+    def test_Ellipsoid(self):
+        fp = footprint.compute_footprint(-147.5, 64.8, 1000, 30, 20, 0, model='wgs84')
+        self.assertEquals(fp.width, footprint.compute_footprint(-147.5, 64.8, 1000, 30, 20, 0).width)
+        wgs84 = ellipsoid.WGS84
+        self.assertAlmostEquals(wgs84.inverse(-147.5, 64.8, -147.5, fp.ul.y)[0], fp.height / 2, 6)
+        self.assertAlmostEquals(wgs84.inverse(-147.5, 64.8, fp.ur.x, 64.8)[0], fp.width / 2, 3)
+        fp = footprint.compute_footprint(-147.5, 64.8, 1000, 30, 30, 20, model='WGS84')
+        for p, q in zip(fp.points(), self.fp.points()):
+            self.assertAlmostEquals(p.x, q.x, 4)
+            self.assertAlmostEquals(p.y, q.y, 4)
+    
+    
+    def test_Tilt(self):
+        # a range beyond the corners leaves the nadir footprint as it is
+        fp = footprint.compute_footprint(-147.5, 64.8, 1000, 30, 30, 20, max_range=1e6)
+        self.assertEquals([(p.x, p.y) for p in fp.points()], [(p.x, p.y) for p in self.fp.points()])
+        self.assertEquals((fp.width, fp.height), (self.fp.width, self.fp.height))
+        
+        # looking 30 degrees ahead the top edge is 45 and the bottom edge
+        # 15 degrees from nadir
+        radius = footprint.getRadius('m')
+        fp = footprint.compute_footprint(-147.5, 64.8, 1000, 30, 30, 0, pitch=30)
+        cp = fp.cp
+        self.assertAlmostEquals(cp.geoDistanceTo(footprint.Point.fromFloats(cp.x, fp.ul.y), radius=radius), 1000.0, 4)
+        self.assertAlmostEquals(cp.geoDistanceTo(footprint.Point.fromFloats(cp.x, fp.lr.y), radius=radius), 267.9491924, 4)
+        self.assertAlmostEquals(fp.ul.x - cp.x, cp.x - fp.ur.x, 12)
+        self.assertAlmostEquals(fp.height, 732.0508076, 4)
+        
+        # rolled to the right the footprint is that of a pitch on its side
+        fp = footprint.compute_footprint(-147.5, 64.8, 1000, 30, 30, 0, roll=30)
+        self.assertAlmostEquals(cp.geoDistanceTo(footprint.Point.fromFloats(fp.ur.x, cp.y), radius=radius), 1000.0, 4)
+        self.assertAlmostEquals(fp.width, 732.0508076, 4)
+        self.assertAlmostEquals(cp.geoDistanceTo(footprint.Point.fromFloats(cp.x, fp.ul.y), radius=radius),
+                                cp.geoDistanceTo(footprint.Point.fromFloats(cp.x, fp.ll.y), radius=radius), 4)
+        
+        # the top rays above the horizon are clipped to the range
+        matrix = footprint.tilt_matrix(80 * footprint.DEG2RAD, 0.0)
+        tan = footprint.math.tan(15 * footprint.DEG2RAD)
+        horizon = footprint.horizon(1000.0, radius)
+        (ul, ll, ur, lr) = footprint.ground_offsets(matrix, 1000.0, tan, tan, horizon)
+        self.assertAlmostEquals(footprint.math.hypot(*ul), horizon, 6)
+        self.assertAlmostEquals(footprint.math.hypot(*ur), horizon, 6)
+        self.assert_(footprint.math.hypot(*ll) < horizon)
+        (ul, ll, ur, lr) = footprint.ground_offsets(matrix, 1000.0, tan, tan, 2000.0)
+        self.assertAlmostEquals(footprint.math.hypot(*ll), 2000.0, 6)
+        fp = footprint.compute_footprint(-147.5, 64.8, 1000, 30, 30, 0, pitch=80)
+        self.assert_(fp.ul.y > fp.ll.y > fp.cp.y)
+        
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 30, 30, 0, pitch=90)
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 30, 30, 0, roll="-2", angle='r')
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 30, 30, 0, pitch="up")
+        self.assertRaises(ValueError, footprint.compute_footprint, -147.5, 64.8, 1000, 30, 30, 0, max_range=-1)
+        
+        # check_tilt keeps the units, parse_tilt converts to radians.
+        self.assertEquals(footprint.check_tilt("30", '', None), (30.0, None, None))
+        self.assertEquals(footprint.check_tilt(0.5, -0.25, "100", angle='r'), (0.5, -0.25, 100.0))
+        self.assertEquals(footprint.parse_tilt("30", '', None), (30 * footprint.DEG2RAD, 0.0, None))
+        self.assertRaises(ValueError, footprint.check_tilt, 90, 0)
+        self.assertRaises(ValueError, footprint.check_tilt, 0, 0, angle='x')
+
+
+
+class TestFootprintTracker(unittest.TestCase):
+    """
+    Class: TestFootprintTracker
+    
+    Description:
+    The unit test cases for testing that the tracker gives the footprints
+    compute_footprint does while recomputing only what changed.
+    """
+    
+    def check(self, fp, expected):
+        self.assertEquals([(p.x, p.y) for p in fp.points()], [(p.x, p.y) for p in expected.points()])
+        self.assertEquals((fp.width, fp.height, fp.units), (expected.width, expected.height, expected.units))
+    
+    
+    def test_NotFinite(self):
+        tracker = footprint.FootprintTracker(30, 20)
+        for pose in ((float('nan'), 64.8, 1000.0), (-147.5, float('nan'), 1000.0),
+                     (-147.5, 64.8, float('nan')), (-147.5, 64.8, float('inf')),
+                     (float('-inf'), 64.8, 1000.0)):
+            self.assertRaises(ValueError, tracker.update, *pose)
+        self.assertRaises(ValueError, tracker.update, -147.5, 64.8, 1000.0, float('nan'))
+        self.assertEquals(tracker.footprint, None)
+    
+    
+    def test_Stream(self):
+        tracker = footprint.FootprintTracker(30, 20)
+        poses = [(-147.5, 64.8, 1000.0, 20.0), (-147.5, 64.8, 1000.0, 20.5),
+                 (-147.5, 64.8, 1000.0, 21.0), (-147.5, 64.8, 1010.0, 21.0),
+                 (-147.5, 64.8, 1010.0, 0.0), (-147.49, 64.81, 1010.0, 0.0),
+                 (-147.49, 64.81, 1010.0, 0.0), (-147.49, 64.81, 1010.0, 360.0)]
+        for (lon, lat, alt, azimuth) in poses:
+            self.check(tracker.update(lon, lat, alt, azimuth),
+                       footprint.compute_footprint(lon, lat, alt, 30, 20, azimuth))
+        self.assertEquals(tracker.rebuilds, 3)
+        self.assertEquals(tracker.rotations, 4)
+    
+    
+    def test_Arguments(self):
+        tracker = footprint.FootprintTracker(0.5, 0.25, 'km', 'r')
+        self.check(tracker.update(10.123456789012345, -45.5, 2.5, 1.0),
+                   footprint.compute_footprint(10.123456789012345, -45.5, 2.5, 0.5, 0.25, 1.0, 'km', 'r'))
+    
+    
+    def test_Ellipsoid(self):
+        tracker = footprint.FootprintTracker(30, 20, model='wgs84')
+        for (lon, lat, alt, azimuth) in [(-147.5, 64.8, 1000.0, 20.0), (-147.5, 64.8, 1000.0, 45.0),
+                                         (-147.5, 64.8, 9000.0, 45.0), (12.0, -45.0, 9000.0, 0.0)]:
+            self.check(tracker.update(lon, lat, alt, azimuth),
+                       footprint.compute_footprint(lon, lat, alt, 30, 20, azimuth, model='wgs84'))
+        self.assertEquals(tracker.rebuilds, 3)
+    
+    
+    def test_Invalid(self):
+        self.assertRaises(ValueError, footprint.FootprintTracker, 180, 30)
+        self.assertRaises(ValueError, footprint.FootprintTracker, 30, 30, 'yards')
+        tracker = footprint.FootprintTracker(30, 30)
+        self.assertRaises(ValueError, tracker.update, -147.5, 64.8, -1)
+        self.assertRaises(ValueError, tracker.update, -147.5, 64.8, 1000, 361)
+        self.assertRaises(ValueError, tracker.update, 181, 64.8, 1000)
+        self.assertRaises(ValueError, tracker.update, -147.5, 91, 1000)
+
+
+def runtests():
+    for case in (TestComputeFootprint, TestFootprintTracker):
+        suite = unittest.TestLoader().loadTestsFromTestCase(case)
+        unittest.TextTestRunner(verbosity=2).run(suite)
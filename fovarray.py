@@ -0,0 +1,963 @@
+# File: fovarray.py
+# Vectorized footprint computation over arrays of camera poses.
+#
+# About:
+# Requires NumPy. The scalar path in footprint.py stays the reference; this
+# module evaluates the same spherical formulas for whole arrays at once.
+
+#
+# Module: fovarray
+#
+# Description:
+# Array counterpart of <footprint.footprint_corners>. Every function takes
+# NumPy arrays (or anything `numpy.asarray' accepts, including scalars which
+# broadcast) and works on all elements at once instead of one
+# <coordinate.Point> at a time.
+#
+# <distance_matrix> and <PointTree> compare whole point sets, e.g. to find
+# the camera centers near each other.
+#
+# <ellipsoid_waypoint>, <ellipsoid_inverse> and <ellipsoid_rotate> are the
+# array counterparts of <ellipsoid.Ellipsoid>, used by <footprints> for the
+# ellipsoidal earth models.
+#
+# <tilt_matrices> and <ground_offsets> project the corner rays of tilted
+# cameras, with one 3x3 rotation matrix per pose applied to all four rays
+# at once.
+#
+# <read_poses> is the matching input path: it memory-maps a pose file and
+# parses it in chunks straight into arrays for <footprints>.
+#
+# Accuracy:
+# The formulas are the ones used by <coordinate.Point.geoWaypoint>,
+# <coordinate.Point.geoBearingTo>, <coordinate.Point.geoDistanceTo> and
+# <coordinate.Point.rotatePoints>, with the same DEG2RAD/RAD2DEG constants.
+# <bearing> uses arctan2 instead of atan plus a quadrant adjustment, and
+# NumPy's sin/cos may differ from libm in the last bit, so results agree
+# with the scalar path to within <TOLERANCE> degrees rather than bit for
+# bit.
+#
+
+import heapq
+import math
+import mmap
+import warnings
+
+import numpy
+
+from coordinate import getRadius
+from coordinate import EARTH_RADIUS_M
+from coordinate import DEG2RAD, RAD2DEG
+from ellipsoid import getEllipsoid
+from ellipsoid import _deltaSigma
+from ellipsoid import MAX_ITERATIONS, CONVERGENCE
+from ellipsoid import RADIANS, DEGREES
+from footprint import parse_pose
+from footprint import CORNER_SIGNS
+
+#
+# Constants:
+# TOLERANCE - maximum difference in degrees to the scalar footprint path.
+# CP, UL, LL, UR, LR - indices of the points along axis 1 of the corner
+#                      array returned by <footprints>.
+#
+TOLERANCE = 1e-9
+CP, UL, LL, UR, LR = range(5)
+
+#
+# Constants:
+# POSE_CHUNKSIZE - approximate number of bytes of a pose file parsed at once
+#                  by <read_poses>.
+# POSE_COLUMNS   - number of columns of a pose record: lon, lat, alt, fovx,
+#                  fovy and azimuth.
+#
+POSE_CHUNKSIZE = 1 << 22
+POSE_COLUMNS = 6
+
+#
+# Function: waypoint
+#
+# Parameters:
+# x, y     - {array} Longitudes and latitudes of the start points in degrees.
+# distance - {array} Distances in the units of `r'.
+# bearing  - {array} Bearings clockwise from North in degrees.
+# r        - {float} The earth radius.
+#
+# Returns:
+# {2-tuple} Arrays of the longitudes and latitudes of the generated points.
+#
+def waypoint(x, y, distance, bearing, r):
+    y = y * DEG2RAD
+    radBearing = bearing * DEG2RAD
+    c = distance / r
+    
+    sin_y = numpy.sin(y)
+    cos_y = numpy.cos(y)
+    sin_c = numpy.sin(c)
+    cos_c = numpy.cos(c)
+    cos_b = numpy.cos(radBearing)
+    
+    wy = numpy.arcsin(sin_y * cos_c + cos_y * sin_c * cos_b) * RAD2DEG
+    
+    a = sin_c * numpy.sin(radBearing)
+    b = cos_y * cos_c - sin_y * sin_c * cos_b
+    
+    old = numpy.seterr(divide='ignore', invalid='ignore')
+    try:
+        wx = numpy.where(b == 0, x, x + numpy.arctan(a/b) * RAD2DEG)
+    finally:
+        numpy.seterr(**old)
+    
+    return (wx, wy)
+
+
+#
+# Function: bearing
+#
+# Returns:
+# {array} The bearings from (x0, y0) to (x1, y1) clockwise from North in
+# degrees. Equal to <coordinate.Point.geoBearingTo> modulo 360.
+#
+def bearing(x0, y0, x1, y1):
+    x0 = x0 * DEG2RAD
+    x1 = x1 * DEG2RAD
+    y0 = y0 * DEG2RAD
+    y1 = y1 * DEG2RAD
+    
+    a = numpy.cos(y1) * numpy.sin(x1 - x0)
+    b = numpy.cos(y0) * numpy.sin(y1) - numpy.sin(y0) * numpy.cos(y1) * numpy.cos(x1 - x0)
+    
+    return numpy.arctan2(a, b) * RAD2DEG
+
+
+#
+# Function: distance
+#
+# Returns:
+# {array} Great circle distances from (x0, y0) to (x1, y1) in the units of
+# the earth radius `r'.
+#
+def distance(x0, y0, x1, y1, r):
+    x0 = x0 * DEG2RAD
+    x1 = x1 * DEG2RAD
+    y0 = y0 * DEG2RAD
+    y1 = y1 * DEG2RAD
+    
+    a = numpy.sin((y1 - y0) / 2.0) ** 2
+    b = numpy.sin((x1 - x0) / 2.0) ** 2
+    c = numpy.sqrt(a + numpy.cos(y1) * numpy.cos(y0) * b)
+    
+    return 2 * numpy.arcsin(c) * r
+
+
+#
+# Function: rotate
+#
+# Rotate the points (x, y) clockwise about the centers (cx, cy) by `degrees',
+# as <coordinate.Point.rotatePoints> does.
+#
+# Returns:
+# {2-tuple} Arrays of the longitudes and latitudes of the rotated points.
+#
+def rotate(x, y, cx, cy, degrees):
+    y0 = cy * DEG2RAD
+    kx = numpy.cos(y0)
+    kz = numpy.sin(y0)
+    theta = -degrees * DEG2RAD
+    c = numpy.cos(theta)
+    s = numpy.sin(theta)
+    
+    yr = y * DEG2RAD
+    dx = (x - cx) * DEG2RAD
+    cos_y = numpy.cos(yr)
+    vx = cos_y * numpy.cos(dx)
+    vy = cos_y * numpy.sin(dx)
+    vz = numpy.sin(yr)
+    
+    dot = (1.0 - c) * (kx * vx + kz * vz)
+    rx = vx * c - kz * vy * s + kx * dot
+    ry = vy * c + (kz * vx - kx * vz) * s
+    rz = numpy.clip(vz * c + kx * vy * s + kz * dot, -1.0, 1.0)
+    
+    keep = (degrees == 0.0) | (degrees == 360.0)
+    return (numpy.where(keep, x, cx + numpy.arctan2(ry, rx) * RAD2DEG),
+            numpy.where(keep, y, numpy.arcsin(rz) * RAD2DEG))
+
+
+#
+# Function: ellipsoid_waypoint
+#
+# <ellipsoid.Ellipsoid.direct> for arrays. All elements are iterated
+# together until the largest change is below <ellipsoid.CONVERGENCE> or for
+# <ellipsoid.MAX_ITERATIONS>.
+#
+# Parameters:
+# x, y      - {array} Longitudes and latitudes of the start points in degrees.
+# distance  - {array} Distances in meters.
+# bearing   - {array} Bearings clockwise from North in degrees.
+# ellipsoid - {<ellipsoid.Ellipsoid>}
+#
+# Returns:
+# {2-tuple} Arrays of the longitudes and latitudes of the generated points.
+#
+def ellipsoid_waypoint(x, y, distance, bearing, ellipsoid):
+    f = ellipsoid.f
+    alpha1 = bearing * RADIANS
+    sin_alpha1 = numpy.sin(alpha1)
+    cos_alpha1 = numpy.cos(alpha1)
+    
+    tan_u1 = (1.0 - f) * numpy.tan(y * RADIANS)
+    cos_u1 = 1.0 / numpy.sqrt(1.0 + tan_u1 * tan_u1)
+    sin_u1 = tan_u1 * cos_u1
+    sigma1 = numpy.arctan2(tan_u1, cos_alpha1)
+    sin_alpha = cos_u1 * sin_alpha1
+    cos2_alpha = 1.0 - sin_alpha * sin_alpha
+    (A, B) = ellipsoid._series(cos2_alpha)
+    
+    start = distance / (ellipsoid.b * A)
+    sigma = start
+    for i in xrange(MAX_ITERATIONS):
+        cos_2sm = numpy.cos(2.0 * sigma1 + sigma)
+        last = sigma
+        sigma = start + _deltaSigma(B, numpy.sin(sigma), numpy.cos(sigma), cos_2sm)
+        if numpy.all(numpy.abs(sigma - last) <= CONVERGENCE):
+            break
+    cos_2sm = numpy.cos(2.0 * sigma1 + sigma)
+    sin_sigma = numpy.sin(sigma)
+    cos_sigma = numpy.cos(sigma)
+    
+    tmp = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alpha1
+    wy = numpy.arctan2(sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_alpha1,
+                       (1.0 - f) * numpy.sqrt(sin_alpha * sin_alpha + tmp * tmp))
+    lam = numpy.arctan2(sin_sigma * sin_alpha1,
+                        cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alpha1)
+    C = f / 16.0 * cos2_alpha * (4.0 + f * (4.0 - 3.0 * cos2_alpha))
+    L = lam - (1.0 - C) * f * sin_alpha * (sigma + C * sin_sigma * (
+        cos_2sm + C * cos_sigma * (-1.0 + 2.0 * cos_2sm * cos_2sm)))
+    
+    return (x + L * DEGREES, wy * DEGREES)
+
+
+#
+# Function: ellipsoid_inverse
+#
+# <ellipsoid.Ellipsoid.inverse> for arrays. Elements that do not converge
+# within <ellipsoid.MAX_ITERATIONS> (nearly antipodal points) get the great
+# circle on the sphere of the mean radius, as in the scalar version.
+#
+# Returns:
+# {2-tuple} Arrays of the distances in meters and the bearings at (x0, y0)
+# in degrees.
+#
+def ellipsoid_inverse(x0, y0, x1, y1, ellipsoid):
+    f = ellipsoid.f
+    (x0, y0, x1, y1) = numpy.broadcast_arrays(x0, y0, x1, y1)
+    L = (x1 - x0) * RADIANS
+    tan_u1 = (1.0 - f) * numpy.tan(y0 * RADIANS)
+    cos_u1 = 1.0 / numpy.sqrt(1.0 + tan_u1 * tan_u1)
+    sin_u1 = tan_u1 * cos_u1
+    tan_u2 = (1.0 - f) * numpy.tan(y1 * RADIANS)
+    cos_u2 = 1.0 / numpy.sqrt(1.0 + tan_u2 * tan_u2)
+    sin_u2 = tan_u2 * cos_u2
+    
+    old = numpy.seterr(divide='ignore', invalid='ignore')
+    try:
+        lam = L
+        for i in xrange(MAX_ITERATIONS):
+            sin_lam = numpy.sin(lam)
+            cos_lam = numpy.cos(lam)
+            p = cos_u2 * sin_lam
+            q = cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam
+            sin_sigma = numpy.sqrt(p * p + q * q)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = numpy.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = numpy.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1.0 - sin_alpha * sin_alpha
+            cos_2sm = numpy.where(cos2_alpha == 0, 0.0,
+                                  cos_sigma - 2.0 * sin_u1 * sin_u2 / cos2_alpha)
+            C = f / 16.0 * cos2_alpha * (4.0 + f * (4.0 - 3.0 * cos2_alpha))
+            last = lam
+            lam = L + (1.0 - C) * f * sin_alpha * (sigma + C * sin_sigma * (
+                cos_2sm + C * cos_sigma * (-1.0 + 2.0 * cos_2sm * cos_2sm)))
+            converged = numpy.abs(lam - last) <= CONVERGENCE
+            if converged.all():
+                break
+    finally:
+        numpy.seterr(**old)
+    
+    (A, B) = ellipsoid._series(cos2_alpha)
+    s = ellipsoid.b * A * (sigma - _deltaSigma(B, sin_sigma, cos_sigma, cos_2sm))
+    sin_lam = numpy.sin(lam)
+    cos_lam = numpy.cos(lam)
+    alpha1 = numpy.arctan2(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam) * DEGREES
+    
+    if not converged.all():
+        radius = (2.0 * ellipsoid.a + ellipsoid.b) / 3.0
+        s = numpy.where(converged, s, distance(x0, y0, x1, y1, radius))
+        alpha1 = numpy.where(converged, alpha1, bearing(x0, y0, x1, y1))
+    
+    return (s, alpha1 % 360.0)
+
+
+#
+# Function: ellipsoid_rotate
+#
+# <ellipsoid.Ellipsoid.rotatePoints> for arrays: rotate the points (x, y)
+# clockwise about the centers (cx, cy) by `degrees', keeping their geodesic
+# distance from the centers.
+#
+# Returns:
+# {2-tuple} Arrays of the longitudes and latitudes of the rotated points.
+#
+def ellipsoid_rotate(x, y, cx, cy, degrees, ellipsoid):
+    (s, alpha) = ellipsoid_inverse(cx, cy, x, y, ellipsoid)
+    (rx, ry) = ellipsoid_waypoint(cx, cy, s, alpha + degrees, ellipsoid)
+    
+    keep = (degrees == 0.0) | (degrees == 360.0)
+    return (numpy.where(keep, x, rx), numpy.where(keep, y, ry))
+
+
+#
+# Function: footprints
+#
+# Compute the footprints of N nadir camera poses at once.
+#
+# Parameters:
+# lon, lat - {array} Center points in decimal degrees.
+# alt      - {array} Altitudes in `units'.
+# fovx     - {array} Fields of view in X, in degrees or radians per `angle'.
+# fovy     - {array} Fields of view in Y.
+# azimuth  - {array} Azimuths off North, in degrees or radians per `angle'.
+# units    - {string} Units of the altitude, a name from <coordinate.UNITS>.
+# angle    - {string} d for degrees, r for radians.
+# model    - {string} The earth model, see <footprint.compute_footprint>.
+# pitch    - {array} Pitches, in degrees or radians per `angle'. Default is
+#            None, nadir; see <footprint.check_tilt>.
+# roll     - {array} Rolls. Default is None, nadir.
+# max_range - {array} The farthest distances of the corners in `units'.
+#            Default is None, the horizon.
+#
+# The poses are not validated; use <footprint.parse_pose> and
+# <footprint.check_tilt> for that.
+#
+# Returns:
+# {3-tuple} (corners, widths, heights) where corners is an (N, 5, 2) array
+# of the CP, UL, LL, UR and LR longitude/latitude pairs, and widths and
+# heights are the DW and DH values of each footprint in `units'.
+#
+def footprints(lon, lat, alt, fovx, fovy, azimuth, units='m', angle='d', model=None,
+               pitch=None, roll=None, max_range=None):
+    (lon, lat, alt, fovx, fovy, azimuth) = pose_arrays(lon, lat, alt, fovx, fovy, azimuth, angle)
+    if pitch is None and roll is None and max_range is None:
+        return footprint_corners(lon, lat, alt, fovx, fovy, azimuth, units, getEllipsoid(model))
+    
+    if pitch is None:
+        pitch = 0.0
+    if roll is None:
+        roll = 0.0
+    pitch = numpy.asarray(pitch, dtype=numpy.float64)
+    roll = numpy.asarray(roll, dtype=numpy.float64)
+    if angle != 'r':
+        pitch = pitch * DEG2RAD
+        roll = roll * DEG2RAD
+    return footprint_corners(lon, lat, alt, fovx, fovy, azimuth, units, getEllipsoid(model),
+                             pitch, roll, max_range)
+
+
+#
+# Function: pose_arrays
+#
+# Broadcast the pose fields of <footprints> to float64 arrays of one
+# dimension and convert the angles as <footprint.parse_pose> does.
+#
+# Returns:
+# {6-tuple} (lon, lat, alt, fov_x, fov_y, azimuth) with the fields of view
+# in radians and the azimuths in degrees.
+#
+def pose_arrays(lon, lat, alt, fovx, fovy, azimuth, angle='d'):
+    (lon, lat, alt, fovx, fovy, azimuth) = numpy.broadcast_arrays(
+        *[numpy.asarray(a, dtype=numpy.float64).ravel() for a in
+          (lon, lat, alt, fovx, fovy, azimuth)])
+    
+    if angle == 'r':
+        azimuth = azimuth * RAD2DEG
+    else:
+        fovx = fovx * DEG2RAD
+        fovy = fovy * DEG2RAD
+    return (lon, lat, alt, fovx, fovy, azimuth)
+
+
+#
+# Function: footprint_corners
+#
+# <footprints> of converted poses, as returned by <pose_arrays>; the array
+# counterpart of <footprint.footprint_corners>.
+#
+# Parameters:
+# ellipsoid - {<ellipsoid.Ellipsoid>} The ellipsoid, or None for the sphere.
+# pitch, roll - {array} The tilts in radians, or None (default) for nadir
+#             cameras.
+# max_range - {array} The farthest distances of the corners, see
+#             <footprints>.
+#
+def footprint_corners(lon, lat, alt, fov_x, fov_y, azimuth, units='m', ellipsoid=None,
+                      pitch=None, roll=None, max_range=None):
+    r = getRadius(units)
+    
+    corners = numpy.empty((len(lon), 5, 2), dtype=numpy.float64)
+    corners[:, CP, 0] = lon
+    corners[:, CP, 1] = lat
+    
+    if pitch is not None or roll is not None or max_range is not None:
+        return _tilted_corners(corners, lon, lat, alt, fov_x, fov_y, azimuth, r, ellipsoid,
+                               pitch, roll, max_range)
+    
+    d_vert = alt * numpy.tan(fov_y / 2.0)
+    d_horiz = alt * numpy.tan(fov_x / 2.0)
+    
+    if ellipsoid is None:
+        upper = waypoint(lon, lat, d_vert, 0.0, r)[1]
+        lower = waypoint(lon, lat, d_vert, 180.0, r)[1]
+        left = waypoint(lon, lat, d_horiz, 270.0, r)[0]
+        right = waypoint(lon, lat, d_horiz, 90.0, r)[0]
+        
+        corners[:, UL] = numpy.column_stack(rotate(left, upper, lon, lat, azimuth))
+        corners[:, LL] = numpy.column_stack(rotate(left, lower, lon, lat, azimuth))
+        corners[:, UR] = numpy.column_stack(rotate(right, upper, lon, lat, azimuth))
+        corners[:, LR] = numpy.column_stack(rotate(right, lower, lon, lat, azimuth))
+    else:
+        scale = EARTH_RADIUS_M / r
+        upper = ellipsoid_waypoint(lon, lat, d_vert * scale, 0.0, ellipsoid)[1]
+        lower = ellipsoid_waypoint(lon, lat, d_vert * scale, 180.0, ellipsoid)[1]
+        left = ellipsoid_waypoint(lon, lat, d_horiz * scale, 270.0, ellipsoid)[0]
+        right = ellipsoid_waypoint(lon, lat, d_horiz * scale, 90.0, ellipsoid)[0]
+        
+        corners[:, UL] = numpy.column_stack(ellipsoid_rotate(left, upper, lon, lat, azimuth, ellipsoid))
+        corners[:, LL] = numpy.column_stack(ellipsoid_rotate(left, lower, lon, lat, azimuth, ellipsoid))
+        corners[:, UR] = numpy.column_stack(ellipsoid_rotate(right, upper, lon, lat, azimuth, ellipsoid))
+        corners[:, LR] = numpy.column_stack(ellipsoid_rotate(right, lower, lon, lat, azimuth, ellipsoid))
+    
+    return (corners, d_horiz * 2, d_vert * 2)
+
+
+#
+# Function: tilt_matrices
+#
+# <footprint.tilt_matrix> for arrays.
+#
+# Returns:
+# {array} An (N, 3, 3) array of the rotation matrices of the N pitches and
+# rolls in radians.
+#
+def tilt_matrices(pitch, roll):
+    (pitch, roll) = numpy.broadcast_arrays(numpy.asarray(pitch, dtype=numpy.float64).ravel(),
+                                           numpy.asarray(roll, dtype=numpy.float64).ravel())
+    cos_p = numpy.cos(pitch)
+    sin_p = numpy.sin(pitch)
+    cos_r = numpy.cos(roll)
+    sin_r = numpy.sin(roll)
+    
+    matrices = numpy.empty((len(pitch), 3, 3), dtype=numpy.float64)
+    matrices[:, 0] = numpy.column_stack((cos_r, numpy.zeros_like(cos_r), -sin_r))
+    matrices[:, 1] = numpy.column_stack((-sin_p * sin_r, cos_p, -sin_p * cos_r))
+    matrices[:, 2] = numpy.column_stack((cos_p * sin_r, sin_p, cos_p * cos_r))
+    return matrices
+
+
+#
+# Function: ground_offsets
+#
+# <footprint.ground_offsets> for arrays: the corner rays of each camera are
+# rotated by its matrix in one batched product and clipped to `max_range'.
+#
+# Parameters:
+# matrices  - {array} The (N, 3, 3) <tilt_matrices>.
+# alt       - {array} The altitudes.
+# tan_x     - {array} The tangents of half the fields of view in X.
+# tan_y     - {array} The tangents of half the fields of view in Y.
+# max_range - {array} The farthest distances of the corners.
+#
+# Returns:
+# {2-tuple} (right, ahead) (N, 4) arrays of the distances of the UL, LL, UR
+# and LR corners from the center points.
+#
+def ground_offsets(matrices, alt, tan_x, tan_y, max_range):
+    signs = numpy.array(CORNER_SIGNS)
+    rays = numpy.empty((len(matrices), 4, 3), dtype=numpy.float64)
+    rays[:, :, 0] = signs[:, 0] * tan_x[:, numpy.newaxis]
+    rays[:, :, 1] = signs[:, 1] * tan_y[:, numpy.newaxis]
+    rays[:, :, 2] = -1.0
+    v = numpy.einsum('nij,nkj->nki', matrices, rays)
+    (vx, vy, vz) = (v[:, :, 0], v[:, :, 1], v[:, :, 2])
+    
+    alt = alt[:, numpy.newaxis]
+    max_range = max_range[:, numpy.newaxis]
+    horizontal = numpy.hypot(vx, vy)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        clip = (vz >= 0) | (alt * horizontal > max_range * -vz)
+        scale = numpy.where(clip, max_range / horizontal, alt / -vz)
+    return (vx * scale, vy * scale)
+
+
+def _tilted_corners(corners, lon, lat, alt, fov_x, fov_y, azimuth, r, ellipsoid, pitch, roll, max_range):
+    n = len(lon)
+    if max_range is None:
+        max_range = numpy.sqrt(alt * (2.0 * r + alt))
+    else:
+        max_range = numpy.broadcast_to(numpy.asarray(max_range, dtype=numpy.float64).ravel(), (n,))
+    if pitch is None:
+        pitch = 0.0
+    if roll is None:
+        roll = 0.0
+    matrices = numpy.broadcast_to(tilt_matrices(pitch, roll), (n, 3, 3))
+    (right, ahead) = ground_offsets(matrices, alt, numpy.tan(fov_x / 2.0), numpy.tan(fov_y / 2.0), max_range)
+    
+    cx = lon[:, numpy.newaxis]
+    cy = lat[:, numpy.newaxis]
+    degrees = azimuth[:, numpy.newaxis]
+    east = numpy.where(right < 0, 270.0, 90.0)
+    north = numpy.where(ahead < 0, 180.0, 0.0)
+    if ellipsoid is None:
+        x = waypoint(cx, cy, numpy.abs(right), east, r)[0]
+        y = waypoint(cx, cy, numpy.abs(ahead), north, r)[1]
+        (x, y) = rotate(x, y, cx, cy, degrees)
+    else:
+        scale = EARTH_RADIUS_M / r
+        x = ellipsoid_waypoint(cx, cy, numpy.abs(right) * scale, east, ellipsoid)[0]
+        y = ellipsoid_waypoint(cx, cy, numpy.abs(ahead) * scale, north, ellipsoid)[1]
+        (x, y) = ellipsoid_rotate(x, y, cx, cy, degrees, ellipsoid)
+    corners[:, UL:, 0] = x
+    corners[:, UL:, 1] = y
+    
+    widths = numpy.maximum(right[:, UR - 1] - right[:, UL - 1], right[:, LR - 1] - right[:, LL - 1])
+    heights = numpy.maximum(ahead[:, UL - 1] - ahead[:, LL - 1], ahead[:, UR - 1] - ahead[:, LR - 1])
+    return (corners, widths, heights)
+
+
+#
+# Function: distance_matrix
+#
+# Great circle distances between every pair of two point sets, with the
+# haversine formula of <coordinate.Point.geoDistanceTo>.
+#
+# Parameters:
+# x0, y0 - {array} Longitudes and latitudes of the N first points.
+# x1, y1 - {array} Longitudes and latitudes of the M second points. Default
+#          is the first points.
+# units  - {string} Units of the result, a name from <coordinate.UNITS>.
+#          Default is km.
+# radius - {float} Optional earth radius, overrides `units'.
+#
+# Returns:
+# {array} An (N, M) array; element [i, j] is the distance from point i of
+# the first set to point j of the second.
+#
+def distance_matrix(x0, y0, x1=None, y1=None, units='km', radius=None):
+    if radius is None:
+        radius = getRadius(units)
+    x0 = numpy.asarray(x0, dtype=numpy.float64).ravel() * DEG2RAD
+    y0 = numpy.asarray(y0, dtype=numpy.float64).ravel() * DEG2RAD
+    if x1 is None:
+        (x1, y1) = (x0, y0)
+    else:
+        x1 = numpy.asarray(x1, dtype=numpy.float64).ravel() * DEG2RAD
+        y1 = numpy.asarray(y1, dtype=numpy.float64).ravel() * DEG2RAD
+    
+    a = numpy.sin((y1[numpy.newaxis, :] - y0[:, numpy.newaxis]) / 2.0) ** 2
+    b = numpy.sin((x1[numpy.newaxis, :] - x0[:, numpy.newaxis]) / 2.0) ** 2
+    b *= numpy.cos(y0)[:, numpy.newaxis]
+    b *= numpy.cos(y1)[numpy.newaxis, :]
+    a += b
+    c = numpy.sqrt(numpy.minimum(a, 1.0, out=a), out=a)
+    return 2 * numpy.arcsin(c) * radius
+
+
+#
+# Class: PointTree
+#
+# KD-tree over a set of points for nearest neighbour and radius queries.
+#
+# The points are stored as 3D unit vectors, where the straight line (chord)
+# distance grows with the great circle distance, so the tree can prune with
+# plain boxes in 3D and never has to deal with the antimeridian or the
+# poles. The distances returned are computed with the haversine formula of
+# <coordinate.Point.geoDistanceTo>.
+#
+# Attributes:
+# x, y   - {array} The longitudes and latitudes of the points.
+# radius - {float} The earth radius used for distances.
+#
+class PointTree(object):
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # x, y     - {array} The longitudes and latitudes of the points.
+    # units    - {string} Units of the distances, a name from
+    #            <coordinate.UNITS>. Default is km.
+    # radius   - {float} Optional earth radius, overrides `units'.
+    # leafsize - {int} Maximum number of points in a leaf of the tree.
+    #
+    def __init__(self, x, y, units='km', radius=None, leafsize=16):
+        if radius is None:
+            radius = getRadius(units)
+        self.radius = radius
+        self.x = numpy.array(x, dtype=numpy.float64).ravel()
+        self.y = numpy.array(y, dtype=numpy.float64).ravel()
+        self.xyz = _unitVectors(self.x, self.y)
+        self._build(max(1, int(leafsize)))
+    
+    
+    #
+    # Method: fromPoints
+    #
+    # (Class method) Create a tree from <coordinate.Point> objects or a
+    # <coordinate.PointArray>.
+    #
+    @classmethod
+    def fromPoints(cls, points, units='km', radius=None, leafsize=16):
+        if hasattr(points, 'x') and hasattr(points, 'y'):
+            return cls(points.x, points.y, units, radius, leafsize)
+        return cls([p.x for p in points], [p.y for p in points], units, radius, leafsize)
+    
+    
+    def __len__(self):
+        return len(self.x)
+    
+    
+    #
+    # Method: nearest
+    #
+    # Find the `k' points nearest to (x, y).
+    #
+    # Returns:
+    # {2-tuple} (distances, indices) arrays of up to `k' elements, nearest
+    # first.
+    #
+    def nearest(self, x, y, k=1):
+        q = _unitVectors(numpy.array([x], dtype=numpy.float64),
+                         numpy.array([y], dtype=numpy.float64))[0]
+        k = min(int(k), len(self.x))
+        best = []
+        if k > 0:
+            self._nearest(0, q, k, best)
+        indices = numpy.array(sorted([i for (d, i) in best]), dtype=numpy.intp)
+        return self._sorted(x, y, indices)
+    
+    
+    #
+    # Method: within
+    #
+    # Find the points within `distance' of (x, y), in the units of the tree.
+    #
+    # Returns:
+    # {2-tuple} (distances, indices) arrays, nearest first.
+    #
+    def within(self, x, y, distance):
+        q = _unitVectors(numpy.array([x], dtype=numpy.float64),
+                         numpy.array([y], dtype=numpy.float64))[0]
+        angle = min(float(distance) / self.radius, math.pi)
+        chord = 2.0 * math.sin(angle / 2.0) * (1.0 + 1e-9) + 1e-12
+        found = []
+        self._within(0, q, chord * chord, found)
+        if found:
+            indices = numpy.sort(numpy.concatenate(found))
+        else:
+            indices = numpy.zeros(0, dtype=numpy.intp)
+        (distances, indices) = self._sorted(x, y, indices)
+        keep = distances <= distance
+        return (distances[keep], indices[keep])
+    
+    
+    #
+    # Build the tree into flat lists. Node i covers self.order[start[i]:
+    # end[i]] with the bounding box lower[i], upper[i]; inner nodes have
+    # the children left[i] and right[i], leaves have -1.
+    #
+    def _build(self, leafsize):
+        xyz = self.xyz
+        self.order = order = numpy.arange(len(xyz))
+        self.start = []
+        self.end = []
+        self.lower = []
+        self.upper = []
+        self.left = []
+        self.right = []
+        
+        stack = [(0, len(xyz), None)]
+        while stack:
+            (start, end, parent) = stack.pop()
+            node = len(self.start)
+            if parent is not None:
+                (i, side) = parent
+                side[i] = node
+            points = xyz[order[start:end]]
+            self.start.append(start)
+            self.end.append(end)
+            if end > start:
+                self.lower.append(points.min(axis=0))
+                self.upper.append(points.max(axis=0))
+            else:
+                self.lower.append(numpy.zeros(3))
+                self.upper.append(numpy.zeros(3))
+            self.left.append(-1)
+            self.right.append(-1)
+            if end - start <= leafsize:
+                continue
+            dim = int(numpy.argmax(self.upper[node] - self.lower[node]))
+            middle = (end - start) // 2
+            part = numpy.argpartition(points[:, dim], middle)
+            order[start:end] = order[start:end][part]
+            stack.append((start + middle, end, (node, self.right)))
+            stack.append((start, start + middle, (node, self.left)))
+        
+        self.lower = numpy.array(self.lower)
+        self.upper = numpy.array(self.upper)
+    
+    
+    # Squared chord distance from q to the box of `node'.
+    def _boxDistance(self, node, q):
+        d = numpy.maximum(self.lower[node] - q, 0.0) + numpy.maximum(q - self.upper[node], 0.0)
+        return float(numpy.dot(d, d))
+    
+    
+    def _nearest(self, node, q, k, best):
+        if self.left[node] < 0:
+            indices = self.order[self.start[node]:self.end[node]]
+            d = self.xyz[indices] - q
+            d = numpy.einsum('ij,ij->i', d, d)
+            for dist, i in zip(d.tolist(), indices.tolist()):
+                if len(best) < k:
+                    heapq.heappush(best, (-dist, i))
+                elif dist < -best[0][0]:
+                    heapq.heapreplace(best, (-dist, i))
+            return
+        children = [(self._boxDistance(child, q), child)
+                    for child in (self.left[node], self.right[node])]
+        children.sort()
+        for dist, child in children:
+            if len(best) < k or dist < -best[0][0]:
+                self._nearest(child, q, k, best)
+    
+    
+    def _within(self, node, q, limit, found):
+        if self._boxDistance(node, q) > limit:
+            return
+        if self.left[node] < 0:
+            indices = self.order[self.start[node]:self.end[node]]
+            d = self.xyz[indices] - q
+            found.append(indices[numpy.einsum('ij,ij->i', d, d) <= limit])
+            return
+        self._within(self.left[node], q, limit, found)
+        self._within(self.right[node], q, limit, found)
+    
+    
+    # The haversine distances from (x, y) to the points `indices', and the
+    # indices, ordered by distance.
+    def _sorted(self, x, y, indices):
+        distances = distance(x, y, self.x[indices], self.y[indices], self.radius)
+        order = numpy.lexsort((indices, distances))
+        return (distances[order], indices[order])
+
+
+def _unitVectors(x, y):
+    x = x * DEG2RAD
+    y = y * DEG2RAD
+    cos_y = numpy.cos(y)
+    return numpy.column_stack((cos_y * numpy.cos(x), cos_y * numpy.sin(x), numpy.sin(y)))
+
+
+#
+# Function: read_poses
+#
+# Read a CSV or TSV pose file, in the format of fovbox --batch, through a
+# memory map. The file is parsed in chunks of about `chunksize' bytes that
+# end on a line boundary.
+#
+# A chunk in which every line is a plain numeric record of all six columns
+# is converted by a single `numpy.fromstring' call and validated with array
+# comparisons; no line is split and no <coordinate.Coordinate> is created.
+# Any other chunk (blank lines, comments, a missing azimuth, coordinates in
+# degrees-minutes-seconds or invalid records) is parsed line by line with
+# <footprint.parse_pose>, which accepts and rejects the same records as the
+# scalar batch path.
+#
+# Parameters:
+# path      - {string} The pose file.
+# angle     - {string} d for degrees, r for radians. Used for validation.
+# chunksize - {int} Bytes per chunk. Default is <POSE_CHUNKSIZE>.
+#
+# Returns:
+# {generator} A (poses, errors) tuple per chunk, where poses is an (N, 6)
+# float64 array of the valid records (lon and lat in decimal degrees, the
+# other columns as written) and errors is a list of (line number, message)
+# tuples of the invalid records.
+#
+def read_poses(path, angle='d', chunksize=POSE_CHUNKSIZE):
+    f = open(path, 'rb')
+    try:
+        f.seek(0, 2)
+        size = f.tell()
+        if not size:
+            return
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+    
+    try:
+        (start, lineno, delimiter) = _skip_header(m, size)
+        while start < size:
+            end = m.find('\n', start + chunksize - 1)
+            if end < 0:
+                end = size
+            else:
+                end += 1
+            text = m[start:end]
+            yield _parse_chunk(text, lineno, delimiter, angle)
+            lineno += text.count('\n')
+            start = end
+    finally:
+        m.close()
+
+
+#
+# Skip the blank lines, comments and header line at the start of the map
+# `m' and detect the delimiter like fovbox.read_poses does. Returns (offset,
+# line number, delimiter) of the first record.
+#
+def _skip_header(m, size):
+    start = 0
+    lineno = 1
+    while start < size:
+        end = m.find('\n', start)
+        if end < 0:
+            end = size - 1
+        line = m[start:end + 1].strip()
+        if line and not line.startswith('#'):
+            if '\t' in line:
+                delimiter = '\t'
+            else:
+                delimiter = ','
+            if line.split(delimiter)[0].strip().lower() in ('lon', 'longitude'):
+                return (end + 1, lineno + 1, delimiter)
+            return (start, lineno, delimiter)
+        start = end + 1
+        lineno += 1
+    return (size, lineno, ',')
+
+
+# Chunks of more lines than this that are not plain numeric records are
+# split in halves before they are parsed line by line.
+_SPLIT_LINES = 64
+
+# Value appended to every line of a chunk parsed at once. A line of too many
+# or too few values moves it out of the last column. It is invalid in every
+# column of a pose, so a line that holds it is rejected anyway.
+_LINE_END = -999
+
+def _parse_chunk(text, lineno, delimiter, angle):
+    lines = text.count('\n') + (not text.endswith('\n'))
+    # With the right number of delimiters in total, <POSE_COLUMNS> values
+    # on every line and no <_shifted_fields>, every field of every line
+    # holds exactly one value.
+    if (text.count(delimiter) == (POSE_COLUMNS - 1) * lines and '#' not in text and
+            not _shifted_fields(text, delimiter)):
+        numbers = text
+        if delimiter != '\t':
+            numbers = text.replace(delimiter, ' ')
+        numbers = numbers.replace('\n', ' %d\n' % _LINE_END)
+        if not text.endswith('\n'):
+            numbers += ' %d' % _LINE_END
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            values = numpy.fromstring(numbers, dtype=numpy.float64, sep=' ')
+        if len(values) == (POSE_COLUMNS + 1) * lines:
+            values = values.reshape(lines, POSE_COLUMNS + 1)
+        if (values.ndim == 2 and (values[:, POSE_COLUMNS] == _LINE_END).all() and
+                (values[:, :POSE_COLUMNS] != _LINE_END).all()):
+            poses = values[:, :POSE_COLUMNS]
+            valid = _valid_poses(poses, angle)
+            if valid.all():
+                return (poses, [])
+            errors = [(lineno + i, _pose_error(poses[i], angle))
+                      for i in numpy.flatnonzero(~valid)]
+            return (poses[valid], errors)
+    
+    # Split the chunk so a single irregular line does not send all of it
+    # down the line by line path.
+    if lines > _SPLIT_LINES:
+        middle = text.find('\n', len(text) // 2) + 1
+        if 0 < middle < len(text):
+            (poses, errors) = _parse_chunk(text[:middle], lineno, delimiter, angle)
+            (more, more_errors) = _parse_chunk(text[middle:], lineno + text.count('\n', 0, middle), delimiter, angle)
+            return (numpy.concatenate((poses, more)), errors + more_errors)
+    
+    return _parse_lines(text.split('\n'), lineno, delimiter, angle)
+
+
+#
+# Whether a field of `text' may hold two values separated by blanks while
+# another field of the line is empty, so the line has the right number of
+# values in the wrong columns. Without blanks a field holds at most one
+# value, and an empty field leaves its line short.
+#
+def _shifted_fields(text, delimiter):
+    if delimiter == '\t':
+        blanks = ' \r'
+    else:
+        blanks = ' \t\r'
+    for blank in blanks:
+        if blank in text:
+            break
+    else:
+        return False
+    
+    text = text.translate(None, blanks)
+    return (text.startswith(delimiter) or text.endswith(delimiter) or
+            delimiter * 2 in text or delimiter + '\n' in text or '\n' + delimiter in text)
+
+
+#
+# The array form of the range checks of <footprint.parse_pose>. NaN values
+# are invalid.
+#
+def _valid_poses(poses, angle):
+    if angle == 'r':
+        (fovmax, azimax) = (math.pi, 2 * math.pi)
+    else:
+        (fovmax, azimax) = (180.0, 360.0)
+    (lon, lat, alt, fovx, fovy, azimuth) = poses.T
+    with numpy.errstate(invalid='ignore'):
+        return ((lon >= -180.0) & (lon <= 180.0) & (lat >= -90.0) & (lat <= 90.0) &
+                (alt >= 0) & (fovx > 0) & (fovx < fovmax) & (fovy > 0) &
+                (fovy < fovmax) & (azimuth >= 0) & (azimuth <= azimax))
+
+
+def _pose_error(pose, angle):
+    try:
+        parse_pose(*[repr(v) for v in pose], angle=angle)
+    except ValueError, e:
+        return str(e)
+    return "Invalid pose: %s" % ", ".join([repr(v) for v in pose])
+
+
+def _parse_lines(lines, lineno, delimiter, angle):
+    poses = []
+    errors = []
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = [field.strip() for field in line.split(delimiter)]
+        if len(fields) < POSE_COLUMNS - 1 or len(fields) > POSE_COLUMNS:
+            errors.append((lineno + i, "Expected columns: lon, lat, alt, fovx, fovy, azimuth"))
+            continue
+        fields.extend([''] * (POSE_COLUMNS - len(fields)))
+        try:
+            (cp, alt) = parse_pose(*fields, angle=angle)[:2]
+        except ValueError, e:
+            errors.append((lineno + i, str(e)))
+            continue
+        poses.append((cp.x, cp.y, alt, float(fields[3]), float(fields[4]), float(fields[5] or 0)))
+    return (numpy.array(poses, dtype=numpy.float64).reshape(-1, POSE_COLUMNS), errors)
@@ -0,0 +1,278 @@
+import coordinate
+import footprint
+import fovbox
+import unittest
+import random
+import os
+import tempfile
+from StringIO import StringIO
+
+try:
+    import numpy
+    import fovarray
+    import ellipsoid
+except ImportError:
+    numpy = None
+
+class TestFootprints(unittest.TestCase):
+    """
+    Class: TestFootprints
+    
+    Description:
+    The unit test cases for testing that the vectorized footprint engine
+    agrees with the scalar path in footprint within fovarray.TOLERANCE.
+    """
+    
+    def setUp(self):
+        rnd = random.Random(42)
+        self.poses = [(-147.5, 64.8, 1000.0, 30.0, 30.0, 20.0),
+                      (0.0, 0.0, 100.0, 60.0, 45.0, 0.0),
+                      (10.0, -45.0, 5000.0, 10.0, 80.0, 360.0)]
+        for i in range(200):
+            self.poses.append((
+                rnd.uniform(-179.0, 179.0),
+                rnd.uniform(-85.0, 85.0),
+                rnd.uniform(0.0, 20000.0),
+                rnd.uniform(0.1, 120.0),
+                rnd.uniform(0.1, 120.0),
+                rnd.uniform(0.0, 360.0)))
+    
+    
+    def scalar(self, pose, units='m', angle='d', model=None):
+        fp = footprint.compute_footprint(*pose, units=units, angle=angle, model=model)
+        return ([(p.x, p.y) for p in fp.points()], fp.width, fp.height)
+    
+    
+    def check(self, poses, units='m', angle='d', model=None):
+        columns = zip(*poses)
+        (corners, widths, heights) = fovarray.footprints(*columns, units=units, angle=angle, model=model)
+        self.assertEquals(corners.shape, (len(poses), 5, 2))
+        for i, pose in enumerate(poses):
+            (points, width, height) = self.scalar(pose, units, angle, model)
+            for j, (x, y) in enumerate(points):
+                self.assert_(abs(corners[i, j, 0] - x) < fovarray.TOLERANCE)
+                self.assert_(abs(corners[i, j, 1] - y) < fovarray.TOLERANCE)
+            self.assertAlmostEquals(widths[i], width, 9)
+            self.assertAlmostEquals(heights[i], height, 9)
+    
+    
+    def test_Degrees(self):
+        self.check(self.poses)
+    
+    
+    def test_Units(self):
+        self.check([p[:2] + (p[2]/1000.0,) + p[3:] for p in self.poses[:20]], 'km')
+        self.check([p[:2] + (p[2]*3.2808,) + p[3:] for p in self.poses[:20]], 'ft')
+    
+    
+    def test_Radians(self):
+        poses = [p[:3] + (p[3]*footprint.DEG2RAD, p[4]*footprint.DEG2RAD, p[5]*footprint.DEG2RAD) for p in self.poses[3:23]]
+        self.check(poses, angle='r')
+    
+    
+    def test_Ellipsoid(self):
+        self.check(self.poses, model='wgs84')
+        self.check([p[:2] + (p[2]/1000.0,) + p[3:] for p in self.poses[:20]], 'km', model='grs80')
+    
+    
+    def test_EllipsoidInverse(self):
+        x = numpy.array([-147.5, 0.0, 0.0, 10.0])
+        y = numpy.array([64.8, 0.0, 0.5, 20.0])
+        x1 = numpy.array([-147.0, 179.7, 179.5, 10.0])
+        y1 = numpy.array([65.0, 0.0, -0.5, 20.0])
+        (s, alpha) = fovarray.ellipsoid_inverse(x, y, x1, y1, ellipsoid.WGS84)
+        for i in range(len(x)):
+            (distance, bearing, final) = ellipsoid.WGS84.inverse(x[i], y[i], x1[i], y1[i])
+            self.assertAlmostEquals(s[i], distance, 6)
+            self.assertAlmostEquals(alpha[i], bearing, 9)
+    
+    
+    def test_Tilt(self):
+        rnd = random.Random(7)
+        poses = self.poses[:50]
+        pitch = [rnd.uniform(-85.0, 85.0) for pose in poses]
+        roll = [rnd.uniform(-60.0, 60.0) for pose in poses]
+        for (model, max_range) in ((None, None), (None, 3000.0), ('wgs84', None)):
+            (corners, widths, heights) = fovarray.footprints(*zip(*poses), model=model,
+                                                             pitch=pitch, roll=roll, max_range=max_range)
+            for i, pose in enumerate(poses):
+                fp = footprint.compute_footprint(*pose, model=model, pitch=pitch[i], roll=roll[i], max_range=max_range)
+                for j, p in enumerate(fp.points()):
+                    self.assert_(abs(corners[i, j, 0] - p.x) < fovarray.TOLERANCE)
+                    self.assert_(abs(corners[i, j, 1] - p.y) < fovarray.TOLERANCE)
+                self.assertAlmostEquals(widths[i], fp.width, 6)
+                self.assertAlmostEquals(heights[i], fp.height, 6)
+        
+        # no tilt and no clipping is the nadir footprint
+        (corners, widths, heights) = fovarray.footprints(*zip(*self.poses), pitch=0.0)
+        (nadir, nadir_widths, nadir_heights) = fovarray.footprints(*zip(*self.poses))
+        self.assert_((abs(corners - nadir) < fovarray.TOLERANCE).all())
+        self.assert_((abs(widths - nadir_widths) < 1e-6).all())
+    
+    
+    def test_Broadcast(self):
+        (corners, widths, heights) = fovarray.footprints([-147.5, 0.0], [64.8, 0.0], 1000, 30, 30, 0)
+        self.assertEquals(corners.shape, (2, 5, 2))
+        self.assertEquals(widths.shape, (2,))
+
+
+class TestReadPoses(unittest.TestCase):
+    """
+    Class: TestReadPoses
+    
+    Description:
+    The unit test cases for testing that the memory-mapped pose reader
+    accepts and rejects the same records as the line by line batch path.
+    """
+    
+    def setUp(self):
+        rnd = random.Random(7)
+        lines = ["lon,lat,alt,fovx,fovy,azimuth"]
+        for i in range(500):
+            lines.append("%.6f,%.6f,%.1f,%.2f,%.2f,%.2f" % (
+                rnd.uniform(-180.0, 180.0), rnd.uniform(-89.0, 89.0),
+                rnd.uniform(0.0, 5000.0), rnd.uniform(1.0, 90.0),
+                rnd.uniform(1.0, 90.0), rnd.uniform(0.0, 360.0)))
+        lines[40] = "bad,1,1,1,1,1"
+        lines[90] = "10,20,100,30,30,400"
+        lines[91] = "10,95,100,30,30,0"
+        lines[150] = ""
+        lines[151] = "# comment"
+        lines[200] = "147d 30m 0s W,64d 48m 0s N,1000,30,30"
+        lines[201] = "10,20,100,30"
+        self.text = "\n".join(lines) + "\n"
+        (fd, self.path) = tempfile.mkstemp()
+        os.write(fd, self.text)
+        os.close(fd)
+    
+    
+    def tearDown(self):
+        os.remove(self.path)
+    
+    
+    def test_SameAsBatch(self):
+        expected = StringIO()
+        expected_errors = fovbox.run_batch(StringIO(self.text), expected, format='binary')
+        expected = numpy.fromstring(expected.getvalue(), '<f8').reshape(-1, 12)
+        for chunksize in (1, 100, 4096, 1 << 20):
+            chunks = list(fovarray.read_poses(self.path, chunksize=chunksize))
+            errors = sum([e for p, e in chunks], [])
+            self.assertEquals([lineno for lineno, message in errors], [41, 91, 92, 202])
+            self.assertEquals(len(errors), expected_errors)
+            poses = numpy.concatenate([p for p, e in chunks])
+            (corners, widths, heights) = fovarray.footprints(*poses.T)
+            self.assert_((abs(corners.reshape(-1, 10) - expected[:, :10]) < fovarray.TOLERANCE).all())
+            self.assert_((abs(widths - expected[:, 10]) < 1e-6).all())
+    
+    
+    def test_RunBatch(self):
+        out = StringIO()
+        errors = fovbox.run_batch_mmap(self.path, out)
+        expected = StringIO()
+        self.assertEquals(errors, fovbox.run_batch(StringIO(self.text), expected))
+        self.assertEquals(len(out.getvalue().splitlines()), len(expected.getvalue().splitlines()))
+    
+    
+    def test_ShiftedColumns(self):
+        # the extra value of one line makes up for a missing one of the next
+        for (text, lines, poses) in (
+                ("-147.5,64.8,1000,30,30,20,5\n10,45,500,20,20\n", [1], [[10.0, 45.0, 500.0, 20.0, 20.0, 0.0]]),
+                ("-147.5,64.8 1000,30,30,20\n10,45,500,20,,20\n", [1, 2], [])):
+            f = open(self.path, 'w')
+            f.write(text)
+            f.close()
+            chunks = list(fovarray.read_poses(self.path))
+            self.assertEquals([lineno for p, e in chunks for lineno, message in e], lines)
+            self.assertEquals(numpy.concatenate([p for p, e in chunks]).tolist(), poses)
+            self.assertEquals(fovbox.run_batch(StringIO(text), StringIO()), len(lines))
+    
+    
+    def test_Empty(self):
+        open(self.path, 'w').close()
+        self.assertEquals(list(fovarray.read_poses(self.path)), [])
+
+
+class TestPointTree(unittest.TestCase):
+    """
+    Class: TestPointTree
+    
+    Description:
+    The unit test cases for testing that the distance matrix and the tree
+    queries agree with coordinate.Point.geoDistanceTo.
+    """
+    
+    def setUp(self):
+        rnd = random.Random(17)
+        self.rnd = rnd
+        self.points = [coordinate.Point.fromFloats(rnd.uniform(-180.0, 180.0), rnd.uniform(-90.0, 90.0))
+                       for i in range(400)]
+        # Clusters at the antimeridian and at a pole.
+        self.points.extend([coordinate.Point.fromFloats(180.0 - rnd.uniform(-0.5, 0.5) % 360.0, rnd.uniform(-1.0, 1.0))
+                            for i in range(50)])
+        self.points.extend([coordinate.Point.fromFloats(rnd.uniform(-180.0, 180.0), rnd.uniform(89.0, 90.0))
+                            for i in range(50)])
+        self.tree = fovarray.PointTree.fromPoints(self.points, leafsize=8)
+    
+    
+    def brute(self, p, units='km'):
+        return sorted([(p.geoDistanceTo(q, units), i) for i, q in enumerate(self.points)])
+    
+    
+    def test_DistanceMatrix(self):
+        points = self.points[::10]
+        x = [p.x for p in points]
+        y = [p.y for p in points]
+        for units in coordinate.UNITS:
+            matrix = fovarray.distance_matrix(x, y, units=units)
+            self.assertEquals(matrix.shape, (len(points), len(points)))
+            for i, p in enumerate(points):
+                for j, q in enumerate(points):
+                    expected = p.geoDistanceTo(q, units)
+                    self.assert_(abs(matrix[i, j] - expected) <= 1e-9 * max(1.0, expected))
+        matrix = fovarray.distance_matrix(x[:3], y[:3], x, y)
+        self.assertEquals(matrix.shape, (3, len(points)))
+    
+    
+    def test_Nearest(self):
+        for n in range(50):
+            p = coordinate.Point.fromFloats(self.rnd.uniform(-180.0, 180.0), self.rnd.uniform(-90.0, 90.0))
+            if n % 5 == 0:
+                p = self.points[400 + n]
+            (distances, indices) = self.tree.nearest(p.x, p.y, 7)
+            expected = self.brute(p)[:7]
+            self.assertEquals(list(indices), [i for (d, i) in expected])
+            for d, (e, i) in zip(distances, expected):
+                self.assertAlmostEquals(d, e, 9)
+        self.assertEquals(len(self.tree.nearest(0.0, 0.0, 1000)[0]), len(self.points))
+    
+    
+    def test_Within(self):
+        for units in coordinate.UNITS:
+            tree = fovarray.PointTree.fromPoints(self.points, units)
+            limit = 1500.0 * coordinate.getRadius(units) / coordinate.getRadius('km')
+            for n in range(20):
+                p = self.points[n * 23]
+                (distances, indices) = tree.within(p.x, p.y, limit)
+                expected = [(d, i) for (d, i) in self.brute(p, units) if d <= limit]
+                self.assertEquals(list(indices), [i for (d, i) in expected])
+        self.assertEquals(len(self.tree.within(0.0, 0.0, 1e9)[1]), len(self.points))
+        self.assertEquals(len(self.tree.within(0.0, 0.0, 0.0)[1]), 0)
+    
+    
+    def test_PointArray(self):
+        points = coordinate.PointArray(self.points)
+        tree = fovarray.PointTree.fromPoints(points)
+        self.assertEquals(len(tree), len(self.points))
+        self.assertEquals(list(tree.nearest(10.0, 10.0, 3)[1]), list(self.tree.nearest(10.0, 10.0, 3)[1]))
+
+if numpy is None:
+    TestFootprints = unittest.skip("NumPy is not installed")(TestFootprints)
+    TestReadPoses = unittest.skip("NumPy is not installed")(TestReadPoses)
+    TestPointTree = unittest.skip("NumPy is not installed")(TestPointTree)
+
+
+
+def runtests():
+    for case in (TestFootprints, TestReadPoses, TestPointTree):
+        suite = unittest.TestLoader().loadTestsFromTestCase(case)
+        unittest.TextTestRunner(verbosity=2).run(suite)
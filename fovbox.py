@@ -7,94 +7,395 @@ fovbox can parse any of these coordinate representations:
 
 import sys
 import math
-from optparse import OptionParser
 
-from coordinate import Coordinate
-from coordinate import Point
+from coordinate import UNITS
+from coordinate import getRadius
+import instrument
+from ellipsoid import ELLIPSOIDS, SPHERE
+from footprint import compute_footprint
+from footprint import check_tilt
+from fovio import WRITERS
 
 __VERSION__ = "0.1"
-DEBUG = False
 
 # factor to convert degrees to radians (PI/180) and radians to degrees.
 DEG2RAD =  0.01745329252
 RAD2DEG = 57.29577951308
 
-def debug(txt):
-    global DEBUG
-    if DEBUG:
-        print "%s" % txt
+# columns of a pose record read in batch mode.
+BATCH_COLUMNS = ('lon', 'lat', 'alt', 'fovx', 'fovy', 'azimuth')
 
-def mainfunc():
-    
-    # option parser (see http://docs.python.org/library/optparse.html)
-    usage = "%prog [options] --lon LONGITUDE --lat LATITUDE --alt ALTITUDE [--fov FOV | --fovx FOVx --fovy FOVy]"
-    parser = OptionParser(usage=usage, version="%prog "+__VERSION__)
-    parser.add_option("--lon", "--longitude", dest="lon", help="REQUIRED. Geographic coordinate for the Longitude.")
-    parser.add_option("--lat", "--latitude", dest="lat", help="REQUIRED. Geographic coordinate for the Latitude.")
-    parser.add_option("--alt", "--altitude", dest="alt", help="REQUIRED. Altitude from the earth.")
-    parser.add_option("--fov", dest="fov", help="REQUIRED. Field of view. 0 < fov < 180 degrees; 0 < fov < %s radians." % math.pi)
-    parser.add_option("--fovx", dest="fovx", help="If FOV is not passed in, this is REQUIRED. Field of view in X. 0 < fov < 180 degrees; 0 < fov < %s radians." % math.pi)
-    parser.add_option("--fovy", dest="fovy", help="If FOV is not passed in, this is REQUIRED. Field of view in Y. 0 < fov < 180 degrees; 0 < fov < %s radians." % math.pi)
-    parser.add_option("--azi", "--azimuth", dest="azimuth", help="The angle of the azimuth off North, in degrees or radians (per the -a flag) Default is 0. 0 <= azimuth <= 360.0 degrees; 0 <= azimuth <= %s radians." % (2*math.pi))
-    parser.add_option("-o", "--output", dest="output", help="[dd (default) | dms] -- dd is decimal degrees ([-]123.1234); dms is degrees-minutes-seconds (11d 22m 33.333s [NSEW]).")
-    parser.add_option("-u", "--units", dest="units", help="[m (default) | km | ft | mi] -- Units of altitude. m is meters; km is kilometers; ft is feet; mi is miles.")
-    parser.add_option("-a", "--angle", dest="angle", help="[d (default) | r] -- Units of the field of view angle. d is degrees; r is radians.")
-    
-    (options, args) = parser.parse_args()
-    
-    # Parse arguments
-    if options.lon == None:
-        parser.error("Must pass in the --lon option.")
-    
-    if options.lat == None:
-        parser.error("Must pass in the --lat option.")
-    
-    if options.alt == None:
-        parser.error("Must pass in the --alt option.")
-    
-    if options.fovx != None and options.fovy == None:
-        parser.error("Must pass in the --fovy option.")
-    
-    if options.fovy != None and options.fovx == None:
-        parser.error("Must pass in the --fovx option.")
-    
-    if options.fov == None and not (options.fovx != None and options.fovy != None):
-        parser.error("Must pass in the --fov option.")
-    
-    lon = Coordinate(options.lon, "Lon")
-    lat = Coordinate(options.lat, "Lat")
-    
-    if not lon.isValid():
-        parser.error("Invalid longitudinal coordinate: %s" % lon.getCoord())
-    if not lat.isValid():
-        parser.error("Invalid latitudinal coordinate: %s" % lat.getCoord())
-    
-    # Center point
-    cp = Point(options.lon, options.lat)
-    
-    try:
-        alt = float(options.alt)
-    except:
-        parser.error("Invalid altitude: %s. Altitude must be a number." % options.alt)
-    
-    if options.fov == None:
+# pose records per task of a parallel batch run.
+BATCH_CHUNKSIZE = 2000
+
+# functions listed in the --profile summary.
+PROFILE_LINES = 25
+
+def read_poses(f):
+    """
+    Generate (line number, fields) for every pose record of the CSV or TSV
+    file `f'. Blank lines, comments (#) and a header line are skipped. Lines
+    are read one at a time so any size of input can be streamed.
+    """
+    delimiter = None
+    for lineno, line in enumerate(f, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if delimiter is None:
+            if '\t' in line:
+                delimiter = '\t'
+            else:
+                delimiter = ','
+            if line.split(delimiter)[0].strip().lower() in ('lon', 'longitude'):
+                continue
+        yield lineno, [field.strip() for field in line.split(delimiter)]
+
+def batch_record(fields, units='m', angle='d', radius=None, format='text', model=None, tilt=None):
+    """
+    Compute the footprint of one pose record, a list of the BATCH_COLUMNS
+    fields (azimuth may be left out, it defaults to 0), on the earth `model'
+    and return it formatted as a `format' record (see fovio.WRITERS). `tilt'
+    is the (pitch, roll, max_range) of the camera as returned by
+    footprint.check_tilt, the angles in `angle' units, or None for a nadir
+    camera.
+    
+    Raises ValueError if the record is invalid.
+    """
+    if len(fields) < 5 or len(fields) > len(BATCH_COLUMNS):
+        raise ValueError("Expected columns: %s" % ", ".join(BATCH_COLUMNS))
+    
+    if tilt is None:
+        tilt = (None, None, None)
+    fp = compute_footprint(*fields, units=units, angle=angle, radius=radius, model=model,
+                           pitch=tilt[0], roll=tilt[1], max_range=tilt[2])
+    return WRITERS[format].format(fp)
+
+def batch_chunk(chunk, units='m', angle='d', format='text', model=None, tilt=None):
+    """
+    Compute the output of a list of (line number, fields) pose records.
+    
+    Returns a tuple (records, messages) of the formatted records and the
+    error messages of the invalid records. Runs in the worker processes of a
+    parallel batch run.
+    """
+    radius = getRadius(units)
+    records = []
+    messages = []
+    for lineno, fields in chunk:
         try:
-            fov_x = float(options.fovx)
-        except:
-            parser.error("Invalid field of view in X: %s. Field of view must be a number." % options.fovx)
+            records.append(batch_record(fields, units, angle, radius, format, model, tilt))
+        except ValueError, e:
+            messages.append("fovbox: line %d: %s\n" % (lineno, e))
+    return (records, messages)
+
+def run_batch(f, out, units='m', angle='d', jobs=1, chunksize=BATCH_CHUNKSIZE, format='text', model=None, tilt=None):
+    """
+    Compute the footprint of every pose record in `f' on the earth `model'
+    (see footprint.compute_footprint) and write them to `out' in the output
+    `format' (see fovio.WRITERS). Every pose has the `tilt' of
+    `batch_record'. Invalid records are reported on stderr and skipped.
+    
+    With `jobs' > 1 the records are split into chunks of `chunksize' that
+    are computed by a pool of `jobs' processes. Results are written in input
+    order and at most 2 * `jobs' chunks are in flight, so memory use does
+    not depend on the size of the input.
+    
+    Returns the number of invalid records.
+    """
+    writer = WRITERS[format](out)
+    if jobs > 1:
+        errors = run_batch_parallel(f, writer, units, angle, jobs, chunksize, format, model, tilt)
+    else:
+        errors = 0
+        radius = getRadius(units)
+        for lineno, fields in read_poses(f):
+            try:
+                writer.writeRecords((batch_record(fields, units, angle, radius, format, model, tilt),))
+            except ValueError, e:
+                sys.stderr.write("fovbox: line %d: %s\n" % (lineno, e))
+                errors += 1
+    writer.close()
+    instrument.count('records', writer.count)
+    instrument.count('errors', errors)
+    return errors
+
+def run_batch_parallel(f, writer, units, angle, jobs, chunksize, format, model=None, tilt=None):
+    """
+    The multi-process implementation of `run_batch'.
+    """
+    import multiprocessing
+    from collections import deque
+    from itertools import islice
+    
+    def write(result):
+        (records, messages) = result
+        writer.writeRecords(records)
+        for message in messages:
+            sys.stderr.write(message)
+        return len(messages)
+    
+    poses = read_poses(f)
+    pool = multiprocessing.Pool(jobs)
+    pending = deque()
+    errors = 0
+    try:
+        while True:
+            chunk = list(islice(poses, chunksize))
+            if not chunk:
+                break
+            pending.append(pool.apply_async(batch_chunk, (chunk, units, angle, format, model, tilt)))
+            if len(pending) >= 2 * jobs:
+                errors += write(pending.popleft().get())
         
+        while pending:
+            errors += write(pending.popleft().get())
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return errors
+
+def run_batch_mmap(path, out, units='m', angle='d', format='text', model=None, dem=None, tilt=None):
+    """
+    Compute the footprints of the pose file `path' like `run_batch', but
+    read the file through a memory map and compute whole chunks of poses at
+    once with NumPy (see fovarray.read_poses). Results agree with `run_batch'
+    within fovarray.TOLERANCE.
+    
+    With a terrain.Dem `dem' the footprints are terrain corrected (see
+    terrain.footprints) and the altitudes are above the datum of the DEM.
+    Every pose has the `tilt' of `batch_record', as numbers; terrain
+    correction is only for nadir cameras.
+    
+    Returns the number of invalid records.
+    """
+    import numpy
+    import fovarray
+    if dem is not None:
+        import terrain
+        if tilt is not None:
+            raise ValueError("Terrain correction does not support pitch, roll or range")
+    if tilt is None:
+        tilt = (None, None, None)
+    
+    writer = WRITERS[format](out)
+    errors = 0
+    for poses, messages in fovarray.read_poses(path, angle):
+        for lineno, message in messages:
+            sys.stderr.write("fovbox: line %d: %s\n" % (lineno, message))
+        errors += len(messages)
+        if dem is None:
+            (corners, widths, heights) = fovarray.footprints(*poses.T, units=units, angle=angle, model=model,
+                                                             pitch=tilt[0], roll=tilt[1], max_range=tilt[2])
+        else:
+            (corners, widths, heights) = terrain.footprints(dem, *poses.T, units=units, angle=angle, model=model)
+        values = numpy.column_stack((corners.reshape(-1, 10), widths, heights))
+        writer.writeArray(values)
+    writer.close()
+    instrument.count('records', writer.count)
+    instrument.count('errors', errors)
+    return errors
+
+def run_profiled(func, *args):
+    """
+    Call `func' with `args' with the stage timers of the instrument module
+    enabled and under cProfile, then write the stage timers, the counters
+    and the PROFILE_LINES most expensive functions to stderr.
+    
+    Returns the result of `func'.
+    """
+    import cProfile
+    import pstats
+    import time
+    
+    instrument.enable()
+    profiler = cProfile.Profile()
+    start = time.time()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        elapsed = time.time() - start
+        instrument.disable()
+        sys.stderr.write("fovbox: profile of %.3f s\n" % elapsed)
+        instrument.report(sys.stderr)
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats('cumulative').print_stats(PROFILE_LINES)
+
+def load_dem(path, parser):
+    """
+    Load the --dem grid `path' as a terrain.Dem, or exit with a usage error.
+    """
+    try:
+        import terrain
+    except ImportError, e:
+        parser.error("--dem requires NumPy: %s" % e)
+    try:
+        return terrain.Dem(path)
+    except (EnvironmentError, ValueError), e:
+        parser.error("Cannot read DEM: %s" % e)
+
+def batch_main(options, parser, tilt=None):
+    """
+    Run batch mode for the parsed command line `options', with the `tilt'
+    of `batch_record'.
+    """
+    if options.mmap or options.dem:
+        if options.batch == '-':
+            parser.error("%s cannot read from stdin." % (options.dem and "--dem" or "--mmap"))
+        dem = None
+        if options.dem:
+            dem = load_dem(options.dem, parser)
         try:
-            fov_y = float(options.fovy)
-        except:
-            parser.error("Invalid field of view in Y: %s. Field of view must be a number." % options.fovy)
+            errors = run_batch_mmap(options.batch, sys.stdout, options.units, options.angle, options.format, options.model, dem, tilt)
+        except ImportError, e:
+            parser.error("--mmap requires NumPy: %s" % e)
+        except EnvironmentError, e:
+            parser.error("Cannot map batch file: %s" % e)
+    elif options.batch == '-':
+        errors = run_batch(sys.stdin, sys.stdout, options.units, options.angle, options.jobs, format=options.format, model=options.model, tilt=tilt)
     else:
         try:
-            fov_x = float(options.fov)
-            fov_y = float(options.fov)
-            options.fovx = options.fov
-            options.fovy = options.fov
-        except:
-            parser.error("Invalid field of view: %s. Field of view must be a number." % options.fov)
+            f = open(options.batch)
+        except IOError, e:
+            parser.error("Cannot open batch file: %s" % e)
+        try:
+            errors = run_batch(f, sys.stdout, options.units, options.angle, options.jobs, format=options.format, model=options.model, tilt=tilt)
+        finally:
+            f.close()
+    return errors and 1 or 0
+
+# command line options: (flags, dest, action, help). Used to build the
+# OptionParser and by the fast path of FastParser.
+OPTIONS = [
+    (("--lon", "--longitude"), "lon", "store",
+     "REQUIRED. Geographic coordinate for the Longitude."),
+    (("--lat", "--latitude"), "lat", "store",
+     "REQUIRED. Geographic coordinate for the Latitude."),
+    (("--alt", "--altitude"), "alt", "store",
+     "REQUIRED. Altitude from the earth."),
+    (("--fov",), "fov", "store",
+     "REQUIRED. Field of view. 0 < fov < 180 degrees; 0 < fov < %s radians." % math.pi),
+    (("--fovx",), "fovx", "store",
+     "If FOV is not passed in, this is REQUIRED. Field of view in X. 0 < fov < 180 degrees; 0 < fov < %s radians." % math.pi),
+    (("--fovy",), "fovy", "store",
+     "If FOV is not passed in, this is REQUIRED. Field of view in Y. 0 < fov < 180 degrees; 0 < fov < %s radians." % math.pi),
+    (("--azi", "--azimuth"), "azimuth", "store",
+     "The angle of the azimuth off North, in degrees or radians (per the -a flag) Default is 0. 0 <= azimuth <= 360.0 degrees; 0 <= azimuth <= %s radians." % (2*math.pi)),
+    (("--pitch",), "pitch", "store",
+     "The tilt of the camera from nadir towards the top of the image (ahead, along the azimuth), in degrees or radians (per the -a flag). Negative looks back. Default is 0. -90.0 < pitch < 90.0 degrees."),
+    (("--roll",), "roll", "store",
+     "The tilt of the camera from nadir towards the right of the image, in degrees or radians (per the -a flag). Negative looks left. Default is 0. -90.0 < roll < 90.0 degrees."),
+    (("--range",), "max_range", "store",
+     "The farthest distance of a footprint corner from the center point, in the units of altitude. Corner rays at or above the horizon, or meeting the ground farther away, are clipped to it. Default is the distance to the horizon for a tilted camera; nadir footprints are only clipped when it is given."),
+    (("-b", "--batch"), "batch", "store",
+     "Read poses from FILE ('-' for stdin), one CSV or TSV record per line with the columns %s. Writes one tab separated record per pose with the columns CP, UL, LL, UR, LR (longitude and latitude of each), DW and DH." % ", ".join(BATCH_COLUMNS)),
+    (("-j", "--jobs"), "jobs", "store",
+     "Number of processes computing footprints in batch mode. Default is 1."),
+    (("--mmap",), "mmap", "store_true",
+     "In batch mode, memory-map FILE and compute the footprints of whole chunks of poses with NumPy instead of one pose at a time. Requires NumPy and a FILE other than '-'; ignores --jobs."),
+    (("--profile",), "profile", "store_true",
+     "In batch mode, time the parse, waypoint, rotate and format stages, run under cProfile, and write both summaries to stderr after the run. With --jobs only the work of the main process is timed."),
+    (("--serve",), "serve", "store",
+     "Run a footprint server on ADDRESS (HOST:PORT, :PORT or unix:PATH) answering newline delimited JSON poses. See fovserver.py."),
+    (("-f", "--format"), "format", "store",
+     "[text (default) | ndjson | geojson | binary] -- Output format. text is the CP, UL, LL, UR, LR, DW and DH lines (one tab separated line per pose in batch mode); ndjson is one JSON object per pose; geojson is a FeatureCollection of footprint polygons; binary is 12 little-endian float64 values per pose (see fovio.readBinary)."),
+    (("-o", "--output"), "output", "store",
+     "[dd (default) | dms] -- dd is decimal degrees ([-]123.1234); dms is degrees-minutes-seconds (11d 22m 33.333s [NSEW])."),
+    (("-u", "--units"), "units", "store",
+     "[m (default) | km | ft | mi | nmi] -- Units of altitude. m is meters; km is kilometers; ft is feet; mi is miles; nmi is nautical miles."),
+    (("-a", "--angle"), "angle", "store",
+     "[d (default) | r] -- Units of the field of view angle. d is degrees; r is radians."),
+    (("--dem",), "dem", "store",
+     "Terrain correct the footprints with the digital elevation model FILE, an ESRI float grid (FILE.flt and FILE.hdr, elevations in meters); the altitude is then above the datum of the DEM instead of above the ground. Requires NumPy; batch mode uses the --mmap path. See terrain.py."),
+    (("-m", "--model"), "model", "store",
+     "[sphere (default) | wgs84 | grs80] -- Earth model. sphere is the mean earth radius of the units; wgs84 and grs80 solve the geodesics on that ellipsoid (slower, more accurate at high altitudes)."),
+    ]
+
+# usage line of the OptionParser.
+USAGE = "%prog [options] --lon LONGITUDE --lat LATITUDE --alt ALTITUDE [--fov FOV | --fovx FOVx --fovy FOVy]\n       %prog [options] --batch FILE\n       %prog [options] --serve ADDRESS"
+
+class OptionValues(object):
+    """
+    The parsed options, an attribute per OPTIONS dest, None if not given.
+    """
+    def __init__(self):
+        for flags, dest, action, help in OPTIONS:
+            setattr(self, dest, None)
+    
+    def __str__(self):
+        return str(self.__dict__)
+
+class FastParser(object):
+    """
+    Command line parser for the common invocations. Arguments that are all
+    plain OPTIONS flags, `--flag value' or `--flag=value', are parsed
+    directly. Anything else (--help, --version, abbreviations, unknown
+    flags, missing values) and every error goes to an OptionParser, which
+    is only imported and built then, so one-shot runs do not pay for it.
+    """
+    
+    def __init__(self):
+        self.parser = None
+        self.flags = {}
+        for flags, dest, action, help in OPTIONS:
+            for flag in flags:
+                self.flags[flag] = (dest, action)
+    
+    def option_parser(self):
+        if self.parser is None:
+            from optparse import OptionParser
+            self.parser = OptionParser(usage=USAGE, version="%prog "+__VERSION__)
+            for flags, dest, action, help in OPTIONS:
+                self.parser.add_option(*flags, dest=dest, action=action, help=help)
+        return self.parser
+    
+    def parse_args(self, args=None):
+        if args is None:
+            args = sys.argv[1:]
+        options = self.parse_fast(args)
+        if options is None:
+            return self.option_parser().parse_args(args)
+        return (options, [])
+    
+    def parse_fast(self, args):
+        """
+        Returns the OptionValues of `args', or None if they need the
+        OptionParser.
+        """
+        options = OptionValues()
+        i = 0
+        while i < len(args):
+            (flag, value) = (args[i], None)
+            if flag.startswith('--') and '=' in flag:
+                (flag, value) = flag.split('=', 1)
+            if flag not in self.flags:
+                return None
+            (dest, action) = self.flags[flag]
+            if action == 'store_true':
+                if value is not None:
+                    return None
+                value = True
+            elif value is None:
+                i += 1
+                if i == len(args):
+                    return None
+                value = args[i]
+            setattr(options, dest, value)
+            i += 1
+        return options
+    
+    def error(self, msg):
+        self.option_parser().error(msg)
+
+def mainfunc():
+    
+    # option parser (see http://docs.python.org/library/optparse.html)
+    parser = FastParser()
+    
+    (options, args) = parser.parse_args()
     
     if not options.output:
         options.output = 'dd'
@@ -103,7 +404,7 @@ def mainfunc():
     
     if not options.units:
         options.units = 'm'
-    if options.units.lower() not in ['m', 'km', 'ft', 'mi']:
+    if options.units.lower() not in UNITS:
         parser.error("Invalid option for units: %s" % options.units)
     
     if not options.angle:
@@ -111,133 +412,123 @@ def mainfunc():
     if options.angle.lower() not in ['d', 'r']:
         parser.error("Invalid option for angle: %s" % options.angle)
     
-    if not options.azimuth:
-        options.azimuth = "0"
-    try:
-        options.azimuth = float(options.azimuth)
-    except:
-        parser.error("Invalid option for azimuth: %s" % options.azimuth)
-    
-    if options.angle == 'd':
-        if options.azimuth < 0 or options.azimuth > 360.0:
-            parser.error("Invalid option for azimuth: %s. Azimuth must be between 0 and 360.0 degrees." % options.azimuth)
-    elif options.angle == 'r':
-        if options.azimuth < 0 or options.azimuth > 2*math.pi:
-            parser.error("Invalid option for azimuth: %s. Azimuth must be betweeen 0 and %s radians." % (options.azimuth, 2*math.pi))
+    if not options.format:
+        options.format = 'text'
+    if options.format.lower() not in WRITERS:
+        parser.error("Invalid option for format: %s" % options.format)
     
     options.output = options.output.lower()
     options.units = options.units.lower()
     options.angle = options.angle.lower()
+    options.format = options.format.lower()
     
-    if alt < 0:
-        parser.error("Invalid altitude: %s. Altitude cannot be negative." % alt)
-    
-    if fov_x <= 0:
-        parser.error("Invalid field of view in X: %s. Field of view cannot be negative or zero." % fov_x)
-    
-    if options.angle == 'd' and fov_x >= 180.0:
-        parser.error("Invalid field of view in X: %s. Field of view must be less than 180.0" % fov_x)
-    
-    if options.angle == 'r' and fov_x >= math.pi:
-        parser.error("Invalid field of view in X: %s. Field of view must be lass than %s" % (fov_x, math.pi))
-    
-    if fov_y <= 0:
-        parser.error("Invalid field of view in Y: %s. Field of view cannot be negative or zero." % fov_y)
-    
-    if options.angle == 'd' and fov_y >= 180.0:
-        parser.error("Invalid field of view in Y: %s. Field of view must be less than 180.0" % fov_y)
-    
-    if options.angle == 'r' and fov_y >= math.pi:
-        parser.error("Invalid field of view in Y: %s. Field of view must be lass than %s" % (fov_y, math.pi))
-    
-    if cp.x < -180.0 or cp.x > 180.0:
-        parser.error("Invalid longitudinal coordinate: %s. Longitude must be between -180.0 and 180.0 degrees." % cp.x)
-    
-    if cp.y < -90.0 or cp.y > 90.0:
-        parser.error("Invalid latitudinal coordinate: %s. Latitude must be between -90.0 and 90.0 degrees." % cp.y)
-    
-    if options.angle == 'r':
-        options.azimuth = options.azimuth * RAD2DEG
-    
-    debug(options)
-    
-    if options.angle == 'd':
-        fov_x = fov_x * DEG2RAD
-        fov_y = fov_y * DEG2RAD
-        debug("fov_x in radians is %s, fov_y in radians is %s" % (fov_x, fov_y))
-    
-    xhalf = fov_x/2.0
-    yhalf = fov_y/2.0
+    if not options.model:
+        options.model = SPHERE
+    if options.model.lower() != SPHERE and options.model.lower() not in ELLIPSOIDS:
+        parser.error("Invalid option for model: %s" % options.model)
+    options.model = options.model.lower()
     
-    debug("fov_x half is %s radians, fov_y half is %s radians" % (xhalf, yhalf))
-    
-    # Calculate the top and bottom edge of the viewing angle, d_vert is in the
-    # `alt' units.
-    d_vert = alt * math.tan( yhalf )
-    
-    # Calculate the left and right edge of the viewing angle
-    d_horiz = alt * math.tan( xhalf )
-    
-    debug("d vert: %s" % d_vert)
-    debug("d horiz: %s" % d_horiz)
-
-    # Calculate corner distance
-    dist = math.sqrt( d_vert * d_vert + d_horiz * d_horiz )
+    if not options.jobs:
+        options.jobs = "1"
+    try:
+        jobs = int(options.jobs)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        parser.error("Invalid option for jobs: %s. Jobs must be a positive integer." % options.jobs)
+    options.jobs = jobs
+    
+    tilt = None
+    if options.pitch != None or options.roll != None or options.max_range != None:
+        try:
+            tilt = check_tilt(options.pitch, options.roll, options.max_range, options.angle)
+        except ValueError, e:
+            parser.error(str(e))
+        if options.dem:
+            parser.error("--dem does not support --pitch, --roll or --range.")
+    
+    if options.serve != None:
+        import fovserver
+        try:
+            fovserver.serve(options.serve)
+        except (ValueError, fovserver.socket.error), e:
+            parser.error("Cannot serve on %s: %s" % (options.serve, e))
+        return 0
     
-    # upper plane (only use the y value)
-    upper = cp.geoWaypoint(d_vert, 0.0, options.units)
-    debug("Upper is: %s" % (upper))
+    if options.format == 'binary' and sys.platform == 'win32':
+        import os, msvcrt
+        msvcrt.setmode(sys.stdout.fileno(), os.O_BINARY)
     
-    # lower plane (only use the y value)
-    lower = cp.geoWaypoint(d_vert, 180.0, options.units)
-    debug("Lower is: %s" % (lower))
+    if options.batch != None:
+        if options.profile:
+            return run_profiled(batch_main, options, parser, tilt)
+        return batch_main(options, parser, tilt)
     
-    # left plane (only use the x value)
-    left = cp.geoWaypoint(d_horiz, 270.0, options.units)
-    debug("Left is: %s" % (left))
+    # Parse arguments
+    if options.lon == None:
+        parser.error("Must pass in the --lon option.")
     
-    # right plane (only use the x value)
-    right = cp.geoWaypoint(d_horiz, 90.0, options.units)
-    debug("Right is: %s" % (right))
+    if options.lat == None:
+        parser.error("Must pass in the --lat option.")
     
-    # upper left point
-    ul = Point(left.x, upper.y)
+    if options.alt == None:
+        parser.error("Must pass in the --alt option.")
     
-    # upper right point
-    ur = Point(right.x, upper.y)
+    if options.fovx != None and options.fovy == None:
+        parser.error("Must pass in the --fovy option.")
     
-    # lower right point
-    lr = Point(right.x, lower.y)
+    if options.fovy != None and options.fovx == None:
+        parser.error("Must pass in the --fovx option.")
     
-    # lower left point
-    ll = Point(left.x, lower.y)
+    if options.fov == None and not (options.fovx != None and options.fovy != None):
+        parser.error("Must pass in the --fov option.")
     
-    debug("UL\t%s\t%s" % (ul.x, ul.y))
-    debug("LL\t%s\t%s" % (ll.x, ll.y))
-    debug("UR\t%s\t%s" % (ur.x, ur.y))
-    debug("LR\t%s\t%s" % (lr.x, lr.y))
-    debug("CP\t%s\t%s" % (cp.x, cp.y))
+    if options.fov != None:
+        try:
+            float(options.fov)
+            options.fovx = options.fov
+            options.fovy = options.fov
+        except:
+            parser.error("Invalid field of view: %s. Field of view must be a number." % options.fov)
     
-    ul = ul.rotate(cp, options.azimuth)
-    ur = ur.rotate(cp, options.azimuth)
-    lr = lr.rotate(cp, options.azimuth)
-    ll = ll.rotate(cp, options.azimuth)
+    instrument.debug("%s", options)
     
-    debug("Rotated:")
-    print "CP\t%13.8f\t%13.8f" % (cp.x, cp.y)
-    print "UL\t%13.8f\t%13.8f" % (ul.x, ul.y)
-    print "LL\t%13.8f\t%13.8f" % (ll.x, ll.y)
-    print "UR\t%13.8f\t%13.8f" % (ur.x, ur.y)
-    print "LR\t%13.8f\t%13.8f" % (lr.x, lr.y)
-    print "DW\t%13.8f %s" % (d_horiz*2, 'm')
-    print "DH\t%13.8f %s" % (d_vert*2, 'm')
+    dem = None
+    if options.dem:
+        dem = load_dem(options.dem, parser)
     
-    debug("Azimuth: %s" % options.azimuth)
-    debug("Distance: %s %s" % (dist, options.units))
-    debug("Upper left distance from center point: %s %s" % (cp.geoDistanceTo(ul, options.units), options.units))
-    debug("Vertical viewing distance: %s %s" % (cp.geoDistanceTo(upper, options.units) * 2, options.units))
-    debug("Horizontal viewing distance: %s %s" % (cp.geoDistanceTo(left, options.units) * 2, options.units))
+    try:
+        if dem is not None:
+            import terrain
+            fp = terrain.compute_footprint(dem,
+                options.lon, options.lat, options.alt, options.fovx, options.fovy,
+                options.azimuth, options.units, options.angle, options.model)
+        else:
+            fp = compute_footprint(options.lon, options.lat, options.alt,
+                options.fovx, options.fovy, options.azimuth, options.units,
+                options.angle, model=options.model, pitch=options.pitch,
+                roll=options.roll, max_range=options.max_range)
+    except ValueError, e:
+        parser.error(str(e))
+    
+    if options.format != 'text':
+        writer = WRITERS[options.format](sys.stdout)
+        writer.write(fp)
+        writer.close()
+        return 0
+    
+    print "CP\t%13.8f\t%13.8f" % (fp.cp.x, fp.cp.y)
+    print "UL\t%13.8f\t%13.8f" % (fp.ul.x, fp.ul.y)
+    print "LL\t%13.8f\t%13.8f" % (fp.ll.x, fp.ll.y)
+    print "UR\t%13.8f\t%13.8f" % (fp.ur.x, fp.ur.y)
+    print "LR\t%13.8f\t%13.8f" % (fp.lr.x, fp.lr.y)
+    print "DW\t%13.8f %s" % (fp.width, 'm')
+    print "DH\t%13.8f %s" % (fp.height, 'm')
+    
+    if instrument.ENABLED:
+        instrument.debug("Distance: %s %s", math.sqrt(fp.width * fp.width + fp.height * fp.height) / 2.0, options.units)
+        instrument.debug("Upper left distance from center point: %s %s", fp.cp.geoDistanceTo(fp.ul, options.units), options.units)
     return 0
     
 if __name__ == "__main__":
-    mainfunc()
+    sys.exit(mainfunc())
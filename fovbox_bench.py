@@ -0,0 +1,132 @@
+import fovbox
+import os
+import random
+import sys
+import tempfile
+import time
+
+#
+# Throughput benchmarks for the batch input paths of fovbox, run over a
+# synthetic pose file of ROWS records (10M by default, about 480 MB). Pass
+# another number of rows as the first argument for a quicker run.
+#
+ROWS = 10000000
+
+# The line by line path is timed on the first LINE_ROWS records only.
+LINE_ROWS = 100000
+
+# Distinct records in the synthetic file; the block is repeated.
+BLOCK = 100000
+
+# Cells per side, cell size in degrees and south west corner of the
+# synthetic DEM of the terrain benchmarks, about 110 x 50 km near Fairbanks.
+DEM_SIZE = 2000
+DEM_CELLSIZE = 0.0005
+DEM_WEST = -148.0
+DEM_SOUTH = 64.3
+
+
+def make_poses(path, rows=ROWS, block=BLOCK, bbox=(-180.0, -85.0, 180.0, 85.0)):
+    """
+    Write a CSV pose file of `rows' random records to `path', with centers
+    inside `bbox' (west, south, east, north).
+    """
+    rnd = random.Random(1)
+    (west, south, east, north) = bbox
+    lines = ["%.6f,%.6f,%.1f,%.2f,%.2f,%.2f\n" % (
+        rnd.uniform(west, east), rnd.uniform(south, north),
+        rnd.uniform(0.0, 5000.0), rnd.uniform(1.0, 90.0),
+        rnd.uniform(1.0, 90.0), rnd.uniform(0.0, 360.0)) for i in xrange(min(rows, block))]
+    text = "".join(lines)
+    f = open(path, 'wb')
+    try:
+        f.write("lon,lat,alt,fovx,fovy,azimuth\n")
+        for i in xrange(rows // block):
+            f.write(text)
+        f.write("".join(lines[:rows % block]))
+    finally:
+        f.close()
+
+
+
+def make_dem(base, size=DEM_SIZE, cellsize=DEM_CELLSIZE, west=DEM_WEST, south=DEM_SOUTH):
+    """
+    Write a synthetic `size' x `size' ESRI float grid base.flt/base.hdr of
+    rolling terrain between 0 and 3000 m to `base'. Requires NumPy.
+    
+    Returns the (west, south, east, north) bounds of the grid.
+    """
+    import numpy
+    
+    rows = numpy.arange(size) * (cellsize * 40.0)
+    z = 1500.0 + 1500.0 * numpy.outer(numpy.cos(rows * 0.7), numpy.sin(rows))
+    z.astype('<f4').tofile(base + '.flt')
+    f = open(base + '.hdr', 'w')
+    try:
+        f.write("ncols %d\nnrows %d\nxllcorner %r\nyllcorner %r\ncellsize %r\nbyteorder LSBFIRST\n" % (
+            size, size, west, south, cellsize))
+    finally:
+        f.close()
+    return (west, south, west + size * cellsize, south + size * cellsize)
+
+
+def timed(func, *args):
+    """
+    Returns the seconds one call of `func' takes.
+    """
+    t = time.time()
+    func(*args)
+    return time.time() - t
+
+
+def readbench(path):
+    """
+    Parse the pose file with fovarray.read_poses only.
+    """
+    import fovarray
+    for poses, errors in fovarray.read_poses(path):
+        pass
+
+
+def mmapbench(path, format):
+    out = open(os.devnull, 'wb')
+    try:
+        fovbox.run_batch_mmap(path, out, format=format)
+    finally:
+        out.close()
+
+
+def linebench(path, rows=LINE_ROWS):
+    from itertools import islice
+    f = open(path)
+    out = open(os.devnull, 'wb')
+    try:
+        fovbox.run_batch(islice(f, rows + 1), out, format='binary')
+    finally:
+        out.close()
+        f.close()
+
+
+def runbench(rows=ROWS):
+    (fd, path) = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        t = timed(make_poses, path, rows)
+        print "%-24s %10d rows, %.0f MB in %.1f s" % (
+            "synthetic file", rows, os.path.getsize(path) / 1e6, t)
+        
+        print "%-24s %12.0f poses/s" % ("read_poses", rows / timed(readbench, path))
+        for format in ('binary', 'text'):
+            print "%-24s %12.0f poses/s" % ("run_batch_mmap(%s)" % format,
+                                            rows / timed(mmapbench, path, format))
+        lines = min(rows, LINE_ROWS)
+        print "%-24s %12.0f poses/s" % ("run_batch(binary)", lines / timed(linebench, path, lines))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        runbench(int(sys.argv[1]))
+    else:
+        runbench()
@@ -0,0 +1,114 @@
+import fovbox
+import footprint
+import sys
+import unittest
+from StringIO import StringIO
+
+class TestBatch(unittest.TestCase):
+    """
+    Class: TestBatch
+    
+    Description:
+    The unit test cases for testing that batch mode computes the same
+    footprints as a single invocation and reports invalid records.
+    """
+    
+    def setUp(self):
+        self.input = StringIO(
+            "lon,lat,alt,fovx,fovy,azimuth\n"
+            "-147.5,64.8,1000,30,30,20\n"
+            "\n"
+            "# comment\n"
+            "12.25,-45.5,250,40,20\n"
+            "bad,1,1,1,1,1\n")
+        self.out = StringIO()
+        self.errors = fovbox.run_batch(self.input, self.out)
+        self.records = [l.split("\t") for l in self.out.getvalue().splitlines()]
+    
+    
+    def test_Records(self):
+        self.assertEquals(self.errors, 1)
+        self.assertEquals(len(self.records), 2)
+        self.assertEquals(len(self.records[0]), 12)
+    
+    
+    def test_MatchesSingle(self):
+        fp = footprint.compute_footprint("-147.5", "64.8", "1000", "30", "30", "20")
+        expected = []
+        for p in fp.points():
+            expected.extend(["%.8f" % p.x, "%.8f" % p.y])
+        expected.extend(["%.8f" % fp.width, "%.8f" % fp.height])
+        self.assertEquals(self.records[0], expected)
+    
+    
+    def test_Tsv(self):
+        out = StringIO()
+        errors = fovbox.run_batch(StringIO("-147.5\t64.8\t1000\t30\t30\t20\n"), out)
+        self.assertEquals(errors, 0)
+        self.assertEquals(out.getvalue().rstrip("\n").split("\t"), self.records[0])
+    
+    
+    def test_Tilt(self):
+        out = StringIO()
+        errors = fovbox.run_batch(StringIO("-147.5,64.8,1000,30,30,20\n"), out, tilt=(40.0, -10.0, None))
+        fp = footprint.compute_footprint("-147.5", "64.8", "1000", "30", "30", "20", pitch=40, roll=-10)
+        self.assertEquals(errors, 0)
+        self.assertEquals(out.getvalue().split("\t")[2:4], ["%.8f" % fp.ul.x, "%.8f" % fp.ul.y])
+    
+    
+    def test_Parallel(self):
+        lines = ["%s,%s,%s,30,20,%s" % (-147.5 + i * 0.01, 64.8, 100 + i, i % 360) for i in range(250)]
+        lines.insert(100, "bad,1,1,1,1,1")
+        out = StringIO()
+        errors = fovbox.run_batch(StringIO("\n".join(lines)), out, jobs=2, chunksize=16)
+        expected = StringIO()
+        fovbox.run_batch(StringIO("\n".join(lines)), expected)
+        self.assertEquals(errors, 1)
+        self.assertEquals(out.getvalue(), expected.getvalue())
+    
+    
+    def test_InvalidJobs(self):
+        (argv, stderr) = (sys.argv, sys.stderr)
+        sys.argv = ["fovbox.py", "-b", "-", "-j", "abc"]
+        sys.stderr = StringIO()
+        try:
+            self.assertRaises(SystemExit, fovbox.mainfunc)
+            message = sys.stderr.getvalue()
+        finally:
+            (sys.argv, sys.stderr) = (argv, stderr)
+        self.assert_("Invalid option for jobs: abc." in message)
+
+
+class TestFastParser(unittest.TestCase):
+    """
+    Class: TestFastParser
+    
+    Description:
+    The unit test cases for testing that the fast command line parser
+    gives the same options as the OptionParser and defers to it otherwise.
+    """
+    
+    def setUp(self):
+        self.parser = fovbox.FastParser()
+    
+    
+    def test_SameAsOptionParser(self):
+        args = ["--lon", "-147.5", "--lat=64.8", "--altitude", "1000",
+                "--fov", "30", "--azi", "20", "-u", "km", "--profile"]
+        (options, rest) = self.parser.parse_args(args)
+        (expected, rest) = self.parser.option_parser().parse_args(args)
+        self.assertEquals(rest, [])
+        self.assertEquals(vars(options), vars(expected))
+    
+    
+    def test_Fallback(self):
+        for args in (["--lo", "1"], ["--lat"], ["-u"], ["extra"], ["--profile=1"]):
+            self.assertEquals(self.parser.parse_fast(args), None)
+        self.assertEquals(self.parser.parse_fast([]).lon, None)
+
+
+
+def runtests():
+    for case in (TestBatch, TestFastParser):
+        suite = unittest.TestLoader().loadTestsFromTestCase(case)
+        unittest.TextTestRunner(verbosity=2).run(suite)
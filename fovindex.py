@@ -0,0 +1,337 @@
+# File: fovindex.py
+# Spatial index over footprints.
+#
+# About:
+# Answers "which frames cover this point" and "which frames intersect this
+# box" without scanning every footprint of a mission. Footprints are stored
+# as their UL, UR, LR, LL polygons in a uniform grid of longitude/latitude
+# cells; a query looks at the footprints of the cells it touches, drops the
+# ones whose bounding box misses, and tests the polygons of the rest
+# exactly.
+
+import json
+import math
+
+#
+# Module: fovindex
+#
+# Description:
+# {<FootprintIndex>} - Uniform grid index of footprint polygons.
+#
+# Example:
+#     index = FootprintIndex()
+#     for frame, fp in enumerate(footprints):
+#         index.add(fp, frame)
+#     print index.queryPoint(-147.5, 64.8)
+#     index.save("mission.idx")
+#
+
+#
+# Constants:
+# CELLSIZE  - default width and height of a grid cell in degrees.
+# MAX_CELLS - most grid cells a polygon is entered in; wider polygons are
+#             kept in <FootprintIndex.large> and tested by every query.
+#
+CELLSIZE = 0.05
+MAX_CELLS = 4096
+
+
+#
+# Class: FootprintIndex
+#
+# Uniform grid index of footprint polygons.
+#
+# Polygons are tested in the longitude/latitude plane, as the corners are
+# written by fovbox. Longitudes of a polygon that crosses the antimeridian
+# are unwrapped around its first corner, so its bounding box may extend past
+# +-180; queries are repeated 360 degrees east and west to find it.
+#
+# Attributes:
+# cellsize - {float} The width and height of a grid cell in degrees.
+# keys     - {list} The key of each footprint, in insertion order.
+# rings    - {list} The polygon of each footprint, a tuple of (x, y) corners.
+# large    - {list} The insertion indexes of the polygons whose bounding box
+#            spans more than <MAX_CELLS> cells, which are not in the grid.
+#
+class FootprintIndex(object):
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # cellsize - {float} The cell size in degrees. Default is <CELLSIZE>.
+    #            Cells of about the size of a footprint work best.
+    #
+    def __init__(self, cellsize=CELLSIZE):
+        if not cellsize > 0:
+            raise ValueError("Invalid cell size: %s" % cellsize)
+        self.cellsize = float(cellsize)
+        self.keys = []
+        self.rings = []
+        self.boxes = []
+        self.cells = {}
+        self.large = []
+        self.wraps = False
+    
+    
+    def __len__(self):
+        return len(self.keys)
+    
+    
+    #
+    # Method: add
+    #
+    # Add a footprint.
+    #
+    # Parameters:
+    # fp  - {<footprint.Footprint>} The footprint.
+    # key - {object} Returned by the queries for this footprint. Default is
+    #       its insertion index. Must be JSON serializable for <save>.
+    #
+    # Returns:
+    # {int} The insertion index of the footprint.
+    #
+    def add(self, fp, key=None):
+        return self.addPolygon([(p.x, p.y) for p in (fp.ul, fp.ur, fp.lr, fp.ll)], key)
+    
+    
+    #
+    # Method: addValues
+    #
+    # Add a footprint given as the twelve <fovio.BINARY_COLUMNS> values, e.g.
+    # a row of <fovio.readBinary>.
+    #
+    def addValues(self, values, key=None):
+        v = [float(value) for value in values]
+        return self.addPolygon([(v[2], v[3]), (v[6], v[7]), (v[8], v[9]), (v[4], v[5])], key)
+    
+    
+    #
+    # Method: addPolygon
+    #
+    # Add a polygon.
+    #
+    # Parameters:
+    # ring - {sequence} The (x, y) corners of the polygon in order, not
+    #        closed.
+    # key  - {object} See <add>.
+    #
+    # Returns:
+    # {int} The insertion index of the polygon.
+    #
+    def addPolygon(self, ring, key=None):
+        x0 = ring[0][0]
+        ring = tuple([(_unwrap(x, x0), y) for (x, y) in ring])
+        xs = [x for (x, y) in ring]
+        ys = [y for (x, y) in ring]
+        box = (min(xs), min(ys), max(xs), max(ys))
+        
+        i = len(self.keys)
+        if key is None:
+            key = i
+        self.keys.append(key)
+        self.rings.append(ring)
+        self.boxes.append(box)
+        if box[0] < -180.0 or box[2] > 180.0:
+            self.wraps = True
+        
+        (i0, j0) = self._cell(box[0], box[1])
+        (i1, j1) = self._cell(box[2], box[3])
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > MAX_CELLS:
+            self.large.append(i)
+            return i
+        
+        cells = self.cells
+        for cell in self._cells(box):
+            if cell in cells:
+                cells[cell].append(i)
+            else:
+                cells[cell] = [i]
+        return i
+    
+    
+    #
+    # Method: queryPoint
+    #
+    # Parameters:
+    # x, y - {float} The longitude and latitude of the point.
+    #
+    # Returns:
+    # {list} The keys of the footprints that contain the point, in
+    # insertion order. Points on an edge are contained.
+    #
+    def queryPoint(self, x, y):
+        found = set()
+        for dx in self._shifts():
+            px = x + dx
+            for ids in (self.cells.get(self._cell(px, y), ()), self.large):
+                for i in ids:
+                    (minx, miny, maxx, maxy) = self.boxes[i]
+                    if minx <= px <= maxx and miny <= y <= maxy and _contains(self.rings[i], px, y):
+                        found.add(i)
+        return [self.keys[i] for i in sorted(found)]
+    
+    
+    #
+    # Method: queryBox
+    #
+    # Parameters:
+    # minx, miny, maxx, maxy - {float} The bounding box, in degrees.
+    #
+    # Returns:
+    # {list} The keys of the footprints that intersect the box, in
+    # insertion order. Touching counts as intersecting.
+    #
+    def queryBox(self, minx, miny, maxx, maxy):
+        found = set()
+        for dx in self._shifts():
+            box = (minx + dx, miny, maxx + dx, maxy)
+            seen = set()
+            for ids in self._occupied(box) + [self.large]:
+                for i in ids:
+                    if i in seen or i in found:
+                        continue
+                    seen.add(i)
+                    other = self.boxes[i]
+                    if (other[0] <= box[2] and box[0] <= other[2] and
+                        other[1] <= box[3] and box[1] <= other[3] and
+                        _intersects(self.rings[i], box)):
+                        found.add(i)
+        return [self.keys[i] for i in sorted(found)]
+    
+    
+    #
+    # Method: save
+    #
+    # Write the index to `path' as JSON.
+    #
+    def save(self, path):
+        f = open(path, 'w')
+        try:
+            json.dump({"cellsize": self.cellsize, "keys": self.keys,
+                       "rings": self.rings}, f, separators=(',', ':'))
+        finally:
+            f.close()
+    
+    
+    #
+    # Method: load
+    #
+    # (Class method) Read an index written by <save>. The grid is rebuilt
+    # from the polygons.
+    #
+    # Returns:
+    # {<FootprintIndex>} The index.
+    #
+    @classmethod
+    def load(cls, path):
+        f = open(path)
+        try:
+            data = json.load(f)
+        finally:
+            f.close()
+        index = cls(data["cellsize"])
+        for key, ring in zip(data["keys"], data["rings"]):
+            index.addPolygon([tuple(p) for p in ring], key)
+        return index
+    
+    
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cellsize)), int(math.floor(y / self.cellsize)))
+    
+    
+    def _cells(self, box):
+        (i0, j0) = self._cell(box[0], box[1])
+        (i1, j1) = self._cell(box[2], box[3])
+        return [(i, j) for i in xrange(i0, i1 + 1) for j in xrange(j0, j1 + 1)]
+    
+    
+    #
+    # The lists of footprints of the occupied cells that `box' touches. A box
+    # touching more cells than are occupied visits the occupied ones instead.
+    #
+    def _occupied(self, box):
+        (i0, j0) = self._cell(box[0], box[1])
+        (i1, j1) = self._cell(box[2], box[3])
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            return [ids for (i, j), ids in self.cells.iteritems()
+                    if i0 <= i <= i1 and j0 <= j <= j1]
+        cells = self.cells
+        return [cells[cell] for cell in self._cells(box) if cell in cells]
+    
+    
+    def _shifts(self):
+        if self.wraps:
+            return (0.0, -360.0, 360.0)
+        return (0.0,)
+
+
+#
+# Returns the longitude `x' moved by 360 degrees if it is more than 180
+# degrees away from `x0'.
+#
+def _unwrap(x, x0):
+    if x - x0 > 180.0:
+        return x - 360.0
+    if x0 - x > 180.0:
+        return x + 360.0
+    return x
+
+
+#
+# Returns True if the point (x, y) is inside or on the edge of `ring'.
+#
+def _contains(ring, x, y):
+    inside = False
+    (x1, y1) = ring[-1]
+    for (x2, y2) in ring:
+        if _onSegment(x1, y1, x2, y2, x, y):
+            return True
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+        (x1, y1) = (x2, y2)
+    return inside
+
+
+def _cross(ax, ay, bx, by, cx, cy):
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+def _onSegment(x1, y1, x2, y2, x, y):
+    return (_cross(x1, y1, x2, y2, x, y) == 0 and
+            min(x1, x2) <= x <= max(x1, x2) and min(y1, y2) <= y <= max(y1, y2))
+
+
+def _segmentsIntersect(ax, ay, bx, by, cx, cy, dx, dy):
+    d1 = _cross(cx, cy, dx, dy, ax, ay)
+    d2 = _cross(cx, cy, dx, dy, bx, by)
+    d3 = _cross(ax, ay, bx, by, cx, cy)
+    d4 = _cross(ax, ay, bx, by, dx, dy)
+    if ((d1 > 0 and d2 < 0) or (d1 < 0 and d2 > 0)) and \
+       ((d3 > 0 and d4 < 0) or (d3 < 0 and d4 > 0)):
+        return True
+    return (_onSegment(cx, cy, dx, dy, ax, ay) or _onSegment(cx, cy, dx, dy, bx, by) or
+            _onSegment(ax, ay, bx, by, cx, cy) or _onSegment(ax, ay, bx, by, dx, dy))
+
+
+#
+# Returns True if `ring' and the box (minx, miny, maxx, maxy) intersect.
+#
+def _intersects(ring, box):
+    (minx, miny, maxx, maxy) = box
+    for (x, y) in ring:
+        if minx <= x <= maxx and miny <= y <= maxy:
+            return True
+    corners = ((minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy))
+    for (x, y) in corners:
+        if _contains(ring, x, y):
+            return True
+    (x1, y1) = ring[-1]
+    for (x2, y2) in ring:
+        (cx, cy) = corners[-1]
+        for (dx, dy) in corners:
+            if _segmentsIntersect(x1, y1, x2, y2, cx, cy, dx, dy):
+                return True
+            (cx, cy) = (dx, dy)
+        (x1, y1) = (x2, y2)
+    return False
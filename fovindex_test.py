@@ -0,0 +1,137 @@
+import fovindex
+import footprint
+import os
+import random
+import tempfile
+import unittest
+
+class TestFootprintIndex(unittest.TestCase):
+    """
+    Class: TestFootprintIndex
+    
+    Description:
+    The unit test cases for testing that index queries return the same
+    footprints as an exact test of every footprint.
+    """
+    
+    def setUp(self):
+        rnd = random.Random(16)
+        self.rnd = rnd
+        self.footprints = []
+        for i in range(300):
+            self.footprints.append(footprint.compute_footprint(
+                rnd.uniform(-147.6, -147.4), rnd.uniform(64.75, 64.85),
+                rnd.uniform(100.0, 3000.0), rnd.uniform(5.0, 60.0),
+                rnd.uniform(5.0, 60.0), rnd.uniform(0.0, 360.0)))
+        self.index = fovindex.FootprintIndex(0.01)
+        for i, fp in enumerate(self.footprints):
+            self.index.add(fp, "frame%d" % i)
+    
+    
+    def ring(self, fp):
+        return [(p.x, p.y) for p in (fp.ul, fp.ur, fp.lr, fp.ll)]
+    
+    
+    def test_Point(self):
+        hits = 0
+        for n in range(500):
+            x = self.rnd.uniform(-147.7, -147.3)
+            y = self.rnd.uniform(64.7, 64.9)
+            expected = ["frame%d" % i for i, fp in enumerate(self.footprints)
+                        if fovindex._contains(self.ring(fp), x, y)]
+            self.assertEquals(self.index.queryPoint(x, y), expected)
+            hits += len(expected)
+        self.assert_(hits > 0)
+    
+    
+    def test_Center(self):
+        for i, fp in enumerate(self.footprints[:20]):
+            self.assert_("frame%d" % i in self.index.queryPoint(fp.cp.x, fp.cp.y))
+            self.assert_("frame%d" % i in self.index.queryPoint(fp.ul.x, fp.ul.y))
+    
+    
+    def test_Box(self):
+        for n in range(200):
+            x = self.rnd.uniform(-147.7, -147.3)
+            y = self.rnd.uniform(64.7, 64.9)
+            box = (x, y, x + self.rnd.uniform(0.0, 0.05), y + self.rnd.uniform(0.0, 0.02))
+            expected = ["frame%d" % i for i, fp in enumerate(self.footprints)
+                        if fovindex._intersects(self.ring(fp), box)]
+            self.assertEquals(self.index.queryBox(*box), expected)
+        self.assertEquals(self.index.queryBox(-180, -90, 180, 90), ["frame%d" % i for i in range(300)])
+        self.assertEquals(self.index.queryBox(10, 10, 11, 11), [])
+    
+    
+    def test_Exact(self):
+        # The bounding box of a footprint rotated by 45 degrees contains
+        # points outside the footprint.
+        fp = footprint.compute_footprint(0.0, 0.0, 1000, 60, 60, 45)
+        index = fovindex.FootprintIndex()
+        index.add(fp)
+        self.assertEquals(index.queryPoint(fp.ul.x, fp.ul.y), [0])
+        self.assertEquals(index.queryPoint(fp.cp.x, fp.cp.y), [0])
+        (x, y) = (max(p.x for p in fp.points()), max(p.y for p in fp.points()))
+        self.assertEquals(index.queryPoint(x * 0.9, y * 0.9), [])
+        self.assertEquals(index.queryBox(x * 0.9, y * 0.9, x, y), [])
+    
+    
+    def test_Antimeridian(self):
+        fp = footprint.compute_footprint(179.999, 10.0, 1000, 60, 60, 30)
+        index = fovindex.FootprintIndex()
+        index.add(fp)
+        self.assertEquals(index.queryPoint(179.9995, 10.0), [0])
+        self.assertEquals(index.queryPoint(-179.9995, 10.0), [0])
+        self.assertEquals(index.queryBox(-179.9999, 9.9999, -179.9995, 10.0001), [0])
+        self.assertEquals(index.queryPoint(0.0, 10.0), [])
+    
+    
+    def test_Large(self):
+        # Kept out of the grid, but still found by both queries.
+        fp = footprint.compute_footprint(0, 60, 2000000, 170, 170, 0)
+        index = fovindex.FootprintIndex()
+        index.add(self.footprints[0], "small")
+        index.add(fp, "large")
+        self.assertEquals(index.large, [1])
+        self.assert_(len(index.cells) <= fovindex.MAX_CELLS)
+        self.assertEquals(index.queryPoint(0.0, -60.0), ["large"])
+        x = self.footprints[0].cp.x
+        y = self.footprints[0].cp.y
+        self.assertEquals(index.queryPoint(x, y), ["small"])
+        self.assertEquals(index.queryBox(0.0, -60.0, 0.01, -59.99), ["large"])
+        self.assertEquals(index.queryBox(x - 0.001, y - 0.001, x + 0.001, y + 0.001), ["small"])
+        self.assertEquals(index.queryBox(100, -10, 101, -9), [])
+    
+    
+    def test_SaveLoad(self):
+        (fd, path) = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.index.save(path)
+            index = fovindex.FootprintIndex.load(path)
+        finally:
+            os.remove(path)
+        self.assertEquals(len(index), len(self.index))
+        self.assertEquals(index.cellsize, self.index.cellsize)
+        for n in range(100):
+            x = self.rnd.uniform(-147.6, -147.4)
+            y = self.rnd.uniform(64.75, 64.85)
+            self.assertEquals(index.queryPoint(x, y), self.index.queryPoint(x, y))
+            self.assertEquals(index.queryBox(x, y, x + 0.01, y + 0.01), self.index.queryBox(x, y, x + 0.01, y + 0.01))
+    
+    
+    def test_Values(self):
+        fp = self.footprints[0]
+        values = []
+        for p in fp.points():
+            values.extend([p.x, p.y])
+        values.extend([fp.width, fp.height])
+        index = fovindex.FootprintIndex()
+        index.addValues(values, "a")
+        self.assertEquals(index.rings[0], self.index.rings[0])
+        self.assertRaises(ValueError, fovindex.FootprintIndex, 0)
+
+
+
+def runtests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestFootprintIndex)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,355 @@
+# File: fovio.py
+# Output formats for footprints.
+#
+# About:
+# Writers used by the batch mode of fovbox. Each writer formats a whole
+# record with a single string formatting operation and writes through a
+# buffer, so output of any size is streamed in constant memory.
+#
+# The binary format is read back with <readBinary>, which memory-maps the
+# file instead of reading it.
+
+#
+# Module: fovio
+#
+# Description:
+# {<TextWriter>} - Tab separated CP, UL, LL, UR, LR, DW and DH columns.
+# {<NdjsonWriter>} - One JSON object per line (NDJSON / JSON Lines).
+# {<GeoJsonWriter>} - A GeoJSON FeatureCollection of footprint polygons.
+# {<BinaryWriter>} - Fixed width records of little-endian float64 values.
+#
+# <WRITERS> maps the format names accepted by fovbox --format to the
+# writer classes.
+#
+
+import struct
+
+
+#
+# Class: FootprintWriter
+#
+# Base class of the writers. A record is the formatted text of one
+# footprint; <format> creates it and is a class method so worker processes
+# can format records without a writer. Records are collected and written to
+# the output every <buffersize> records.
+#
+class FootprintWriter(object):
+    
+    # Text written before the first record, between records and after the
+    # last one.
+    header = ''
+    separator = ''
+    footer = ''
+    
+    # The % template of a record, see <formatValues>.
+    template = None
+    
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # out        - {file} The output, anything with a write method.
+    # buffersize - {int} Number of records buffered between writes.
+    #
+    def __init__(self, out, buffersize=1024):
+        self.out = out
+        self.buffersize = buffersize
+        self.count = 0
+        self.pending = 0
+        self.buffer = [self.header]
+    
+    
+    #
+    # Method: format
+    #
+    # (Class method) Format one footprint.
+    #
+    # Parameters:
+    # fp - {<footprint.Footprint>} The footprint.
+    #
+    # Returns:
+    # {string} The record.
+    #
+    @classmethod
+    def format(cls, fp):
+        (cp, ul, ll, ur, lr) = fp.points()
+        return cls.formatValues((cp.x, cp.y, ul.x, ul.y, ll.x, ll.y,
+                                 ur.x, ur.y, lr.x, lr.y, fp.width, fp.height))
+    
+    
+    #
+    # Method: formatValues
+    #
+    # (Class method) Format one footprint given as its values.
+    #
+    # Parameters:
+    # values - {tuple} The twelve <BINARY_COLUMNS> values of the footprint.
+    #
+    # Returns:
+    # {string} The record.
+    #
+    @classmethod
+    def formatValues(cls, values):
+        return cls.template % values
+    
+    
+    #
+    # Method: write
+    #
+    # Parameters:
+    # fp - {<footprint.Footprint>} The footprint to write.
+    #
+    def write(self, fp):
+        self.writeRecords((self.format(fp),))
+    
+    
+    #
+    # Method: writeRecords
+    #
+    # Parameters:
+    # records - {sequence} Records created by <format>.
+    #
+    def writeRecords(self, records):
+        buffer = self.buffer
+        for record in records:
+            if self.count:
+                buffer.append(self.separator)
+            buffer.append(record)
+            self.count += 1
+            self.pending += 1
+        if self.pending >= self.buffersize:
+            self.flush()
+    
+    
+    #
+    # Method: writeArray
+    #
+    # Parameters:
+    # values - {array} An (N, 12) NumPy array of the <BINARY_COLUMNS> values
+    #          of N footprints, as built from <fovarray.footprints>.
+    #
+    def writeArray(self, values):
+        self.writeRecords(map(self.formatValues, map(tuple, values.tolist())))
+    
+    
+    #
+    # Method: flush
+    #
+    # Write the buffered records to the output.
+    #
+    def flush(self):
+        if self.buffer:
+            self.out.write("".join(self.buffer))
+            self.buffer = []
+            self.pending = 0
+    
+    
+    #
+    # Method: close
+    #
+    # Write the footer and flush. Does not close the output.
+    #
+    def close(self):
+        self.buffer.append(self.footer)
+        self.flush()
+
+
+#
+# Class: TextWriter
+#
+# The tab separated text records of fovbox --batch.
+#
+class TextWriter(FootprintWriter):
+    
+    template = "\t".join(["%.8f"] * 12) + "\n"
+
+
+#
+# Class: NdjsonWriter
+#
+# One JSON object per line with the keys cp, ul, ll, ur and lr ([lon, lat]
+# pairs), dw and dh.
+#
+class NdjsonWriter(FootprintWriter):
+    
+    template = ('{"cp":[%.8f,%.8f],"ul":[%.8f,%.8f],"ll":[%.8f,%.8f],'
+                '"ur":[%.8f,%.8f],"lr":[%.8f,%.8f],"dw":%.8f,"dh":%.8f}\n')
+
+
+#
+# Class: GeoJsonWriter
+#
+# A FeatureCollection with one Polygon feature per footprint. The ring is
+# UL, UR, LR, LL, UL; the center point and the DW and DH values are
+# properties of the feature.
+#
+class GeoJsonWriter(FootprintWriter):
+    
+    header = '{"type":"FeatureCollection","features":[\n'
+    separator = ',\n'
+    footer = '\n]}\n'
+    template = ('{"type":"Feature","geometry":{"type":"Polygon","coordinates":'
+                '[[[%.8f,%.8f],[%.8f,%.8f],[%.8f,%.8f],[%.8f,%.8f],[%.8f,%.8f]]]},'
+                '"properties":{"cp":[%.8f,%.8f],"dw":%.8f,"dh":%.8f}}')
+    
+    
+    @classmethod
+    def formatValues(cls, v):
+        return cls.template % (v[2], v[3], v[6], v[7], v[8], v[9], v[4], v[5],
+                               v[2], v[3], v[0], v[1], v[10], v[11])
+
+
+#
+# Class: BinaryWriter
+#
+# Fixed width binary records of twelve little-endian float64 values, the
+# <BINARY_COLUMNS>. The file has no header, so record i starts at byte
+# i * <BINARY_RECORD_SIZE> and the file can be memory-mapped as an array of
+# shape (N, 12). See <readBinary>.
+#
+class BinaryWriter(FootprintWriter):
+    
+    record = struct.Struct('<12d')
+    
+    
+    @classmethod
+    def formatValues(cls, values):
+        return cls.record.pack(*values)
+    
+    
+    def writeArray(self, values):
+        records = values.astype('<f8').tostring()
+        self.buffer.append(records)
+        self.count += len(values)
+        self.pending += len(values)
+        if self.pending >= self.buffersize:
+            self.flush()
+
+
+#
+# Variable: BINARY_COLUMNS
+#
+# The values of a binary record, in order. Also the order of the values
+# passed to <FootprintWriter.formatValues> and <FootprintWriter.writeArray>.
+#
+BINARY_COLUMNS = ('cp_lon', 'cp_lat', 'ul_lon', 'ul_lat', 'll_lon', 'll_lat',
+                  'ur_lon', 'ur_lat', 'lr_lon', 'lr_lat', 'dw', 'dh')
+
+#
+# Variable: BINARY_RECORD_SIZE
+#
+# The size of a binary record in bytes.
+#
+BINARY_RECORD_SIZE = BinaryWriter.record.size
+
+
+#
+# Class: BinaryRecords
+#
+# Read only sequence of the records of a memory-mapped binary file, used
+# by <readBinary> when NumPy is not available. Records are unpacked from the
+# map when they are accessed.
+#
+class BinaryRecords(object):
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # path - {string} The binary file.
+    #
+    def __init__(self, path):
+        import mmap
+        f = open(path, 'rb')
+        try:
+            f.seek(0, 2)
+            size = f.tell()
+            if size % BINARY_RECORD_SIZE:
+                raise ValueError("%s is not a binary footprint file" % path)
+            self.count = size // BINARY_RECORD_SIZE
+            if size:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.map = None
+        finally:
+            f.close()
+    
+    
+    def __len__(self):
+        return self.count
+    
+    
+    #
+    # Method: __getitem__
+    #
+    # Parameters:
+    # i - {int} The index of the record.
+    #
+    # Returns:
+    # {tuple} The <BINARY_COLUMNS> values of the record.
+    #
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if i < 0 or i >= self.count:
+            raise IndexError("record index out of range")
+        return BinaryWriter.record.unpack_from(self.map, i * BINARY_RECORD_SIZE)
+    
+    
+    def __iter__(self):
+        for i in xrange(self.count):
+            yield self[i]
+    
+    
+    #
+    # Method: close
+    #
+    # Unmap the file.
+    #
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+#
+# Function: readBinary
+#
+# Memory-map a file written by <BinaryWriter>. Nothing is read or copied
+# until records are accessed.
+#
+# Parameters:
+# path - {string} The binary file.
+#
+# Returns:
+# {numpy.memmap} A read only float64 array of shape (N, 12) if NumPy is
+# available, else a <BinaryRecords> sequence of tuples. Row i holds the
+# <BINARY_COLUMNS> of record i either way.
+#
+def readBinary(path):
+    try:
+        import numpy
+    except ImportError:
+        return BinaryRecords(path)
+    
+    dtype = numpy.dtype('<f8')
+    records = BinaryRecords(path)
+    count = len(records)
+    records.close()
+    if not count:
+        return numpy.zeros((0, len(BINARY_COLUMNS)), dtype)
+    return numpy.memmap(path, dtype, 'r', shape=(count, len(BINARY_COLUMNS)))
+
+
+#
+# Variable: WRITERS
+#
+# The writer class of each output format name.
+#
+WRITERS = {
+    'text': TextWriter,
+    'ndjson': NdjsonWriter,
+    'geojson': GeoJsonWriter,
+    'binary': BinaryWriter,
+    }
@@ -0,0 +1,125 @@
+import fovbox
+import fovio
+import footprint
+import json
+import os
+import tempfile
+import unittest
+from StringIO import StringIO
+
+POSES = "-147.5,64.8,1000,30,30,20\n12.25,-45.5,250,40,20\nbad,1,1,1,1,1\n"
+
+class TestWriters(unittest.TestCase):
+    """
+    Class: TestWriters
+    
+    Description:
+    The unit test cases for testing that the output formats hold the same
+    footprints and are valid JSON.
+    """
+    
+    def setUp(self):
+        self.fps = [footprint.compute_footprint("-147.5", "64.8", "1000", "30", "30", "20"),
+                    footprint.compute_footprint("12.25", "-45.5", "250", "40", "20")]
+    
+    
+    def assertPoint(self, pair, point):
+        self.assertAlmostEquals(pair[0], point.x, 8)
+        self.assertAlmostEquals(pair[1], point.y, 8)
+    
+    
+    def test_Ndjson(self):
+        out = StringIO()
+        self.assertEquals(fovbox.run_batch(StringIO(POSES), out, format='ndjson'), 1)
+        lines = out.getvalue().splitlines()
+        self.assertEquals(len(lines), 2)
+        for line, fp in zip(lines, self.fps):
+            record = json.loads(line)
+            for key, point in zip(('cp', 'ul', 'll', 'ur', 'lr'), fp.points()):
+                self.assertPoint(record[key], point)
+            self.assertAlmostEquals(record['dw'], fp.width, 8)
+            self.assertAlmostEquals(record['dh'], fp.height, 8)
+    
+    
+    def test_GeoJson(self):
+        out = StringIO()
+        fovbox.run_batch(StringIO(POSES), out, format='geojson')
+        collection = json.loads(out.getvalue())
+        self.assertEquals(collection['type'], 'FeatureCollection')
+        self.assertEquals(len(collection['features']), 2)
+        for feature, fp in zip(collection['features'], self.fps):
+            ring = feature['geometry']['coordinates'][0]
+            self.assertEquals(len(ring), 5)
+            self.assertEquals(ring[0], ring[-1])
+            for pair, point in zip(ring, (fp.ul, fp.ur, fp.lr, fp.ll)):
+                self.assertPoint(pair, point)
+            self.assertPoint(feature['properties']['cp'], fp.cp)
+            self.assertAlmostEquals(feature['properties']['dw'], fp.width, 8)
+    
+    
+    def test_Empty(self):
+        out = StringIO()
+        fovbox.run_batch(StringIO(""), out, format='geojson')
+        self.assertEquals(json.loads(out.getvalue())['features'], [])
+    
+    
+    def test_Binary(self):
+        out = StringIO()
+        fovbox.run_batch(StringIO(POSES), out, format='binary')
+        text = StringIO()
+        fovbox.run_batch(StringIO(POSES), text)
+        self.assertEquals(len(out.getvalue()), 2 * fovio.BINARY_RECORD_SIZE)
+        
+        (fd, path) = tempfile.mkstemp()
+        try:
+            os.write(fd, out.getvalue())
+            os.close(fd)
+            expected = [[float(v) for v in l.split("\t")] for l in text.getvalue().splitlines()]
+            records = fovio.BinaryRecords(path)
+            self.assertEquals(len(records), 2)
+            for record, values in zip(records, expected):
+                for a, b in zip(record, values):
+                    self.assertAlmostEquals(a, b, 8)
+            self.assertEquals(records[-1], records[1])
+            self.assertRaises(IndexError, records.__getitem__, 2)
+            records.close()
+            
+            try:
+                import numpy
+            except ImportError:
+                return
+            array = fovio.readBinary(path)
+            self.assertEquals(array.shape, (2, len(fovio.BINARY_COLUMNS)))
+            self.assertEquals([tuple(row) for row in array], list(fovio.BinaryRecords(path)))
+            del array
+        finally:
+            os.remove(path)
+    
+    
+    def test_Buffered(self):
+        out = StringIO()
+        writer = fovio.NdjsonWriter(out, buffersize=4)
+        for i in range(3):
+            writer.write(self.fps[0])
+        self.assertEquals(out.getvalue(), "")
+        writer.write(self.fps[0])
+        writer.write(self.fps[1])
+        self.assertEquals(len(out.getvalue().splitlines()), 4)
+        writer.close()
+        self.assertEquals(len(out.getvalue().splitlines()), 5)
+    
+    
+    def test_Parallel(self):
+        lines = "".join(["%s,64.8,%s,30,20,%s\n" % (-147.5 + i * 0.01, 100 + i, i % 360) for i in range(100)])
+        for name in fovio.WRITERS:
+            out = StringIO()
+            fovbox.run_batch(StringIO(lines), out, jobs=2, chunksize=16, format=name)
+            expected = StringIO()
+            fovbox.run_batch(StringIO(lines), expected, format=name)
+            self.assertEquals(out.getvalue(), expected.getvalue())
+
+
+
+def runtests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestWriters)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,322 @@
+# File: fovserver.py
+# Long running footprint server.
+#
+# About:
+# Keeps one process with everything imported and compiled, and answers
+# footprint queries over a socket, so interactive clients do not pay for
+# process startup on every query.
+
+#
+# Module: fovserver
+#
+# Description:
+# A single threaded asyncore server on a TCP or Unix socket. Clients send
+# one JSON object per line and get one JSON object per line back, in the
+# same order. Requests can be pipelined (sent without waiting for the
+# replies) and any number of clients can be connected at once.
+#
+# Request:
+#     {"id": 1, "lon": -147.5, "lat": 64.8, "alt": 1000, "fov": 30,
+#      "azimuth": 20, "units": "m", "angle": "d"}
+#
+# "fovx" and "fovy" can be given instead of "fov". "id", "azimuth",
+# "units", "angle", "model" (the earth model, sphere or an ellipsoid such
+# as wgs84) and the tilt of the camera, "pitch", "roll" and "range" (see
+# footprint.parse_tilt), are optional. The reply is
+#
+#     {"id": 1, "cp": [lon, lat], "ul": [...], "ll": [...], "ur": [...],
+#      "lr": [...], "dw": width, "dh": height}
+#
+# or {"id": 1, "error": "message"} for an invalid request. The request
+# {"stats": true} returns the <LatencyStats> of the server. A request
+# longer than <MAX_REQUEST> bytes is discarded and answered with an error.
+#
+
+import asynchat
+import asyncore
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+
+from footprint import compute_footprint
+
+#
+# Constants:
+# MAX_REQUEST - the longest request line in bytes a client can send.
+#
+MAX_REQUEST = 1 << 16
+
+
+#
+# Class: LatencyStats
+#
+# Per-request latency statistics. Count, mean, min and max cover every
+# request; percentiles cover the last <window> requests.
+#
+class LatencyStats(object):
+    
+    
+    def __init__(self, window=10000):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.window = deque(maxlen=window)
+    
+    
+    #
+    # Method: add
+    #
+    # Parameters:
+    # seconds - {float} The latency of one request.
+    # error   - {boolean} Whether the request failed.
+    #
+    def add(self, seconds, error=False):
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+        self.window.append(seconds)
+    
+    
+    #
+    # Method: summary
+    #
+    # Returns:
+    # {dict} count, errors, and the mean, min, max, p50, p90 and p99
+    # latencies in microseconds.
+    #
+    def summary(self):
+        result = {'count': self.count, 'errors': self.errors}
+        if not self.count:
+            return result
+        
+        ordered = sorted(self.window)
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1e6
+        
+        result.update({
+            'mean_us': self.total / self.count * 1e6,
+            'min_us': self.min * 1e6,
+            'max_us': self.max * 1e6,
+            'p50_us': percentile(0.50),
+            'p90_us': percentile(0.90),
+            'p99_us': percentile(0.99),
+            })
+        return result
+
+
+#
+# Function: handle_request
+#
+# Answer one request.
+#
+# Parameters:
+# request - {dict} The decoded request.
+#
+# Returns:
+# {dict} The reply.
+#
+# Raises:
+# ValueError or KeyError if the request is invalid, or TypeError and
+# AttributeError for fields of the wrong JSON type.
+#
+def handle_request(request):
+    if not isinstance(request, dict):
+        raise ValueError("Request must be a JSON object")
+    
+    fovx = request.get('fovx', request.get('fov'))
+    fovy = request.get('fovy', request.get('fov'))
+    if fovx is None or fovy is None:
+        raise ValueError("Must pass in fov or fovx and fovy")
+    for field in ('units', 'angle'):
+        if not isinstance(request.get(field, ''), basestring):
+            raise ValueError("Invalid option for %s: %s" % (field, request[field]))
+    
+    fp = compute_footprint(request['lon'], request['lat'], request['alt'],
+                           fovx, fovy, request.get('azimuth', 0.0),
+                           request.get('units', 'm'), request.get('angle', 'd'),
+                           model=request.get('model'), pitch=request.get('pitch'),
+                           roll=request.get('roll'), max_range=request.get('range'))
+    return {
+        'id': request.get('id'),
+        'cp': [fp.cp.x, fp.cp.y],
+        'ul': [fp.ul.x, fp.ul.y],
+        'll': [fp.ll.x, fp.ll.y],
+        'ur': [fp.ur.x, fp.ur.y],
+        'lr': [fp.lr.x, fp.lr.y],
+        'dw': fp.width,
+        'dh': fp.height,
+        }
+
+
+#
+# Class: FootprintHandler
+#
+# One client connection. Reads newline terminated requests and pushes the
+# replies in order.
+#
+class FootprintHandler(asynchat.async_chat):
+    
+    
+    def __init__(self, sock, server, map=None):
+        asynchat.async_chat.__init__(self, sock, map=map)
+        self.server = server
+        self.buffer = []
+        self.size = 0
+        self.overflow = False
+        self.set_terminator("\n")
+    
+    
+    # Requests longer than MAX_REQUEST are dropped as they arrive, so a
+    # client cannot grow the buffer without limit.
+    def collect_incoming_data(self, data):
+        self.size += len(data)
+        if self.size > MAX_REQUEST:
+            self.buffer = []
+            self.overflow = True
+        else:
+            self.buffer.append(data)
+    
+    
+    def found_terminator(self):
+        line = "".join(self.buffer).strip()
+        overflow = self.overflow
+        self.buffer = []
+        self.size = 0
+        self.overflow = False
+        if overflow:
+            self.push(json.dumps({'error': "Request longer than %d bytes" % MAX_REQUEST}) + "\n")
+            self.server.stats.add(0.0, True)
+            return
+        if not line:
+            return
+        
+        start = time.time()
+        request = None
+        error = False
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict) and request.get('stats'):
+                reply = self.server.stats.summary()
+                reply['id'] = request.get('id')
+            else:
+                reply = handle_request(request)
+        except (ValueError, KeyError, TypeError, AttributeError), e:
+            if isinstance(e, KeyError):
+                message = "Missing field: %s" % e.args[0]
+            else:
+                message = str(e)
+            error = True
+            reply = {'error': message}
+            if isinstance(request, dict):
+                reply['id'] = request.get('id')
+        
+        self.push(json.dumps(reply) + "\n")
+        self.server.stats.add(time.time() - start, error)
+
+
+#
+# Class: FootprintServer
+#
+# Listening socket that creates a <FootprintHandler> per client.
+#
+class FootprintServer(asyncore.dispatcher):
+    
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # address - {tuple or string} A (host, port) tuple for TCP or a path for
+    #           a Unix socket. An existing socket file at the path is
+    #           replaced.
+    # map     - {dict} Optional asyncore socket map.
+    #
+    def __init__(self, address, map=None):
+        asyncore.dispatcher.__init__(self, map=map)
+        self.map = map
+        self.stats = LatencyStats()
+        
+        if isinstance(address, tuple):
+            self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.set_reuse_addr()
+        else:
+            self.create_socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            if os.path.exists(address):
+                os.unlink(address)
+        self.bind(address)
+        self.address = self.socket.getsockname()
+        self.listen(128)
+    
+    
+    def handle_accept(self):
+        pair = self.accept()
+        if pair is not None:
+            FootprintHandler(pair[0], self, self.map)
+    
+    
+    def handle_close(self):
+        self.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+#
+# Function: parse_address
+#
+# Parameters:
+# address - {string} unix:PATH, a path containing a slash, HOST:PORT or
+#           :PORT (localhost).
+#
+# Returns:
+# {tuple or string} The address for <FootprintServer>.
+#
+def parse_address(address):
+    if address.startswith('unix:'):
+        return address[5:]
+    if '/' in address:
+        return address
+    
+    (host, sep, port) = address.rpartition(':')
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError("Invalid address: %s" % address)
+    return (host or '127.0.0.1', port)
+
+
+#
+# Function: serve
+#
+# Run a <FootprintServer> until interrupted or terminated, then write its
+# latency statistics to stderr.
+#
+# Parameters:
+# address - {string} See <parse_address>.
+#
+def serve(address):
+    server = FootprintServer(parse_address(address))
+    sys.stderr.write("fovbox: serving on %s\n" % (server.address,))
+    
+    def terminate(signum, frame):
+        raise KeyboardInterrupt()
+    signal.signal(signal.SIGTERM, terminate)
+    
+    try:
+        try:
+            asyncore.loop(timeout=1.0)
+        except KeyboardInterrupt:
+            pass
+    finally:
+        server.handle_close()
+        sys.stderr.write("fovbox: %s\n" % json.dumps(server.stats.summary(), sort_keys=True))
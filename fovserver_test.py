@@ -0,0 +1,105 @@
+import fovserver
+import asyncore
+import json
+import socket
+import threading
+import unittest
+
+class TestServer(unittest.TestCase):
+    """
+    Class: TestServer
+    
+    Description:
+    The unit test cases for testing that the footprint server answers
+    pipelined requests in order for concurrent clients.
+    """
+    
+    def setUp(self):
+        self.map = {}
+        self.server = fovserver.FootprintServer(('127.0.0.1', 0), self.map)
+        self.thread = threading.Thread(target=asyncore.loop,
+                                       kwargs={'timeout': 0.05, 'map': self.map})
+        self.thread.start()
+    
+    
+    def tearDown(self):
+        for channel in self.map.values():
+            channel.close()
+        self.thread.join()
+    
+    
+    def query(self, requests):
+        sock = socket.create_connection(self.server.address)
+        try:
+            sock.sendall("".join([json.dumps(r) + "\n" for r in requests]))
+            f = sock.makefile()
+            return [json.loads(f.readline()) for r in requests]
+        finally:
+            sock.close()
+    
+    
+    def test_Pipelined(self):
+        requests = [{"id": i, "lon": -147.5, "lat": 64.8, "alt": 1000 + i, "fov": 30, "azimuth": 20}
+                    for i in range(20)]
+        requests.insert(5, {"id": "bad", "lon": -147.5})
+        replies = self.query(requests)
+        self.assertEquals([r.get('id') for r in replies], [r['id'] for r in requests])
+        self.assertEquals(replies[5]['error'], "Must pass in fov or fovx and fovy")
+        self.assertEquals("%.8f" % replies[0]['ul'][0], "-147.50338239")
+        self.assertEquals("%.8f" % replies[0]['dw'], "535.89838486")
+    
+    
+    def test_Invalid(self):
+        requests = [{"id": 1, "lon": -147.5, "lat": 64.8, "alt": 1000, "fov": 30, "units": 5},
+                    {"id": 2, "lon": -147.5, "lat": 64.8, "alt": 1000, "fov": 30, "angle": ["d"]},
+                    {"id": 3, "lon": -147.5, "lat": 64.8, "alt": 1000, "fov": 30},
+                    {"id": 4, "lon": -147.5, "lat": 64.8, "alt": 1000, "fov": 30, "model": 5}]
+        replies = self.query(requests)
+        self.assertEquals(replies[0], {"id": 1, "error": "Invalid option for units: 5"})
+        self.assert_('error' in replies[1])
+        self.assertEquals(replies[2]['id'], 3)
+        self.assertEquals(replies[3], {"id": 4, "error": "Invalid option for model: 5"})
+        
+        # an overlong line is answered with an error and the connection
+        # keeps serving
+        sock = socket.create_connection(self.server.address)
+        try:
+            sock.sendall(" " * (fovserver.MAX_REQUEST + 10) + "x\n" + json.dumps(requests[2]) + "\n")
+            f = sock.makefile()
+            self.assert_('error' in json.loads(f.readline()))
+            self.assertEquals(json.loads(f.readline())['id'], 3)
+        finally:
+            sock.close()
+    
+    
+    def test_Concurrent(self):
+        clients = [socket.create_connection(self.server.address) for i in range(5)]
+        try:
+            for i, sock in enumerate(clients):
+                sock.sendall(json.dumps({"id": i, "lon": i, "lat": 0, "alt": 10, "fov": 10}) + "\n")
+            for i, sock in reversed(list(enumerate(clients))):
+                reply = json.loads(sock.makefile().readline())
+                self.assertEquals(reply['id'], i)
+                self.assertEquals(reply['cp'], [i, 0])
+        finally:
+            for sock in clients:
+                sock.close()
+        
+        stats = self.query([{"stats": True}])[0]
+        self.assertEquals(stats['count'], 5)
+        self.assertEquals(stats['errors'], 0)
+        self.assert_(stats['max_us'] >= stats['p50_us'] >= stats['min_us'])
+    
+    
+    def test_Address(self):
+        self.assertEquals(fovserver.parse_address(":8000"), ('127.0.0.1', 8000))
+        self.assertEquals(fovserver.parse_address("0.0.0.0:80"), ('0.0.0.0', 80))
+        self.assertEquals(fovserver.parse_address("unix:fov.sock"), "fov.sock")
+        self.assertEquals(fovserver.parse_address("/tmp/fov.sock"), "/tmp/fov.sock")
+        self.assertRaises(ValueError, fovserver.parse_address, "localhost")
+
+
+
+def runtests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestServer)
+    unittest.TextTestRunner(verbosity=2).run(suite)
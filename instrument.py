@@ -0,0 +1,181 @@
+# File: instrument.py
+# Stage timers, counters and debug output for fovbox.
+#
+# About:
+# Instrumentation costs nothing while it is disabled: the hot functions are
+# not wrapped and nothing is formatted. <enable> replaces the functions of
+# each stage in <STAGES> by timing wrappers, and <disable> puts the
+# originals back.
+
+import sys
+
+#
+# Module: instrument
+#
+# Description:
+# {<enable>} - Start timing the stages and collecting counters.
+# {<disable>} - Stop and restore the original functions.
+# {<count>} - Add to a counter.
+# {<debug>} - Print a message while enabled, formatting it only then.
+# {<report>} - Write the timers and counters.
+#
+# Example:
+#     instrument.enable()
+#     fovbox.run_batch(f, out)
+#     instrument.report(sys.stderr)
+#
+
+#
+# Variable: ENABLED
+#
+# True while instrumentation is enabled. Callers that have to compute the
+# arguments of <debug> or <count> check it first.
+#
+ENABLED = False
+
+#
+# Variable: STAGES
+#
+# (stage, module, owner, attribute) of the functions that are timed. The
+# owner is a module level name in the module, or None for the module
+# itself. Several functions may count towards one stage.
+#
+STAGES = [
+    ('parse', 'footprint', None, 'parse_pose'),
+    ('parse', 'fovarray', None, '_parse_chunk'),
+    ('waypoint', 'footprint', None, 'footprint_edges'),
+    ('rotate', 'coordinate', 'Point', 'rotatePoints'),
+    ('footprints', 'fovarray', None, 'footprints'),
+    ('format', 'fovio', 'FootprintWriter', 'format'),
+    ('format', 'fovio', 'FootprintWriter', 'writeArray'),
+    ('format', 'fovio', 'BinaryWriter', 'writeArray'),
+    ('write', 'fovio', 'FootprintWriter', 'flush'),
+    ]
+
+# stage -> [calls, seconds, active]
+timers = {}
+
+# name -> value
+counters = {}
+
+# (owner, attribute, original) of the installed wrappers.
+_installed = []
+
+
+#
+# Function: enable
+#
+# Wrap the functions of <STAGES> with timers. Stages in modules that cannot
+# be imported (fovarray without NumPy) are left out.
+#
+def enable():
+    global ENABLED
+    if ENABLED:
+        return
+    for stage, module, owner, attribute in STAGES:
+        try:
+            target = __import__(module)
+        except ImportError:
+            continue
+        if owner is not None:
+            target = getattr(target, owner)
+        original = vars(target)[attribute]
+        setattr(target, attribute, _wrap(stage, original))
+        _installed.append((target, attribute, original))
+    ENABLED = True
+
+
+#
+# Function: disable
+#
+# Restore the original functions. The timers and counters are kept.
+#
+def disable():
+    global ENABLED
+    while _installed:
+        (target, attribute, original) = _installed.pop()
+        setattr(target, attribute, original)
+    ENABLED = False
+
+
+#
+# Function: reset
+#
+# Clear the timers and counters.
+#
+def reset():
+    for stats in timers.values():
+        stats[:2] = [0, 0.0]
+    counters.clear()
+
+
+#
+# Function: count
+#
+# Add `n' to the counter `name' while enabled.
+#
+def count(name, n=1):
+    if ENABLED:
+        counters[name] = counters.get(name, 0) + n
+
+
+#
+# Function: debug
+#
+# Write `message' % `args' to stderr while enabled. The message is only
+# formatted then.
+#
+def debug(message, *args):
+    if ENABLED:
+        if args:
+            message = message % args
+        sys.stderr.write("%s\n" % message)
+
+
+#
+# Function: report
+#
+# Write the calls, total time and time per call of each stage that was
+# called and the counters to `out'.
+#
+def report(out=sys.stderr):
+    out.write("%-12s %10s %12s %12s\n" % ("stage", "calls", "total ms", "us/call"))
+    for stage in sorted(timers):
+        (calls, seconds) = timers[stage][:2]
+        if not calls:
+            continue
+        out.write("%-12s %10d %12.3f %12.3f\n" % (
+            stage, calls, seconds * 1e3, calls and seconds / calls * 1e6 or 0.0))
+    for name in sorted(counters):
+        out.write("%-12s %10s\n" % (name, counters[name]))
+
+
+def _wrap(stage, original):
+    if isinstance(original, classmethod):
+        return classmethod(_timed(stage, original.__func__))
+    if isinstance(original, staticmethod):
+        return staticmethod(_timed(stage, original.__func__))
+    return _timed(stage, original)
+
+
+def _timed(stage, func):
+    from timeit import default_timer as clock
+    stats = timers.setdefault(stage, [0, 0.0, False])
+    
+    # Calls made while the stage is already being timed (recursion, or one
+    # function of the stage calling another) are part of the outer call.
+    def timed(*args, **kwargs):
+        if stats[2]:
+            return func(*args, **kwargs)
+        stats[2] = True
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats[0] += 1
+            stats[1] += clock() - start
+            stats[2] = False
+    
+    timed.__name__ = func.__name__
+    timed.__doc__ = func.__doc__
+    return timed
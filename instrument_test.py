@@ -0,0 +1,67 @@
+import footprint
+import fovbox
+import instrument
+import unittest
+from StringIO import StringIO
+
+class TestInstrument(unittest.TestCase):
+    """
+    Class: TestInstrument
+    
+    Description:
+    The unit test cases for testing that instrumentation only wraps the
+    stage functions while enabled and counts their calls.
+    """
+    
+    def setUp(self):
+        self.parse_pose = footprint.parse_pose
+        instrument.reset()
+    
+    
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+    
+    
+    def test_Disabled(self):
+        self.assert_(footprint.parse_pose is self.parse_pose)
+        fovbox.run_batch(StringIO("-147.5,64.8,1000,30,30,20\n"), StringIO())
+        self.assertEquals(sum([stats[0] for stats in instrument.timers.values()]), 0)
+        self.assertEquals(instrument.counters, {})
+    
+    
+    def test_Enabled(self):
+        instrument.enable()
+        self.assert_(footprint.parse_pose is not self.parse_pose)
+        out = StringIO()
+        fovbox.run_batch(StringIO("-147.5,64.8,1000,30,30,20\n12,45,100,20,20\nbad,1,1,1,1,1\n"), out)
+        for stage in ('parse', 'waypoint', 'rotate', 'format', 'write'):
+            self.assert_(instrument.timers[stage][0] > 0, stage)
+        self.assertEquals(instrument.timers['parse'][0], 3)
+        self.assertEquals(instrument.timers['rotate'][0], 2)
+        self.assertEquals(instrument.counters, {'records': 2, 'errors': 1})
+        
+        report = StringIO()
+        instrument.report(report)
+        self.assert_("rotate" in report.getvalue())
+        
+        instrument.disable()
+        self.assert_(footprint.parse_pose is self.parse_pose)
+        expected = StringIO()
+        fovbox.run_batch(StringIO("-147.5,64.8,1000,30,30,20\n12,45,100,20,20\nbad,1,1,1,1,1\n"), expected)
+        self.assertEquals(out.getvalue(), expected.getvalue())
+    
+    
+    def test_Debug(self):
+        class Unformattable(object):
+            def __str__(self):
+                raise AssertionError("formatted while disabled")
+        instrument.debug("%s", Unformattable())
+        instrument.count('calls')
+        self.assertEquals(instrument.counters, {})
+
+
+
+def runtests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestInstrument)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+"""
+Run the benchmark suite and compare it against a stored baseline.
+
+    runbench.py [-o results.json] [-b baseline.json] [-t 0.25]
+
+Every benchmark reports microseconds per operation (lower is better); batch
+benchmarks report microseconds per pose. With --baseline the run fails
+(exit status 1) if any benchmark is slower than the baseline by more than
+the threshold. Startup benchmarks time a one-shot fovbox.py run in a fresh
+interpreter and also fail the run when over STARTUP_TARGET.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from optparse import OptionParser
+
+import coordinate_bench
+
+# Default allowed slowdown against the baseline, as a fraction.
+THRESHOLD = 0.25
+
+# Coordinate parsing, one entry per notation.
+PARSE_BENCHMARKS = [
+    ("parse dd", "-64.12347874"),
+    ("parse dd hemisphere", "N 89.1234"),
+    ("parse dms", "44D 10M 32.123S S"),
+    ("parse dms compact", "-22d33m44.444444s"),
+    ("parse colon", "11:22:33.333N"),
+    ("parse invalid", "not a coordinate"),
+    ]
+
+FOOTPRINT_SETUP = """
+import footprint
+tracker = footprint.FootprintTracker(30, 20)
+tracker.update(-147.5, 64.8, 1000.0, 0.0)
+azimuths = [i * 0.5 for i in range(720)]
+i = [0]
+"""
+
+FOOTPRINT_BENCHMARKS = [
+    ("compute_footprint", "footprint.compute_footprint(-147.5, 64.8, 1000, 30, 20, 20)"),
+    ("compute_footprint(wgs84)", "footprint.compute_footprint(-147.5, 64.8, 1000, 30, 20, 20, model='wgs84')"),
+    ("compute_footprint(tilted)", "footprint.compute_footprint(-147.5, 64.8, 1000, 30, 20, 20, pitch=40, roll=-5)"),
+    ("compute_footprint(dms)", "footprint.compute_footprint('147d 30m 0s W', '64d 48m 0s N', 1000, 30, 20, 20)"),
+    ("FootprintTracker(azimuth)", "i[0] = (i[0] + 1) % 720; tracker.update(-147.5, 64.8, 1000.0, azimuths[i[0]])"),
+    ]
+
+# Poses of the batch benchmarks.
+BATCH_POSES = 20000
+
+# Footprints in the index benchmark, and the area their centers fall in.
+INDEX_POSES = 50000
+INDEX_BBOX = (-150.0, 63.0, -145.0, 66.0)
+
+# Point queries per index benchmark run; the full scan runs a tenth of them.
+INDEX_QUERIES = 1000
+
+# One-shot command lines of the startup benchmarks, run as fovbox.py ARGS.
+STARTUP_BENCHMARKS = [
+    ("startup", ["--lon", "-147.5", "--lat", "64.8", "--alt", "1000", "--fov", "30", "--azi", "20"]),
+    ("startup(dms)", ["--lon", "147d 30m 0s W", "--lat", "64d 48m 0s N", "--alt", "1000", "--fov", "30", "--azi", "20"]),
+    ]
+
+# Startup runs per benchmark; the best one is reported.
+STARTUP_RUNS = 20
+
+# Microseconds from process start to the first output not to exceed.
+STARTUP_TARGET = 30000.0
+
+
+def scalarbench(number):
+    """
+    Returns a list of (name, microseconds per call) of the scalar
+    benchmarks.
+    """
+    results = []
+    for name, stmt in coordinate_bench.BENCHMARKS:
+        results.append((name, coordinate_bench.bench(stmt, number=number)))
+    
+    for name, coord in PARSE_BENCHMARKS:
+        stmt = "coordinate.Coordinate(%r, 'Lat')" % coord
+        results.append((name, coordinate_bench.bench(stmt, number=number)))
+    
+    for name, stmt in FOOTPRINT_BENCHMARKS:
+        results.append((name, coordinate_bench.bench(stmt, FOOTPRINT_SETUP, number=number // 4)))
+    return results
+
+
+def batchbench(poses=BATCH_POSES):
+    """
+    Returns a list of (name, microseconds per pose) of the batch paths over
+    a synthetic pose file.
+    """
+    import fovbox
+    import fovbox_bench
+    
+    (fd, path) = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    null = open(os.devnull, 'wb')
+    results = []
+    try:
+        fovbox_bench.make_poses(path, poses, poses)
+        
+        def run_batch(format):
+            f = open(path)
+            try:
+                fovbox.run_batch(f, null, format=format)
+            finally:
+                f.close()
+        
+        benchmarks = [("run_batch(text)", lambda: run_batch('text')),
+                      ("run_batch(binary)", lambda: run_batch('binary'))]
+        try:
+            import fovarray
+        except ImportError:
+            fovarray = None
+        if fovarray is not None:
+            benchmarks.extend([
+                ("run_batch_mmap(text)", lambda: fovbox.run_batch_mmap(path, null, format='text')),
+                ("run_batch_mmap(binary)", lambda: fovbox.run_batch_mmap(path, null, format='binary')),
+                ("run_batch_mmap(wgs84)", lambda: fovbox.run_batch_mmap(path, null, format='binary', model='wgs84')),
+                ("run_batch_mmap(tilted)", lambda: fovbox.run_batch_mmap(path, null, format='binary', tilt=(40.0, -5.0, None)))])
+        
+        for name, func in benchmarks:
+            t = min(timeit.repeat(func, repeat=coordinate_bench.REPEAT, number=1))
+            results.append((name, t / poses * 1e6))
+    finally:
+        null.close()
+        os.remove(path)
+    return results
+
+
+def terrainbench(poses=BATCH_POSES):
+    """
+    Returns a list of (name, microseconds per pose) of the --mmap batch path
+    with and without a DEM, over poses inside a synthetic DEM. Empty without
+    NumPy.
+    """
+    try:
+        import terrain
+    except ImportError:
+        return []
+    import fovbox
+    import fovbox_bench
+    
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'poses.csv')
+    base = os.path.join(directory, 'dem')
+    null = open(os.devnull, 'wb')
+    results = []
+    dem = None
+    try:
+        bbox = fovbox_bench.make_dem(base)
+        fovbox_bench.make_poses(path, poses, poses, bbox)
+        dem = terrain.Dem(base)
+        dem.bounds()
+        
+        benchmarks = [("run_batch_mmap(flat)", lambda: fovbox.run_batch_mmap(path, null, format='binary')),
+                      ("run_batch_mmap(dem)", lambda: fovbox.run_batch_mmap(path, null, format='binary', dem=dem))]
+        for name, func in benchmarks:
+            t = min(timeit.repeat(func, repeat=coordinate_bench.REPEAT, number=1))
+            results.append((name, t / poses * 1e6))
+    finally:
+        null.close()
+        dem = None
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+    return results
+
+
+def indexbench(poses=INDEX_POSES, queries=INDEX_QUERIES):
+    """
+    Returns a list of (name, microseconds per query) of point queries on a
+    FootprintIndex of `poses' random footprints, and of the same queries
+    answered by testing every footprint. Empty without NumPy.
+    """
+    try:
+        import fovarray
+    except ImportError:
+        return []
+    import random
+    import fovindex
+    
+    rnd = random.Random(1)
+    (west, south, east, north) = INDEX_BBOX
+    columns = zip(*[(rnd.uniform(west, east), rnd.uniform(south, north),
+                     rnd.uniform(0.0, 5000.0), rnd.uniform(1.0, 90.0),
+                     rnd.uniform(1.0, 90.0), rnd.uniform(0.0, 360.0)) for i in xrange(poses)])
+    corners = fovarray.footprints(*columns)[0]
+    index = fovindex.FootprintIndex()
+    for ring in corners[:, [fovarray.UL, fovarray.UR, fovarray.LR, fovarray.LL]].tolist():
+        index.addPolygon(ring)
+    points = [(rnd.uniform(west, east), rnd.uniform(south, north)) for i in xrange(queries)]
+    
+    def query():
+        for (x, y) in points:
+            index.queryPoint(x, y)
+    
+    def scan():
+        rings = index.rings
+        for (x, y) in points[:max(queries // 10, 1)]:
+            [i for (i, (minx, miny, maxx, maxy)) in enumerate(index.boxes)
+             if minx <= x <= maxx and miny <= y <= maxy and fovindex._contains(rings[i], x, y)]
+    
+    results = []
+    for name, func, count in [("FootprintIndex.queryPoint", query, queries),
+                              ("FootprintIndex scan", scan, max(queries // 10, 1))]:
+        t = min(timeit.repeat(func, repeat=coordinate_bench.REPEAT, number=1))
+        results.append((name, t / count * 1e6))
+    return results
+
+
+def startupbench(runs=STARTUP_RUNS):
+    """
+    Returns a list of (name, microseconds) of the startup benchmarks, the
+    best wall time of `runs' fresh interpreters running fovbox.py to its
+    output.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fovbox.py")
+    devnull = open(os.devnull, 'w')
+    results = []
+    try:
+        for name, args in STARTUP_BENCHMARKS:
+            best = None
+            for i in range(runs):
+                start = timeit.default_timer()
+                subprocess.check_call([sys.executable, script] + args, stdout=devnull)
+                elapsed = timeit.default_timer() - start
+                if best is None or elapsed < best:
+                    best = elapsed
+            results.append((name, best * 1e6))
+    finally:
+        devnull.close()
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Compare `results' to `baseline', both dicts of name -> microseconds.
+    
+    Returns a list of (name, result, baseline value or None, ratio or None,
+    regressed) in the order of the sorted names of `results'.
+    """
+    rows = []
+    for name in sorted(results):
+        value = results[name]
+        base = baseline.get(name)
+        if base:
+            ratio = value / base
+            rows.append((name, value, base, ratio, ratio > 1.0 + threshold))
+        else:
+            rows.append((name, value, None, None, False))
+    return rows
+
+
+def missing(results, baseline):
+    """
+    Returns the sorted names in `baseline' that are not in `results', e.g.
+    benchmarks that were renamed, dropped or skipped for a missing module.
+    """
+    return sorted([name for name in baseline if name not in results])
+
+
+def mainfunc():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option("-o", "--output", dest="output", help="Write the results to OUTPUT as JSON. Use the file as a later --baseline.")
+    parser.add_option("-b", "--baseline", dest="baseline", help="Compare the results with the JSON file BASELINE.")
+    parser.add_option("-t", "--threshold", dest="threshold", type="float", default=THRESHOLD, help="Allowed slowdown against the baseline as a fraction. Default is %s." % THRESHOLD)
+    parser.add_option("-n", "--number", dest="number", type="int", default=coordinate_bench.NUMBER, help="Calls per scalar benchmark run. Default is %s." % coordinate_bench.NUMBER)
+    parser.add_option("--allow-missing", dest="allow_missing", action="store_true", default=False, help="Do not fail when benchmarks of the baseline are missing from the results.")
+    parser.add_option("--runs", dest="runs", type="int", default=STARTUP_RUNS, help="Runs per startup benchmark. Default is %s." % STARTUP_RUNS)
+    parser.add_option("--poses", dest="poses", type="int", default=BATCH_POSES, help="Poses per batch benchmark run. Default is %s." % BATCH_POSES)
+    (options, args) = parser.parse_args()
+    
+    if options.runs < 1:
+        parser.error("Invalid runs: %s. Runs must be a positive integer." % options.runs)
+    
+    if options.threshold < 0:
+        parser.error("Invalid threshold: %s. Threshold cannot be negative." % options.threshold)
+    
+    baseline = None
+    if options.baseline:
+        try:
+            f = open(options.baseline)
+            try:
+                baseline = json.load(f)["results"]
+            finally:
+                f.close()
+        except (IOError, ValueError, KeyError), e:
+            parser.error("Cannot read baseline: %s" % e)
+    
+    startup = startupbench(options.runs)
+    results = dict(scalarbench(options.number) + batchbench(options.poses) + terrainbench(options.poses) + indexbench() + startup)
+    
+    regressions = 0
+    for name, value, base, ratio, regressed in compare(results, baseline or {}, options.threshold):
+        if base is None:
+            print "%-28s %12.3f us" % (name, value)
+        else:
+            print "%-28s %12.3f us %12.3f us %+7.1f%%%s" % (
+                name, value, base, (ratio - 1.0) * 100, regressed and "  REGRESSION" or "")
+            regressions += regressed
+    
+    absent = missing(results, baseline or {})
+    for name in absent:
+        print "%-28s %12s    %12.3f us  MISSING" % (name, "-", baseline[name])
+    
+    slow = [name for name, value in startup if value > STARTUP_TARGET]
+    for name in slow:
+        print "%s is over the startup target of %.0f ms" % (name, STARTUP_TARGET / 1000)
+    
+    if options.output:
+        f = open(options.output, 'w')
+        try:
+            json.dump({"python": platform.python_version(),
+                       "machine": platform.machine(),
+                       "results": results}, f, indent=1, sort_keys=True)
+            f.write("\n")
+        finally:
+            f.close()
+    
+    if regressions:
+        print "%d benchmark(s) slower than the baseline by more than %.0f%%" % (regressions, options.threshold * 100)
+        return 1
+    if absent and not options.allow_missing:
+        print "%d benchmark(s) of the baseline missing from the results; pass --allow-missing to accept" % len(absent)
+        return 1
+    if slow:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(mainfunc())
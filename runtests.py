@@ -3,6 +3,42 @@
 print "Running tests..."
 
 import coordinate_test
+import ellipsoid_test
+import footprint_test
+import fovbox_test
+import fovio_test
+import fovarray_test
+import fovindex_test
+import fovserver_test
+import instrument_test
+import terrain_test
 
 print "Testing coordinate module..."
 coordinate_test.runtests()
+
+print "Testing ellipsoid module..."
+ellipsoid_test.runtests()
+
+print "Testing footprint module..."
+footprint_test.runtests()
+
+print "Testing fovbox module..."
+fovbox_test.runtests()
+
+print "Testing fovio module..."
+fovio_test.runtests()
+
+print "Testing fovarray module..."
+fovarray_test.runtests()
+
+print "Testing fovindex module..."
+fovindex_test.runtests()
+
+print "Testing fovserver module..."
+fovserver_test.runtests()
+
+print "Testing instrument module..."
+instrument_test.runtests()
+
+print "Testing terrain module..."
+terrain_test.runtests()
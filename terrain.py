@@ -0,0 +1,452 @@
+# File: terrain.py
+# Terrain-aware footprint computation over a digital elevation model.
+#
+# About:
+# Requires NumPy. <footprint.compute_footprint> treats the altitude as the
+# height above flat ground at sea level. Here the altitude is above the
+# datum of a DEM, and the center and corner rays of the camera are marched
+# until they meet the terrain.
+
+#
+# Module: terrain
+#
+# Description:
+# {<Dem>} - A memory-mapped elevation grid with a tile cache.
+# {<footprints>} - Terrain corrected <fovarray.footprints>.
+# {<compute_footprint>} - Terrain corrected <footprint.compute_footprint>.
+#
+# DEM files:
+# The grid is an ESRI float grid: a raw file of 32 bit floats, row by row
+# from the north edge (name.flt), and a text header (name.hdr) such as
+#
+#     ncols         3600
+#     nrows         3600
+#     xllcorner     -148.0
+#     yllcorner     64.0
+#     cellsize      0.000277777777778
+#     NODATA_value  -9999
+#     byteorder     LSBFIRST
+#
+# xllcenter and yllcenter may be given instead of the corners. Elevations
+# are in meters. Points outside the grid and NODATA cells have the
+# elevation <Dem.fill>, 0 (sea level) by default.
+#
+# Rays:
+# The center ray of a nadir camera hits the terrain right below it. The
+# corner rays leave the camera towards the corners of the flat footprint at
+# the height above that point, and are marched outwards in steps of one
+# cell. A ray only starts to be sampled where it has come down to the
+# highest elevation of the grid, and it has hit by the time it is down to
+# the lowest one. While a ray is high above the terrain it takes longer
+# steps, as far as the terrain could not rise to it at its steepest slope.
+# The crossing is linearly interpolated between the last two samples. All
+# rays of all poses march together as arrays.
+#
+
+import math
+import os
+
+import numpy
+
+import fovarray
+from coordinate import LRUCache
+from coordinate import UNITS
+from coordinate import getRadius
+from coordinate import EARTH_RADIUS_M
+from coordinate import DEG2RAD
+from coordinate import Point
+from ellipsoid import getEllipsoid
+from footprint import Footprint
+from footprint import parse_pose
+
+#
+# Constants:
+# TILESIZE   - rows and columns of a cached DEM tile.
+# TILE_CACHE - number of tiles a <Dem> keeps decoded.
+#
+TILESIZE = 256
+TILE_CACHE = 64
+
+
+#
+# Class: Dem
+#
+# A digital elevation model in an ESRI float grid, memory-mapped. Cells are
+# read a tile of about <TILESIZE> x <TILESIZE> at a time; the last <TILE_CACHE>
+# tiles used are kept decoded, as float64 with NODATA replaced by <fill>,
+# in a <coordinate.LRUCache>.
+#
+# Attributes:
+# ncols, nrows - {int} The size of the grid.
+# west, north  - {float} The longitude of the west edge and the latitude of
+#                the north edge of the grid, in decimal degrees.
+# cellsize     - {float} The size of a cell in decimal degrees.
+# nodata       - {float} The NODATA value, or None.
+# fill         - {float} The elevation of NODATA cells and of points
+#                outside the grid.
+# data         - {numpy.memmap} The (nrows, ncols) grid.
+# tiles        - {<coordinate.LRUCache>} The decoded tiles.
+#
+class Dem(object):
+    
+    #
+    # Method: Constructor
+    #
+    # Parameters:
+    # path     - {string} The .flt or .hdr file, or the name of both without
+    #            the extension.
+    # fill     - {float} See <fill>. Default is 0.
+    # tilesize - {int} Default is <TILESIZE>.
+    # tiles    - {int} Default is <TILE_CACHE>.
+    #
+    # Raises:
+    # EnvironmentError if the files cannot be read, ValueError if they are
+    # not an ESRI float grid.
+    #
+    def __init__(self, path, fill=0.0, tilesize=TILESIZE, tiles=TILE_CACHE):
+        (base, ext) = os.path.splitext(path)
+        if ext.lower() not in ('.flt', '.hdr'):
+            base = path
+        header = _read_header(base + '.hdr')
+        
+        try:
+            self.ncols = int(header['ncols'])
+            self.nrows = int(header['nrows'])
+            self.cellsize = float(header['cellsize'])
+            if 'xllcorner' in header:
+                self.west = float(header['xllcorner'])
+            else:
+                self.west = float(header['xllcenter']) - self.cellsize / 2.0
+            if 'yllcorner' in header:
+                south = float(header['yllcorner'])
+            else:
+                south = float(header['yllcenter']) - self.cellsize / 2.0
+        except KeyError, e:
+            raise ValueError("%s.hdr: missing %s" % (base, e))
+        if self.ncols < 2 or self.nrows < 2 or self.cellsize <= 0:
+            raise ValueError("%s.hdr: invalid grid size, at least 2 x 2 cells are needed" % base)
+        self.north = south + self.nrows * self.cellsize
+        
+        if 'nodata_value' in header:
+            self.nodata = float(header['nodata_value'])
+        else:
+            self.nodata = None
+        if header.get('byteorder', 'lsbfirst').lower() == 'msbfirst':
+            dtype = '>f4'
+        else:
+            dtype = '<f4'
+        
+        size = os.path.getsize(base + '.flt')
+        if size != self.ncols * self.nrows * 4:
+            raise ValueError("%s.flt: expected %d bytes, found %d" % (base, self.ncols * self.nrows * 4, size))
+        self.data = numpy.memmap(base + '.flt', dtype=dtype, mode='r', shape=(self.nrows, self.ncols))
+        
+        self.fill = float(fill)
+        self.tilesize = int(tilesize)
+        self.tilecols = (self.ncols + self.tilesize - 1) // self.tilesize
+        self.tiles = LRUCache(tiles)
+        self.limits = None
+    
+    
+    #
+    # Method: elevations
+    #
+    # Parameters:
+    # x, y - {array} Longitudes and latitudes in decimal degrees.
+    #
+    # Returns:
+    # {array} The elevations in meters, bilinearly interpolated between the
+    # cell centers.
+    #
+    def elevations(self, x, y):
+        x = numpy.asarray(x, dtype=numpy.float64).ravel()
+        y = numpy.asarray(y, dtype=numpy.float64).ravel()
+        c = numpy.clip((x - self.west) / self.cellsize - 0.5, 0.0, self.ncols - 1)
+        r = numpy.clip((self.north - y) / self.cellsize - 0.5, 0.0, self.nrows - 1)
+        c0 = numpy.minimum(c.astype(numpy.intp), self.ncols - 2)
+        r0 = numpy.minimum(r.astype(numpy.intp), self.nrows - 2)
+        fc = c - c0
+        fr = r - r0
+        
+        size = self.tilesize
+        keys = (r0 // size) * self.tilecols + c0 // size
+        z = numpy.empty(len(keys), dtype=numpy.float64)
+        if len(keys) == 0:
+            return z
+        
+        # group the samples by tile so every tile is looked up once; the
+        # tiles overlap by a row and a column, so all four cells around a
+        # sample are in the tile of its upper left one
+        if keys.min() == keys.max():
+            groups = [(int(keys[0]), slice(None))]
+        else:
+            order = numpy.argsort(keys, kind='mergesort')
+            bounds = numpy.flatnonzero(numpy.diff(keys[order])) + 1
+            groups = [(int(keys[i[0]]), i) for i in numpy.split(order, bounds)]
+        
+        for key, i in groups:
+            tile = self.tile(key)
+            rows = r0[i] % size
+            cols = c0[i] % size
+            (u, v) = (fc[i], fr[i])
+            z[i] = ((tile[rows, cols] * (1.0 - u) + tile[rows, cols + 1] * u) * (1.0 - v) +
+                    (tile[rows + 1, cols] * (1.0 - u) + tile[rows + 1, cols + 1] * u) * v)
+        
+        outside = ((x < self.west) | (x > self.west + self.ncols * self.cellsize) |
+                   (y > self.north) | (y < self.north - self.nrows * self.cellsize))
+        if outside.any():
+            z[outside] = self.fill
+        return z
+    
+    
+    #
+    # Method: tile
+    #
+    # Parameters:
+    # key - {int} The tile number, row major.
+    #
+    # Returns:
+    # {array} The decoded cells of the tile and the first row and column of
+    # the tiles south and east of it, <TILESIZE> + 1 square except at the
+    # south and east edges of the grid.
+    #
+    def tile(self, key):
+        tile = self.tiles.get(key)
+        if tile is None:
+            row = (key // self.tilecols) * self.tilesize
+            col = (key % self.tilecols) * self.tilesize
+            tile = numpy.array(self.data[row:row + self.tilesize + 1, col:col + self.tilesize + 1], dtype=numpy.float64)
+            if self.nodata is not None:
+                tile[tile == self.nodata] = self.fill
+            self.tiles.put(key, tile)
+        return tile
+    
+    
+    #
+    # Method: spacing
+    #
+    # Returns:
+    # {float} The narrowest width of a cell in meters, at the edge of the
+    # grid farthest from the equator.
+    #
+    def spacing(self):
+        south = self.north - self.nrows * self.cellsize
+        latitude = min(max(abs(self.north), abs(south)), 90.0)
+        return self.cellsize * DEG2RAD * EARTH_RADIUS_M * math.cos(latitude * DEG2RAD)
+    
+    
+    #
+    # Method: bounds
+    #
+    # The lowest and highest elevation, including <fill>, and an upper
+    # bound of the slope of the interpolated terrain. Computed on first use
+    # with one pass over the grid.
+    #
+    # Returns:
+    # {3-tuple} (lowest, highest, steepest); the elevations in meters, the
+    # slope in meters per meter.
+    #
+    def bounds(self):
+        if self.limits is None:
+            (lowest, highest) = (self.fill, self.fill)
+            (dx, dy) = (0.0, 0.0)
+            for row in xrange(0, self.nrows, self.tilesize):
+                block = numpy.array(self.data[row:row + self.tilesize + 1], dtype=numpy.float64)
+                if self.nodata is not None:
+                    block[block == self.nodata] = self.fill
+                lowest = min(lowest, block.min())
+                highest = max(highest, block.max())
+                dx = max(dx, numpy.abs(numpy.diff(block, axis=1)).max())
+                if len(block) > 1:
+                    dy = max(dy, numpy.abs(numpy.diff(block, axis=0)).max())
+            
+            height = self.cellsize * DEG2RAD * EARTH_RADIUS_M
+            width = self.spacing()
+            if width > 0:
+                steepest = dx / width + dy / height
+            else:
+                steepest = float('inf')
+            self.limits = (float(lowest), float(highest), float(steepest))
+        return self.limits
+    
+    
+#
+# Function: _read_header
+#
+# (Private) The keys, lower cased, and values of an ESRI grid header.
+#
+def _read_header(path):
+    header = {}
+    f = open(path)
+    try:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 2:
+                header[fields[0].lower()] = fields[1]
+    finally:
+        f.close()
+    return header
+
+
+#
+# Function: footprints
+#
+# Compute the terrain corrected footprints of N nadir camera poses at once.
+#
+# Parameters:
+# dem      - {<Dem>} The terrain.
+# lon, lat - {array} Center points in decimal degrees.
+# alt      - {array} Altitudes above the datum of the DEM, in `units'.
+# fovx     - {array} Fields of view in X, in degrees or radians per `angle'.
+# fovy     - {array} Fields of view in Y.
+# azimuth  - {array} Azimuths off North, in degrees or radians per `angle'.
+# units    - {string} Units of the altitude, a name from <coordinate.UNITS>.
+# angle    - {string} d for degrees, r for radians.
+# model    - {string} The earth model, see <footprint.compute_footprint>.
+#
+# The poses are not validated; use <footprint.parse_pose> for that.
+#
+# Returns:
+# {3-tuple} (corners, widths, heights) as returned by
+# <fovarray.footprints>. The corners are where the rays meet the terrain;
+# the widths and heights are those of the flat footprint at the height
+# above the terrain below the camera.
+#
+def footprints(dem, lon, lat, alt, fovx, fovy, azimuth, units='m', angle='d', model=None):
+    (lon, lat, alt, fov_x, fov_y, azimuth) = fovarray.pose_arrays(lon, lat, alt, fovx, fovy, azimuth, angle)
+    return footprint_corners(dem, lon, lat, alt, fov_x, fov_y, azimuth, units, getEllipsoid(model))
+
+
+#
+# Function: compute_footprint
+#
+# Validate a camera pose and compute its terrain corrected footprint, like
+# <footprint.compute_footprint>.
+#
+# Parameters:
+# dem - {<Dem>} The terrain.
+#
+# The other parameters are those of <footprint.compute_footprint>; the
+# altitude is above the datum of the DEM.
+#
+# Returns:
+# {<footprint.Footprint>} The footprint.
+#
+# Raises:
+# ValueError with a user readable message if the pose, units, angle or
+# model are invalid.
+#
+def compute_footprint(dem, lon, lat, alt, fovx, fovy, azimuth=0.0, units='m', angle='d', model=None):
+    if not units or units.lower() not in UNITS:
+        raise ValueError("Invalid option for units: %s" % units)
+    ellipsoid = getEllipsoid(model)
+    (cp, alt, fov_x, fov_y, azimuth) = parse_pose(lon, lat, alt, fovx, fovy, azimuth, angle)
+    
+    pose = [numpy.array([v], dtype=numpy.float64) for v in (cp.x, cp.y, alt, fov_x, fov_y, azimuth)]
+    (corners, widths, heights) = footprint_corners(dem, *pose + [units, ellipsoid])
+    points = [Point.fromFloats(float(x), float(y)) for (x, y) in corners[0]]
+    return Footprint(cp, points[fovarray.UL], points[fovarray.LL], points[fovarray.UR],
+                     points[fovarray.LR], float(widths[0]), float(heights[0]), units)
+
+
+#
+# Function: footprint_corners
+#
+# <footprints> of converted poses, as returned by <fovarray.pose_arrays>.
+#
+# The corner rays are those of the flat footprint at the height above the
+# terrain below the camera (<fovarray.footprint_corners>): each leaves the
+# camera towards its flat corner, so over level terrain the result is the
+# flat footprint.
+#
+# Parameters:
+# ellipsoid - {<ellipsoid.Ellipsoid>} The ellipsoid, or None for the sphere.
+#
+def footprint_corners(dem, lon, lat, alt, fov_x, fov_y, azimuth, units='m', ellipsoid=None):
+    r = getRadius(units)
+    zscale = r / EARTH_RADIUS_M
+    n = len(lon)
+    
+    height = numpy.maximum(alt - dem.elevations(lon, lat) * zscale, 0.0)
+    (flat, widths, heights) = fovarray.footprint_corners(lon, lat, height, fov_x, fov_y, azimuth, units, ellipsoid)
+    
+    # the four corner rays of a pose next to each other: horizontal
+    # distance per unit of descent and bearing
+    x = numpy.repeat(lon, 4)
+    y = numpy.repeat(lat, 4)
+    z = numpy.repeat(alt, 4)
+    (distance, bearing) = _inverse(x, y, flat[:, 1:, 0].ravel(), flat[:, 1:, 1].ravel(), r, ellipsoid)
+    h = numpy.repeat(height, 4)
+    slope = distance / numpy.where(h > 0, h, 1.0)
+    
+    distance = _march(dem, x, y, z, slope, bearing, r, zscale, ellipsoid)
+    (hx, hy) = _waypoint(x, y, distance, bearing, r, ellipsoid)
+    
+    corners = numpy.empty((n, 5, 2), dtype=numpy.float64)
+    corners[:, fovarray.CP, 0] = lon
+    corners[:, fovarray.CP, 1] = lat
+    corners[:, 1:, 0] = hx.reshape(n, 4)
+    corners[:, 1:, 1] = hy.reshape(n, 4)
+    
+    return (corners, widths, heights)
+
+
+#
+# Function: _march
+#
+# (Private) March the rays until they meet the terrain.
+#
+# Parameters:
+# x, y    - {array} The camera positions in decimal degrees.
+# z       - {array} The camera altitudes in the units of `r'.
+# slope   - {array} Horizontal distance per unit of descent of each ray.
+# bearing - {array} Bearing of each ray.
+# r       - {float} The earth radius.
+# zscale  - {float} Units of `r' per meter.
+#
+# Returns:
+# {array} The horizontal distance from the camera to the terrain along
+# each ray, in the units of `r'.
+#
+def _march(dem, x, y, z, slope, bearing, r, zscale, ellipsoid):
+    (lowest, highest, steepest) = dem.bounds()
+    step = dem.spacing() * zscale
+    
+    # a ray cannot meet the terrain above the highest elevation, and meets
+    # it by the lowest
+    near = numpy.maximum(z - highest * zscale, 0.0) * slope
+    far = numpy.maximum(z - lowest * zscale, 0.0) * slope
+    
+    distance = near.copy()
+    above = z - near / numpy.where(slope > 0, slope, 1.0) - dem.elevations(*_waypoint(x, y, near, bearing, r, ellipsoid)) * zscale
+    active = numpy.flatnonzero((above > 0) & (far > near))
+    
+    while len(active):
+        # step a cell, or farther while the ray is so high above the terrain
+        # that the terrain cannot rise to it within the step
+        s0 = distance[active]
+        a0 = above[active]
+        s1 = numpy.minimum(s0 + numpy.maximum(step, a0 / (1.0 / slope[active] + steepest)), far[active])
+        (wx, wy) = _waypoint(x[active], y[active], s1, bearing[active], r, ellipsoid)
+        a1 = z[active] - s1 / slope[active] - dem.elevations(wx, wy) * zscale
+        
+        hit = (a1 <= 0) | (s1 >= far[active])
+        crossing = numpy.where(a1 < 0, s0 + (s1 - s0) * a0 / (a0 - a1), s1)
+        distance[active] = numpy.where(hit, crossing, s1)
+        above[active] = a1
+        active = active[~hit]
+    
+    return distance
+
+
+def _waypoint(x, y, distance, bearing, r, ellipsoid):
+    if ellipsoid is None:
+        return fovarray.waypoint(x, y, distance, bearing, r)
+    return fovarray.ellipsoid_waypoint(x, y, distance * EARTH_RADIUS_M / r, bearing, ellipsoid)
+
+
+def _inverse(x0, y0, x1, y1, r, ellipsoid):
+    if ellipsoid is None:
+        return (fovarray.distance(x0, y0, x1, y1, r), fovarray.bearing(x0, y0, x1, y1))
+    (s, alpha) = fovarray.ellipsoid_inverse(x0, y0, x1, y1, ellipsoid)
+    return (s * r / EARTH_RADIUS_M, alpha)
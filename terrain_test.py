@@ -0,0 +1,206 @@
+import fovbox
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+try:
+    import numpy
+    import fovarray
+    import terrain
+except ImportError:
+    numpy = None
+
+def write_dem(base, z, west, south, cellsize, nodata=None, order='<f4', center=False):
+    """
+    Write the (nrows, ncols) elevations `z' as an ESRI float grid.
+    """
+    numpy.asarray(z, dtype=order).tofile(base + '.flt')
+    (nrows, ncols) = numpy.shape(z)
+    lines = ["ncols %d" % ncols, "nrows %d" % nrows, "cellsize %r" % cellsize]
+    if center:
+        lines += ["xllcenter %r" % (west + cellsize / 2.0), "yllcenter %r" % (south + cellsize / 2.0)]
+    else:
+        lines += ["xllcorner %r" % west, "yllcorner %r" % south]
+    if nodata is not None:
+        lines.append("NODATA_value %r" % nodata)
+    lines.append("byteorder %s" % (order[0] == '>' and "MSBFIRST" or "LSBFIRST"))
+    f = open(base + '.hdr', 'w')
+    f.write("\n".join(lines) + "\n")
+    f.close()
+
+class TestDem(unittest.TestCase):
+    """
+    Class: TestDem
+
+    Description:
+    The unit test cases for testing that DEM grids are read and
+    interpolated through the tile cache.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.base = os.path.join(self.directory, 'dem')
+        self.z = numpy.arange(20.0 * 30.0).reshape(20, 30)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def test_Cells(self):
+        write_dem(self.base, self.z, -148.0, 64.0, 0.1)
+        dem = terrain.Dem(self.base + '.flt', tilesize=8)
+        self.assertEquals((dem.ncols, dem.nrows), (30, 20))
+        self.assertAlmostEquals(dem.north, 66.0, 9)
+        # cell centers, a point between four cells and the edges
+        x = numpy.array([-147.95, -147.85, -147.9, -145.05, -148.0])
+        y = numpy.array([65.95, 65.95, 65.9, 64.05, 66.0])
+        z = dem.elevations(x, y)
+        for value, expected in zip(z, [0.0, 1.0, 15.5, 599.0, 0.0]):
+            self.assertAlmostEquals(value, expected, 9)
+        self.assertEquals(dem.bounds()[:2], (0.0, 599.0))
+
+
+    def test_Header(self):
+        z = self.z.copy()
+        z[0, 1] = -9999
+        write_dem(self.base, z, -148.0, 64.0, 0.1, nodata=-9999, order='>f4', center=True)
+        dem = terrain.Dem(self.base + '.hdr', fill=-5.0)
+        self.assertAlmostEquals(dem.west, -148.0, 9)
+        for value, expected in zip(dem.elevations([-147.95, -147.85, -149.0], [65.95, 65.95, 65.0]), [0.0, -5.0, -5.0]):
+            self.assertAlmostEquals(value, expected, 9)
+        self.assertEquals(dem.bounds()[:2], (-5.0, 599.0))
+
+        f = open(self.base + '.flt', 'ab')
+        f.write("\0" * 4)
+        f.close()
+        self.assertRaises(ValueError, terrain.Dem, self.base)
+        self.assertRaises(EnvironmentError, terrain.Dem, os.path.join(self.directory, 'missing'))
+
+
+    def test_Tiles(self):
+        write_dem(self.base, self.z, -148.0, 64.0, 0.1)
+        dem = terrain.Dem(self.base, tilesize=8, tiles=2)
+        x = numpy.linspace(-147.99, -145.01, 500)
+        y = numpy.linspace(65.99, 64.01, 500)
+        expected = dem.elevations(x, y)
+        # in another order and one at a time through the two tile cache
+        self.assertEquals(list(dem.elevations(x[::-1], y[::-1])[::-1]), list(expected))
+        self.assertEquals([dem.elevations(x[i:i+1], y[i:i+1])[0] for i in range(0, 500, 25)], list(expected[::25]))
+        (hits, misses, maxsize, size) = dem.tiles.info()
+        self.assertEquals(size, 2)
+        self.assert_(hits > 0)
+
+
+class TestTerrainFootprints(unittest.TestCase):
+    """
+    Class: TestTerrainFootprints
+
+    Description:
+    The unit test cases for testing that the corner rays are marched to the
+    terrain.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.base = os.path.join(self.directory, 'dem')
+        self.poses = numpy.array([(-147.5, 64.8, 1500.0, 30.0, 30.0, 20.0),
+                                  (-147.3, 64.6, 4000.0, 80.0, 20.0, 300.0),
+                                  (-147.7, 64.9, 600.0, 10.0, 60.0, 0.0),
+                                  (-147.6, 64.7, 200.0, 30.0, 30.0, 0.0)])
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def test_Level(self):
+        write_dem(self.base, numpy.zeros((100, 100)) + 500.0, -148.5, 64.0, 0.02)
+        dem = terrain.Dem(self.base)
+        (corners, widths, heights) = terrain.footprints(dem, *self.poses.T)
+        poses = self.poses.copy()
+        poses[:, 2] = numpy.maximum(poses[:, 2] - 500.0, 0.0)
+        for model in (None, 'wgs84'):
+            (corners, widths, heights) = terrain.footprints(dem, *self.poses.T, model=model)
+            (flat, flat_widths, flat_heights) = fovarray.footprints(*poses.T, model=model)
+            self.assert_((abs(corners - flat) < fovarray.TOLERANCE).all())
+            self.assert_((widths == flat_widths).all())
+        # the camera below the terrain sees a point
+        self.assert_((corners[3] == corners[3, 0]).all())
+
+
+    def test_Slope(self):
+        # terrain rising 100 m per cell, about 1 in 12, to the east
+        z = numpy.zeros((100, 100)) + numpy.arange(100.0) * 100.0
+        write_dem(self.base, z, -149.0, 64.0, 0.025)
+        dem = terrain.Dem(self.base)
+        alt = dem.elevations(self.poses[:3, 0], self.poses[:3, 1]) + 1000.0
+        poses = self.poses[:3].copy()
+        poses[:, 2] = alt
+        (corners, widths, heights) = terrain.footprints(dem, *poses.T)
+        (flat, flat_widths, flat_heights) = fovarray.footprints(poses[:, 0], poses[:, 1], 1000.0, poses[:, 3], poses[:, 4], poses[:, 5])
+        for i in range(3):
+            for j in (fovarray.UL, fovarray.LL, fovarray.UR, fovarray.LR):
+                # each ray meets the terrain where its height is the terrain height
+                d = fovarray.distance(poses[i, 0], poses[i, 1], corners[i, j, 0], corners[i, j, 1], 6371009.0)
+                slope = fovarray.distance(poses[i, 0], poses[i, 1], flat[i, j, 0], flat[i, j, 1], 6371009.0) / 1000.0
+                ground = dem.elevations(corners[i, j, :1], corners[i, j, 1:])[0]
+                self.assert_(abs(alt[i] - d / slope - ground) < 1.0)
+                # uphill corners are nearer, downhill ones farther than flat
+                if corners[i, j, 0] > poses[i, 0]:
+                    self.assert_(d < slope * 1000.0)
+                else:
+                    self.assert_(d > slope * 1000.0)
+
+
+    def test_Ridge(self):
+        # a ridge 800 m high 0.004 degrees east of the camera stops the
+        # eastern rays before they reach the ground behind it
+        z = numpy.zeros((100, 100))
+        z[:, 55] = 800.0
+        write_dem(self.base, z, -148.0, 64.5, 0.001)
+        dem = terrain.Dem(self.base)
+        (corners, widths, heights) = terrain.footprints(dem, -147.95, 64.55, 1000.0, 60.0, 10.0, 0.0)
+        self.assert_(corners[0, fovarray.UR, 0] < -147.9455 + 0.001)
+        self.assert_(corners[0, fovarray.UL, 0] < -147.95 - 0.005)
+
+
+    def test_ComputeFootprint(self):
+        write_dem(self.base, numpy.arange(100.0 * 100.0).reshape(100, 100) / 10.0, -148.5, 64.0, 0.02)
+        dem = terrain.Dem(self.base)
+        (corners, widths, heights) = terrain.footprints(dem, *self.poses.T, units='m', angle='d')
+        for i, pose in enumerate(self.poses):
+            fp = terrain.compute_footprint(dem, *pose)
+            for j, p in enumerate(fp.points()):
+                self.assertAlmostEquals(p.x, corners[i, j, 0], 12)
+                self.assertAlmostEquals(p.y, corners[i, j, 1], 12)
+            self.assertAlmostEquals(fp.width, widths[i], 9)
+        self.assertRaises(ValueError, terrain.compute_footprint, dem, -147.5, 64.8, -1, 30, 30)
+        self.assertRaises(ValueError, terrain.compute_footprint, dem, -147.5, 64.8, 1, 30, 30, 0, 'parsec')
+
+
+    def test_RunBatch(self):
+        write_dem(self.base, numpy.arange(100.0 * 100.0).reshape(100, 100) / 10.0, -148.5, 64.0, 0.02)
+        dem = terrain.Dem(self.base)
+        path = os.path.join(self.directory, 'poses.csv')
+        f = open(path, 'w')
+        f.write("\n".join([",".join(map(repr, pose)) for pose in self.poses]) + "\nbad,1,1,1,1,1\n")
+        f.close()
+        out = StringIO()
+        self.assertEquals(fovbox.run_batch_mmap(path, out, format='binary', dem=dem), 1)
+        values = numpy.fromstring(out.getvalue(), '<f8').reshape(-1, 12)
+        (corners, widths, heights) = terrain.footprints(dem, *self.poses.T)
+        self.assert_((values[:, :10] == corners.reshape(-1, 10)).all())
+
+if numpy is None:
+    TestDem = unittest.skip("NumPy is not installed")(TestDem)
+    TestTerrainFootprints = unittest.skip("NumPy is not installed")(TestTerrainFootprints)
+
+
+
+def runtests():
+    for case in (TestDem, TestTerrainFootprints):
+        suite = unittest.TestLoader().loadTestsFromTestCase(case)
+        unittest.TextTestRunner(verbosity=2).run(suite)